@@ -0,0 +1,46 @@
+import random
+from datetime import date, timedelta
+from itertools import accumulate
+
+from core.database import DatabaseHandler
+from core.transaction import TransactionFactory
+
+# Категорії витрат зі спаданням частоти (закон Ципфа): їжа трапляється значно частіше, ніж ремонт
+EXPENSE_CATEGORIES = [
+    "Food", "Transport", "Cafe", "Utilities", "Rent", "Health", "Clothes", "Fun",
+    "Gifts", "Travel", "Education", "Electronics", "Sport", "Pets", "Repair",
+]
+INCOME_CATEGORIES = ["Salary", "Bonus", "Freelance", "Gift", "Interest"]
+
+
+def _zipf_weights(count, s=1.1):
+    return list(accumulate(1 / (rank ** s) for rank in range(1, count + 1)))
+
+
+def generate_rows(count, seed=42, start=date(2018, 1, 1), years=6, income_share=0.15):
+    # Детермінований генератор кортежів (type, amount, category, date, description)
+    rng = random.Random(seed)
+    expense_weights = _zipf_weights(len(EXPENSE_CATEGORIES))
+    income_weights = _zipf_weights(len(INCOME_CATEGORIES))
+    span = years * 365
+    for i in range(count):
+        day = (start + timedelta(days=rng.randrange(span))).isoformat()
+        if rng.random() < income_share:
+            category = rng.choices(INCOME_CATEGORIES, cum_weights=income_weights)[0]
+            amount = round(rng.lognormvariate(8.5, 0.6), 2)
+            yield "Income", amount, category, day, f"{category} #{i}"
+        else:
+            category = rng.choices(EXPENSE_CATEGORIES, cum_weights=expense_weights)[0]
+            amount = round(rng.lognormvariate(5.5, 1.0), 2)
+            yield "Expense", amount, category, day, f"{category} #{i}"
+
+
+def generate_ledger(db_path, count, seed=42, chunk_size=10000, **options):
+    # Заповнює БД напряму через save_many — без спостерігачів і журналу
+    db = DatabaseHandler(db_path)
+    try:
+        transactions = (TransactionFactory.create_transaction(*row)
+                        for row in generate_rows(count, seed=seed, **options))
+        return db.save_many(transactions, chunk_size=chunk_size)
+    finally:
+        db.close()
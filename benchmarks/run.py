@@ -0,0 +1,372 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generator import generate_ledger
+from core.manager import FinanceManager
+from ui.list_model import TransactionListModel
+
+DEFAULT_SIZES = [10_000, 100_000]
+
+
+def _measure(func, repeat):
+    # Повертає (тривалості, результат останнього запуску)
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def _stats(timings, ops=1):
+    median = statistics.median(timings)
+    return {
+        "median_s": median,
+        "min_s": min(timings),
+        "ops": ops,
+        "ops_per_sec": ops / median if median > 0 else None,
+    }
+
+
+class BenchContext:
+    # Кожен бенчмарк працює з власною копією згенерованої БД
+    def __init__(self, source_db, work_dir):
+        self.source_db = source_db
+        self.work_dir = work_dir
+        self._counter = 0
+
+    def fresh_db(self):
+        self._counter += 1
+        path = os.path.join(self.work_dir, f"bench-{self._counter}.db")
+        shutil.copyfile(self.source_db, path)
+        return path
+
+    def manager(self, db_path=None, **options):
+        return FinanceManager(db_path=db_path or self.fresh_db(),
+                              log_path=os.path.join(self.work_dir, "bench-log.txt"), **options)
+
+
+# ==== Бенчмарки ====
+def bench_startup(ctx, repeat, ops):
+    db_path = ctx.fresh_db()
+
+    def run():
+        FinanceManager(db_path=db_path, log_path=os.path.join(ctx.work_dir, "bench-log.txt")).close()
+    return _stats(_measure(run, repeat)[0])
+
+
+def bench_startup_replay(ctx, repeat, ops):
+    # Старт без знімка: повний прохід по історії (як до появи таблиці aggregates)
+    timings = []
+    for _ in range(repeat):
+        db_path = ctx.fresh_db()
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM aggregates")
+        conn.execute("UPDATE meta SET value = 0 WHERE key = 'snapshot_last_id'")
+        conn.commit()
+        conn.close()
+        started = time.perf_counter()
+        ctx.manager(db_path).close()
+        timings.append(time.perf_counter() - started)
+    return _stats(timings)
+
+
+def bench_add_transaction(ctx, repeat, ops, profile="safe"):
+    manager = ctx.manager(profile=profile)
+    try:
+        def run():
+            for i in range(ops):
+                manager.add_transaction("Expense", 12.5, "Food", "2024-06-01", f"bench {i}")
+        return _stats(_measure(run, repeat)[0], ops)
+    finally:
+        manager.close()
+
+
+def bench_add_transaction_group_commit(ctx, repeat, ops):
+    # Усі додавання надсилаються одразу, а потік запису об'єднує їх у спільні commit
+    manager = ctx.manager(profile="balanced", group_commit=True)
+    try:
+        def run():
+            futures = [manager.add_transaction_async("Expense", 12.5, "Food", "2024-06-01", f"group {i}")
+                       for i in range(ops)]
+            for future in futures:
+                future.result()
+        result = _stats(_measure(run, repeat)[0], ops)
+        result["commits"] = manager.writer.commits
+        return result
+    finally:
+        manager.close()
+
+
+def bench_add_transactions_bulk(ctx, repeat, ops):
+    manager = ctx.manager()
+    rows = [("Expense", 12.5, "Food", "2024-06-01", f"bulk {i}") for i in range(ops)]
+    try:
+        return _stats(_measure(lambda: manager.add_transactions(rows), repeat)[0], ops)
+    finally:
+        manager.close()
+
+
+def bench_delete_transaction_by_id(ctx, repeat, ops):
+    manager = ctx.manager()
+    try:
+        ids = iter(range(1, ops * repeat + 1))
+
+        def run():
+            for _ in range(ops):
+                manager.delete_transaction_by_id(next(ids))
+        return _stats(_measure(run, repeat)[0], ops)
+    finally:
+        manager.close()
+
+
+def bench_load_transactions(ctx, repeat, ops):
+    # Без кешу результатів: вимірюється саме читання з БД
+    manager = ctx.manager(cache_entries=0)
+    try:
+        timings, loaded = _measure(manager.get_all_transactions, repeat)
+        return _stats(timings, len(loaded))
+    finally:
+        manager.close()
+
+
+def bench_balance_summary(ctx, repeat, ops):
+    manager = ctx.manager()
+    try:
+        def run():
+            for _ in range(ops):
+                manager.get_balance()
+                manager.get_summary()
+        return _stats(_measure(run, repeat)[0], ops)
+    finally:
+        manager.close()
+
+
+def bench_category_aggregation(ctx, repeat, ops):
+    manager = ctx.manager(cache_entries=0)
+    try:
+        return _stats(_measure(lambda: manager.aggregate("category", type="Expense"), repeat)[0])
+    finally:
+        manager.close()
+
+
+def bench_update_display_headless(ctx, repeat, ops):
+    # Те, що роблять фільтр і FinanceApp.update_display, без Tk: підрахунок рядків за фільтром,
+    # видиме вікно списку (з середини, як після прокрутки), підпис балансу
+    manager = ctx.manager()
+    model = TransactionListModel(manager)
+    try:
+        def run():
+            model.set_filters(type="Expense")
+            rows = model.rows(len(model) // 2, len(model) // 2 + 40)
+            lines = [(t.id, t.date.date().isoformat(), t.get_type(), t.category, f"{t.amount:.2f}") for t in rows]
+            balance = manager.get_balance()
+            summary = manager.get_summary()
+            lines.append(f"Баланс: {balance:.2f} грн | Дохід: {summary['income']} | Витрати: {summary['expense']}")
+            return len(lines)
+        timings, count = _measure(run, repeat)
+        return _stats(timings, count)
+    finally:
+        model.close()
+        manager.close()
+
+
+def bench_search(ctx, repeat, ops):
+    # Повнотекстовий пошук: популярна категорія, рідкісне слово з опису, префікс із фільтром
+    manager = ctx.manager(cache_entries=0)
+    try:
+        def run():
+            found = 0
+            for _ in range(ops):
+                found += len(manager.search("Food"))
+                found += len(manager.search("12345"))
+                found += len(manager.search("tra*", type="Expense", date_from="2020-01-01"))
+            return found
+        timings, _ = _measure(run, repeat)
+        return _stats(timings, ops * 3)
+    finally:
+        manager.close()
+
+
+def bench_query_cache(ctx, repeat, ops):
+    # Повторні читання, як при оновленні GUI, і кожне десяте — після додавання транзакції:
+    # запис скидає лише результати, що перетинаються з нею (тут — без меж дат)
+    manager = ctx.manager()
+    try:
+        def run():
+            for i in range(ops):
+                if i % 10 == 0:
+                    manager.add_transaction("Expense", 12.5, "Food", "2024-06-01", f"cache {i}")
+                manager.aggregate("category", type="Expense")
+                manager.aggregate(("month", "type"), date_to="2023-12-31")
+                manager.count_transactions(type="Income")
+                manager.get_page(0, 40, order="-date", date_to="2023-12-31")
+        timings, _ = _measure(run, repeat)
+        result = _stats(timings, ops)
+        stats = manager.cache.stats()
+        result["hit_rate"] = stats["hit_rate"]
+        result["invalidations"] = stats["invalidations"]
+        return result
+    finally:
+        manager.close()
+
+
+def _parse_importtime(stderr):
+    # Рядки "import time: self [us] | cumulative | package" -> {модуль: self, мкс}
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+def bench_cli_cold_start(ctx, repeat, ops):
+    # Холодний старт консольної команди в окремому процесі під -X importtime:
+    # загальний час, час імпортів і чи не підтягнулись GUI/графіки
+    db_path = ctx.fresh_db()
+    command = [sys.executable, "-X", "importtime", "-m", "finance_tracker", "--db", db_path,
+               "--log", os.path.join(ctx.work_dir, "bench-log.txt"), "balance"]
+    timings = []
+    modules = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+        timings.append(time.perf_counter() - started)
+        modules = _parse_importtime(completed.stderr)
+    result = _stats(timings)
+    result["import_s"] = sum(modules.values()) / 1e6
+    result["modules"] = len(modules)
+    result["heavy_imports"] = sorted(name for name in modules
+                                     if name.split(".")[0] in ("matplotlib", "tkinter", "numpy"))
+    return result
+
+
+BENCHMARKS = {
+    "startup": bench_startup,
+    "startup_replay": bench_startup_replay,
+    "add_transaction": bench_add_transaction,
+    "add_transaction_balanced": partial(bench_add_transaction, profile="balanced"),
+    "add_transaction_bulk_profile": partial(bench_add_transaction, profile="bulk"),
+    "add_transaction_group_commit": bench_add_transaction_group_commit,
+    "add_transactions_bulk": bench_add_transactions_bulk,
+    "delete_transaction_by_id": bench_delete_transaction_by_id,
+    "load_transactions": bench_load_transactions,
+    "balance_summary": bench_balance_summary,
+    "category_aggregation": bench_category_aggregation,
+    "search": bench_search,
+    "query_cache": bench_query_cache,
+    "update_display_headless": bench_update_display_headless,
+    "cli_cold_start": bench_cli_cold_start,
+}
+
+
+def run_benchmarks(sizes, seed=42, repeat=3, ops=200, only=None, work_dir=None):
+    names = only or list(BENCHMARKS)
+    owns_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="finance-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "ops": ops,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    try:
+        for size in sizes:
+            # Згенеровані БД кешуються в work_dir і перевикористовуються між запусками
+            source_db = os.path.join(work_dir, f"ledger-{size}-{seed}.db")
+            if not os.path.exists(source_db):
+                generate_ledger(source_db, size, seed=seed)
+            ctx = BenchContext(source_db, work_dir)
+            results = report["results"][str(size)] = {}
+            for name in names:
+                results[name] = BENCHMARKS[name](ctx, repeat, ops)
+                print(f"[{size}] {name}: {results[name]['median_s'] * 1000:.2f} ms", file=sys.stderr)
+    finally:
+        if owns_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def compare_reports(base, current, threshold=0.10):
+    # Порівнює медіани; регресія — якщо новий час більший за базовий більш ніж на threshold
+    rows = []
+    for size, benches in current["results"].items():
+        for name, result in benches.items():
+            previous = base["results"].get(size, {}).get(name)
+            if previous is None or not previous["median_s"]:
+                continue
+            ratio = result["median_s"] / previous["median_s"]
+            rows.append({
+                "size": size,
+                "benchmark": name,
+                "base_s": previous["median_s"],
+                "current_s": result["median_s"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            })
+    return {
+        "threshold": threshold,
+        "comparisons": rows,
+        "regressions": [row for row in rows if row["regression"]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки Finance Tracker")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ops", type=int, default=200, help="кількість операцій у бенчмарках додавання/видалення")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--work-dir", help="каталог для згенерованих БД (кешуються між запусками)")
+    parser.add_argument("--output", "-o", help="файл для JSON-звіту (за замовчуванням stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "CURRENT"), help="порівняти два JSON-звіти")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            current = json.load(f)
+        report = compare_reports(base, current, args.threshold)
+        exit_code = 1 if report["regressions"] else 0
+    else:
+        report = run_benchmarks(args.sizes, seed=args.seed, repeat=args.repeat, ops=args.ops,
+                                only=args.only, work_dir=args.work_dir)
+        exit_code = 0
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
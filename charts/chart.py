@@ -1,23 +1,232 @@
-import matplotlib.pyplot as plt
+# matplotlib імпортується лише під час створення фігури: модуль можна підключати
+# (напр. заради CHART_KINDS) без витрат на завантаження бібліотеки графіків
+import threading
 from collections import defaultdict
+from concurrent.futures import Future
+from core.observer import Observer
+from core.transaction import EXPENSE
+
+# Типи графіків, які вміє будувати ChartService
+CHART_KINDS = {
+    "expense_pie": "Витрати по категоріях",
+    "monthly_bar": "Доходи та витрати по місяцях",
+    "balance_line": "Баланс у часі",
+}
+
+
+def _split_monthly(rows):
+    # {(місяць, тип): сума} -> {місяць: (дохід, витрати)}
+    result = defaultdict(lambda: [0, 0])
+    for (month, t_type), total in rows.items():
+        result[month][0 if t_type == "Income" else 1] += total
+    return {month: tuple(values) for month, values in result.items()}
+
+
+# ==== Кеш агрегатів для графіків ====
+class ChartData(Observer):
+    # Агрегати рахуються в SQLite один раз і живуть до першої зміни транзакцій
+    def __init__(self, manager):
+        self.manager = manager
+        self.version = 0
+        self._cache = {}
+        # invalidate() викликається з потоку запису, done() у prepare — з пулу читання
+        self._lock = threading.Lock()
+        manager.subject.attach(self)
+
+    def update(self, transaction):
+        self.invalidate()
+
+    def update_many(self, transactions):
+        self.invalidate()
+
+    def on_remove(self, transaction):
+        self.invalidate()
+
+    def on_replay(self, transaction):
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+            self.version += 1
+
+    def _store(self, key, data, version):
+        # Дані, прочитані до зміни транзакцій (version застаріла), у кеш не потрапляють
+        with self._lock:
+            if self.version == version:
+                self._cache[key] = data
+
+    def _cached(self, key, compute):
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            version = self.version
+        data = compute()
+        self._store(key, data, version)
+        return data
+
+    def expenses_by_category(self):
+        return self._cached("expense_pie", lambda: self.manager.aggregate("category", type="Expense"))
+
+    def monthly(self):
+        # {місяць: (дохід, витрати)}
+        return self._cached("monthly_bar", lambda: _split_monthly(self.manager.aggregate(("month", "type"))))
+
+    def balance_over_time(self):
+        return self._cached("balance_line", lambda: self.manager.rollups.running_balance("month"))
+
+    def prepare(self, kind):
+        # Рахує агрегати у фоновому пулі читання FinanceManager і кладе їх у кеш,
+        # якщо за цей час транзакції не змінились. Повертає Future з даними.
+        result = Future()
+        if kind in self._cache or kind == "balance_line":
+            result.set_result(self.get(kind))
+            return result
+        if kind == "expense_pie":
+            future, convert = self.manager.aggregate_async("category", type="Expense"), dict
+        elif kind == "monthly_bar":
+            future, convert = self.manager.aggregate_async(("month", "type")), _split_monthly
+        else:
+            raise ValueError(f"Unknown chart kind: {kind}")
+        version = self.version
+
+        def done(f):
+            try:
+                data = convert(f.result())
+            except Exception as e:
+                result.set_exception(e)
+                return
+            self._store(kind, data, version)
+            result.set_result(data)
+        future.add_done_callback(done)
+        return result
+
+    def get(self, kind):
+        if kind == "expense_pie":
+            return self.expenses_by_category()
+        if kind == "monthly_bar":
+            return self.monthly()
+        if kind == "balance_line":
+            return self.balance_over_time()
+        raise ValueError(f"Unknown chart kind: {kind}")
+
+
+# ==== Малювання на осях (спільне для GUI і окремого вікна) ====
+# Кожна функція отримує артисти попереднього малювання того ж типу (або None)
+# і повертає нові, щоб наступного разу оновити їх на місці
+def _draw_expense_pie(ax, data, artists=None):
+    ax.clear()
+    ax.pie(list(data.values()), labels=list(data.keys()), autopct='%1.1f%%', startangle=140)
+    ax.set_title(CHART_KINDS["expense_pie"])
+    ax.axis('equal')
+    return None
+
+
+def _draw_monthly_bar(ax, data, artists=None):
+    months = list(data)
+    income = [data[m][0] for m in months]
+    expense = [data[m][1] for m in months]
+    if artists is not None and len(artists[0]) == len(months):
+        # Та сама кількість місяців — лише оновлюємо висоти стовпців
+        for patches, values in zip(artists, (income, expense)):
+            for patch, value in zip(patches, values):
+                patch.set_height(value)
+        ax.set_xticklabels(months, rotation=45, ha="right")
+        ax.relim()
+        ax.autoscale_view()
+        return artists
+    ax.clear()
+    positions = range(len(months))
+    artists = (
+        ax.bar([p - 0.2 for p in positions], income, width=0.4, label="Дохід", color="#44bd32"),
+        ax.bar([p + 0.2 for p in positions], expense, width=0.4, label="Витрати", color="#e84118"),
+    )
+    ax.set_xticks(list(positions))
+    ax.set_xticklabels(months, rotation=45, ha="right")
+    ax.legend()
+    ax.set_title(CHART_KINDS["monthly_bar"])
+    return artists
+
+
+def _draw_balance_line(ax, data, artists=None):
+    labels = [label for label, _ in data]
+    values = [value for _, value in data]
+    if artists is not None:
+        artists.set_data(range(len(values)), values)
+        ax.relim()
+        ax.autoscale_view()
+    else:
+        ax.clear()
+        artists, = ax.plot(range(len(values)), values, marker="o", color="#40739e")
+        ax.set_title(CHART_KINDS["balance_line"])
+    ax.set_xticks(range(len(labels)))
+    ax.set_xticklabels(labels, rotation=45, ha="right")
+    return artists
+
+
+_DRAWERS = {
+    "expense_pie": _draw_expense_pie,
+    "monthly_bar": _draw_monthly_bar,
+    "balance_line": _draw_balance_line,
+}
+
+
+# ==== Сервіс графіків ====
+class ChartService:
+    # Одна Figure на весь час життя застосунку (без pyplot — фігури не накопичуються)
+    def __init__(self, manager, figsize=(5, 5)):
+        from matplotlib.figure import Figure
+        self.data = ChartData(manager)
+        self.figure = Figure(figsize=figsize)
+        self.ax = self.figure.add_subplot()
+        self._rendered = None  # (kind, версія кешу) останнього малювання
+        self._artists = None
+
+    def render(self, kind):
+        # Повертає False, якщо даних немає; не перемальовує, якщо нічого не змінилось
+        if kind not in _DRAWERS:
+            raise ValueError(f"Unknown chart kind: {kind}")
+        data = self.data.get(kind)
+        if not data:
+            return False
+        state = (kind, self.data.version)
+        if state != self._rendered:
+            same_kind = self._rendered is not None and self._rendered[0] == kind
+            self._artists = _DRAWERS[kind](self.ax, data, self._artists if same_kind else None)
+            self.figure.tight_layout()
+            self._rendered = state
+        return True
+
+
+def save_chart(kind, data, path, figsize=(8, 5)):
+    # Малює вже пораховані дані у файл (формат — за розширенням); для консольних звітів
+    from matplotlib.figure import Figure
+    if kind not in _DRAWERS:
+        raise ValueError(f"Unknown chart kind: {kind}")
+    figure = Figure(figsize=figsize)
+    _DRAWERS[kind](figure.add_subplot(), data)
+    figure.tight_layout()
+    figure.savefig(path)
+
 
 def show_expense_pie(transactions):
     # Збираємо витрати по категоріях
-    categories = defaultdict(float)
-    for t in transactions:
-        if t.get_type().lower() == "expense":
-            categories[t.category] += t.amount
+    if hasattr(transactions, "sum_by_category"):
+        # TransactionFrame — векторизований підсумок
+        categories = transactions.sum_by_category(EXPENSE)
+    else:
+        categories = defaultdict(float)
+        for t in transactions:
+            if t.type_code == EXPENSE:
+                categories[t.category] += t.amount
 
     if not categories:
         print("Немає витрат для побудови графіку.")
         return
 
-    labels = list(categories.keys())
-    sizes = list(categories.values())
-
-    # Побудова діаграми
-    plt.figure(figsize=(6, 6))
-    plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140)
-    plt.title("Витрати по категоріях")
-    plt.axis('equal')
+    # Побудова діаграми в окремому вікні; фігура закривається після показу
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=(6, 6))
+    _draw_expense_pie(fig.add_subplot(), categories)
     plt.show()
+    plt.close(fig)
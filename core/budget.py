@@ -0,0 +1,150 @@
+import re
+from collections import namedtuple
+
+from core.observer import Observer
+from core.transaction import EXPENSE, from_minor
+
+# Частки ліміту, перетин яких надсилає сповіщення (0.8 — попередження, 1.0 — перевищення)
+ALERT_THRESHOLDS = (0.8, 1.0)
+
+# month у таблиці budgets: '' — ліміт на кожен місяць, 'YYYY-MM' — лише на вказаний
+EVERY_MONTH = ""
+
+_MONTH_RE = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+def check_month(month):
+    if month != EVERY_MONTH and not _MONTH_RE.fullmatch(month):
+        raise ValueError(f"Invalid month: {month!r} (expected YYYY-MM)")
+    return month
+
+
+class BudgetAlert(namedtuple("BudgetAlert", "month category level previous spent_minor limit_minor")):
+    # level — найбільший досягнутий поріг після зміни (0 — нижче за всі), previous — до неї
+    __slots__ = ()
+
+    @property
+    def rising(self):
+        return self.level > self.previous
+
+    @property
+    def spent(self):
+        return from_minor(self.spent_minor)
+
+    @property
+    def limit(self):
+        return from_minor(self.limit_minor)
+
+    def __str__(self):
+        usage = f"{self.spent:.2f} з {self.limit:.2f} ({self.spent_minor / self.limit_minor:.0%})"
+        if not self.rising:
+            return f"{self.category} {self.month}: знову в межах бюджету, {usage}"
+        if self.level >= 1:
+            return f"{self.category} {self.month}: бюджет перевищено, {usage}"
+        return f"{self.category} {self.month}: витрачено {usage}"
+
+
+# ==== Бюджети й сповіщення про перевитрати ====
+class Budget(Observer):
+    # Лічильники витрат за (категорія, місяць) у копійках ведуться лише для категорій,
+    # що мають бюджет: додавання чи видалення — кілька звернень до словників незалежно
+    # від кількості категорій і бюджетів. Зміна досягнутого порогу надсилається всім
+    # спостерігачам subject через on_alert.
+    def __init__(self, subject, thresholds=ALERT_THRESHOLDS):
+        self.subject = subject
+        self.thresholds = tuple(sorted(thresholds))
+        self.limits = {}   # (category, month | '') -> ліміт у копійках
+        self.spent = {}    # category -> {'YYYY-MM': витрати в копійках}
+        self._levels = {}  # (category, month) -> досягнутий поріг, лише ненульові
+
+    # ==== Observer ====
+    def update(self, transaction):
+        self._apply(transaction, 1)
+
+    def on_remove(self, transaction):
+        self._apply(transaction, -1)
+
+    def on_replay(self, transaction):
+        # Лічильники читаються з БД уже з цими рядками
+        pass
+
+    def _apply(self, transaction, sign):
+        if transaction.type_code != EXPENSE:
+            return
+        months = self.spent.get(transaction.category)
+        if months is None:
+            return
+        d = transaction.date
+        month = f"{d.year:04d}-{d.month:02d}"
+        months[month] = months.get(month, 0) + sign * transaction.amount_minor
+        self._check(transaction.category, month)
+
+    # ==== Стан ====
+    def restore(self, limits, spending):
+        # limits: (category, month, ліміт) з таблиці budgets; spending: (month, category, витрати)
+        # з DatabaseHandler.budget_spending. Пороги відновлюються без сповіщень.
+        self.limits.clear()
+        self.spent.clear()
+        self._levels.clear()
+        for category, month, limit_minor in limits:
+            self.limits[(category, month)] = limit_minor
+            self.spent.setdefault(category, {})
+        self.load_spending(spending, notify=False)
+
+    def load_spending(self, rows, notify=True):
+        for month, category, total in rows:
+            self.spent.setdefault(category, {})[month] = total
+            self._check(category, month, notify)
+
+    def tracks(self, category):
+        return category in self.spent
+
+    def set_limit(self, category, limit_minor, month=EVERY_MONTH):
+        # Витрати категорії мають бути вже завантажені (load_spending)
+        self.spent.setdefault(category, {})
+        self.limits[(category, month)] = limit_minor
+        self._recheck(category, month)
+
+    def remove_limit(self, category, month=EVERY_MONTH):
+        if self.limits.pop((category, month), None) is not None:
+            self._recheck(category, month)
+
+    def limit_for(self, category, month):
+        limit = self.limits.get((category, month))
+        return self.limits.get((category, EVERY_MONTH)) if limit is None else limit
+
+    def _recheck(self, category, month):
+        months = self.spent[category]
+        for m in (months if month == EVERY_MONTH else (month,)):
+            self._check(category, m)
+
+    def _check(self, category, month, notify=True):
+        limit = self.limit_for(category, month)
+        spent = self.spent[category].get(month, 0)
+        level = 0
+        if limit:
+            for threshold in self.thresholds:
+                if spent >= threshold * limit:
+                    level = threshold
+        key = (category, month)
+        previous = self._levels.get(key, 0)
+        if level == previous:
+            return
+        if level:
+            self._levels[key] = level
+        else:
+            del self._levels[key]
+        if notify and limit:
+            self.subject.notify_alert(BudgetAlert(month, category, level, previous, spent, limit))
+
+    # ==== Запити ====
+    def report(self, month):
+        # [(category, витрачено, ліміт)] для всіх бюджетів місяця, від найбільшої частки ліміту
+        categories = {category for category, m in self.limits if m in (month, EVERY_MONTH)}
+        rows = [(category, from_minor(self.spent[category].get(month, 0)),
+                 from_minor(self.limit_for(category, month))) for category in categories]
+        return sorted(rows, key=lambda row: (-row[1] / row[2] if row[2] else 0, row[0]))
+
+    def alerts(self, month):
+        # {category: досягнутий поріг} для місяця — напр. для банера при запуску
+        return {category: level for (category, m), level in self._levels.items() if m == month}
@@ -0,0 +1,190 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from core.metrics import METRICS
+from core.observer import Observer
+from core.transaction import to_epoch_day
+
+# Межі кешу: кількість результатів і сумарна кількість рядків у них
+# (більший результат не кешується — напр. повний список великої БД)
+CACHE_ENTRIES = 128
+CACHE_ROWS = 100_000
+
+# Які транзакції могли потрапити в результат: межі днів від епохи (None — без межі),
+# множина категорій і тип (None — будь-які)
+Scope = namedtuple("Scope", "first_day last_day categories type")
+
+
+def cache_key(name, type=None, date_from=None, date_to=None, categories=None, **options):
+    # Нормалізований ключ (рівні запити з різним записом фільтрів збігаються) і область результату
+    scope = Scope(
+        to_epoch_day(date_from) if date_from is not None else None,
+        to_epoch_day(date_to) if date_to is not None else None,
+        frozenset(categories) if categories is not None else None,
+        type.capitalize() if type is not None else None,
+    )
+    options = tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in options.items()))
+    return (name, scope, options), scope
+
+
+def _overlaps(scope, first_day, last_day, categories, types):
+    # Чи могли транзакції з днями first_day..last_day, категоріями і типами змінити результат
+    if scope.first_day is not None and last_day < scope.first_day:
+        return False
+    if scope.last_day is not None and first_day > scope.last_day:
+        return False
+    if scope.type is not None and scope.type not in types:
+        return False
+    return scope.categories is None or not scope.categories.isdisjoint(categories)
+
+
+# ==== Кеш результатів запитів ====
+class QueryCache(Observer):
+    # LRU результатів читання FinanceManager. Кожне додавання/видалення скидає лише записи,
+    # чия область перетинається зі зміненими транзакціями. generation зростає з кожною зміною:
+    # результат, прочитаний до неї, але збережений після, в кеш не потрапляє.
+    # validator() — необов'язковий маркер записів інших з'єднань (на основі PRAGMA data_version):
+    # якщо він змінився, кеш очищується повністю.
+    def __init__(self, max_entries=CACHE_ENTRIES, max_rows=CACHE_ROWS, validator=None):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.validator = validator
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (результат, область, кількість рядків)
+        self._rows = 0
+        self._token = None
+        self._lock = threading.Lock()
+
+    # ==== Observer ====
+    def update(self, transaction):
+        self.invalidate((transaction,))
+
+    def update_many(self, transactions):
+        self.invalidate(transactions)
+
+    def on_remove(self, transaction):
+        self.invalidate((transaction,))
+
+    def on_replay(self, transaction):
+        # Догін при старті відбувається до перших запитів
+        pass
+
+    # ==== Читання ====
+    def get(self, key):
+        # (True, результат) або (False, None); промах також рахується
+        if self.validator is not None:
+            # Поза блокуванням: validator може чекати на потік запису, що сам інвалідує кеш
+            token = self.validator()
+            with self._lock:
+                if token != self._token:
+                    self._clear()
+                    self._token = token
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                METRICS.inc("query_cache_total", result="miss")
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        METRICS.inc("query_cache_total", result="hit")
+        return True, entry[0]
+
+    def put(self, key, scope, value, generation):
+        # generation — значення self.generation до читання з БД
+        size = len(value) if hasattr(value, "__len__") else 1
+        if size > self.max_rows or not self.max_entries:
+            return
+        evicted = 0
+        with self._lock:
+            if generation != self.generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._rows -= old[2]
+            self._entries[key] = (value, scope, size)
+            self._rows += size
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                _, (_, _, old_size) = self._entries.popitem(last=False)
+                self._rows -= old_size
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            METRICS.inc("query_cache_total", evicted, result="eviction")
+
+    def fetch(self, key, scope, load):
+        found, value = self.get(key)
+        if found:
+            return value
+        generation = self.generation
+        value = load()
+        self.put(key, scope, value, generation)
+        return value
+
+    def fetch_rows(self, key, scope, rows):
+        # Потокова версія fetch: рядки з rows() віддаються одразу, а в кеш результат
+        # потрапляє, лише якщо його дочитали до кінця і він не більший за max_rows
+        found, value = self.get(key)
+        if found:
+            return iter(value)
+        generation = self.generation
+        return self._collect(key, scope, rows(), generation)
+
+    def _collect(self, key, scope, rows, generation):
+        collected = []
+        for row in rows:
+            if collected is not None:
+                collected.append(row)
+                if len(collected) > self.max_rows:
+                    collected = None
+            yield row
+        if collected is not None:
+            self.put(key, scope, collected, generation)
+
+    # ==== Інвалідація ====
+    def invalidate(self, transactions):
+        # Одна перевірка на запис кешу для всієї пачки: межі днів, категорії і типи змінених транзакцій
+        days, categories, types = [], set(), set()
+        for t in transactions:
+            days.append(t.day)
+            categories.add(t.category)
+            types.add(t.get_type())
+        if not days:
+            return
+        first_day, last_day = min(days), max(days)
+        with self._lock:
+            self.generation += 1
+            stale = [key for key, (_, scope, _) in self._entries.items()
+                     if _overlaps(scope, first_day, last_day, categories, types)]
+            for key in stale:
+                self._rows -= self._entries.pop(key)[2]
+            self.invalidations += len(stale)
+        if stale:
+            METRICS.inc("query_cache_total", len(stale), result="invalidation")
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.generation += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._rows = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "rows": self._rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.database import DatabaseHandler, CONNECTION_PROFILES
+from core.writer import GroupCommitWriter
+
+
+class ConnectionManager:
+    # Один потік запису (GroupCommitWriter) + обмежений пул потоків читання,
+    # кожен зі своїм read-only з'єднанням. Паралельне читання під час запису
+    # можливе лише в режимі WAL, тому профіль "safe" тут не підходить.
+    def __init__(self, db_path, profile="balanced", readers=4, commit_window=0.0, on_commit=None):
+        if CONNECTION_PROFILES[profile].get("journal_mode") != "WAL":
+            raise ValueError(f"Profile {profile!r} does not use WAL; concurrent reads need WAL")
+        self.db_path = db_path
+        self.profile = profile
+        self.writer = GroupCommitWriter(db_path, profile=profile, window=commit_window, on_commit=on_commit)
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="finance-reader")
+
+    def read(self, func, *args, **kwargs):
+        # func(db, *args, **kwargs) виконується в потоці пулу; генератори треба вичерпати всередині func
+        return self._executor.submit(self._run_read, func, args, kwargs)
+
+    def _run_read(self, func, args, kwargs):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = DatabaseHandler(self.db_path, profile=self.profile, read_only=True)
+            with self._readers_lock:
+                self._readers.append(db)
+        return func(db, *args, **kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._readers_lock:
+            for db in self._readers:
+                db.close()
+            self._readers.clear()
+        self.writer.close()
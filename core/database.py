@@ -1,58 +1,830 @@
+import json
+import re
 import sqlite3
-from core.transaction import IncomeTransaction, ExpenseTransaction
-from datetime import datetime
+from core.transaction import (IncomeTransaction, ExpenseTransaction, from_minor,
+                              to_epoch_day, from_epoch_day)
+from core.schema import ensure_schema
+from core.metrics import METRICS
+import functools
+import heapq
 import os
+from collections import defaultdict, namedtuple, OrderedDict
+from datetime import date
+from itertools import chain, islice
+from operator import attrgetter
+from pathlib import Path
+
+# SQL-вираз, що приводить тип рядка до імені з get_type()
+_TYPE_NAME_SQL = "CASE lower(type) WHEN 'income' THEN 'Income' ELSE 'Expense' END"
+
+# order -> (сортування за датою, спадання)
+_ORDERINGS = {
+    "id": (False, False),
+    "-id": (False, True),
+    "date": (True, False),
+    "-date": (True, True),
+}
+
+# Профілі з'єднання: компроміс між надійністю запису та швидкістю
+CONNECTION_PROFILES = {
+    # fsync на кожен commit; режим журналу не змінюється (він зберігається у файлі БД):
+    # нова БД отримує rollback-журнал, а БД, яку тримає в WAL інший процес (напр. GUI),
+    # лишається в WAL — перемикання назад або впало б з "database is locked", або зламало б його
+    "safe": {"synchronous": "FULL", "cached_statements": 128},
+    # WAL + NORMAL: commit без fsync, після збою живлення можна втратити лише останні транзакції
+    "balanced": {"journal_mode": "WAL", "synchronous": "NORMAL", "cached_statements": 256},
+    # Для масового імпорту: без fsync, великий кеш сторінок
+    "bulk": {"journal_mode": "WAL", "synchronous": "OFF", "temp_store": "MEMORY",
+             "cache_size": -65536, "cached_statements": 256},
+}
+
+# Вирази для DatabaseHandler.aggregate(group_by=...): (цілочисельна колонка для
+# внутрішнього GROUP BY, вираз ключа над нею для зовнішнього)
+_GROUP_BY = {
+    "type": ("type", "type"),
+    "category": ("category", "category"),
+    "day": ("day", "date(day * 86400, 'unixepoch')"),
+    "month": ("day", "strftime('%Y-%m', day * 86400, 'unixepoch')"),
+    "year": ("day", "strftime('%Y', day * 86400, 'unixepoch')"),
+}
+
+# Ключі знімка аналітики: scope -> (колонка групування g, ключ як вираз над g)
+_SNAPSHOT_KEYS = {
+    "total": ("''", "g"),
+    "category": ("category", "g"),
+    "month": ("day", "strftime('%Y-%m', g * 86400, 'unixepoch')"),
+}
+
+
+def _month_key(d):
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+# Скільки архівів одночасно тримати приєднаними (SQLite за замовчуванням дозволяє 10 ATTACH)
+MAX_ATTACHED = 8
+
+# Рядок реєстру partitions: архів одного року (суми — у копійках)
+Partition = namedtuple("Partition", "year path first_day last_day min_id max_id rows income_minor expense_minor")
+
+# Кількість, межі id і суми доходів/витрат — для звірки архіву з основною БД
+_STATS_SQL = '''
+    SELECT count(*), min(id), max(id),
+           ifnull(sum(CASE lower(type) WHEN 'income' THEN amount_minor END), 0),
+           ifnull(sum(CASE lower(type) WHEN 'expense' THEN amount_minor END), 0)
+    FROM {schema}.transactions WHERE {where}
+'''
+
+
+def archive_path(db_path, year):
+    # data/finance.db -> data/finance.2019.db
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.{year}{ext or '.db'}"
+
+
+def _read_only_uri(path):
+    # URI, що відкриває файл БД лише для читання
+    return Path(path).resolve().as_uri() + "?mode=ro"
+
+
+def _timed(op):
+    # Гістограма db_operation_seconds{op=...}; коли ввімкнено журнал повільних запитів,
+    # з'єднання отримує trace callback (ставиться у власному потоці з'єднання)
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with METRICS.timer("db_operation_seconds", sql=self._sync_tracing(), op=op):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _CursorChain:
+    # fetchmany по курсорах розділів, що відкриваються по черзі (для TransactionFrame.from_cursor)
+    def __init__(self, cursors):
+        self._cursors = iter(cursors)
+        self._current = None
+
+    def fetchmany(self, size):
+        while True:
+            if self._current is None:
+                self._current = next(self._cursors, None)
+                if self._current is None:
+                    return []
+            rows = self._current.fetchmany(size)
+            if rows:
+                return rows
+            self._current = None
+
+
+# До скількох збігів результати пошуку впорядковуються за bm25; для ширших запитів
+# (напр. назва популярної категорії) — новіші першими, без оцінки кожного збігу
+SEARCH_RANK_LIMIT = 5000
+
+
+def _fts_query(text):
+    # Кожне слово — окремий термін у лапках (решта синтаксису FTS5 з введення не інтерпретується);
+    # "слово*" шукає за початком слова
+    terms = [f'"{term}"{star}' for term, star in re.findall(r"(\w+)(\*?)", text)]
+    return " ".join(terms) or None
+
+
+def _build_filters(type=None, date_from=None, date_to=None, categories=None):
+    # Повертає (список умов WHERE, параметри); межі дат включні
+    clauses, params = [], []
+    if type is not None:
+        clauses.append("type = ?")
+        params.append(type.capitalize())
+    if date_from is not None:
+        clauses.append("day >= ?")
+        params.append(to_epoch_day(date_from))
+    if date_to is not None:
+        clauses.append("day <= ?")
+        params.append(to_epoch_day(date_to))
+    if categories is not None:
+        clauses.append("category IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(categories)))
+    return clauses, params
+
 
 class DatabaseHandler:
-    def __init__(self, db_path):
+    def __init__(self, db_path, profile="safe", read_only=False):
+        if profile not in CONNECTION_PROFILES:
+            raise ValueError(f"Unknown connection profile: {profile}")
         self.db_path = db_path
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.conn = sqlite3.connect(self.db_path)
+        self.profile = profile
+        self.read_only = read_only
+        settings = CONNECTION_PROFILES[profile]
+        if read_only:
+            # З'єднання для пулу читання: схему не чіпає, може закриватись з іншого потоку
+            self.conn = sqlite3.connect(_read_only_uri(db_path), uri=True, check_same_thread=False,
+                                        cached_statements=settings["cached_statements"])
+            pragmas = ("temp_store", "cache_size")
+        else:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            # uri=True — щоб ATTACH архівів міг відкривати їх лише для читання (?mode=ro)
+            self.conn = sqlite3.connect(self.db_path, uri=True, cached_statements=settings["cached_statements"])
+            pragmas = ("journal_mode", "synchronous", "temp_store", "cache_size")
+        for pragma in pragmas:
+            if pragma in settings:
+                self.conn.execute(f"PRAGMA {pragma} = {settings[pragma]}")
         self.cursor = self.conn.cursor()
-        self._create_table()
+        # Архівні розділи: реєстр перечитується після змін з інших з'єднань, файли приєднуються за потреби
+        self._partitions = []
+        self._data_version = None
+        self._attached = OrderedDict()
+        self._tracing = False
+        if not read_only:
+            self._create_table()
 
     def close(self):
         self.conn.close()
 
     def _create_table(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type TEXT NOT NULL,
-                amount REAL NOT NULL,
-                category TEXT NOT NULL,
-                date TEXT NOT NULL,
-                description TEXT
-            )
-        ''')
-        self.conn.commit()
+        # Схема та її міграції — у core.schema; після переходу зі старої схеми
+        # знімок аналітики перебудовується одним GROUP BY
+        if ensure_schema(self.conn):
+            self.fold_into_snapshot(0)
+
+    @staticmethod
+    def _row_to_transaction(row):
+        # Дата будується з цілого дня без розбору рядка
+        id, t_type, amount_minor, category, day, description = row
+        if t_type.lower() == "income":
+            return IncomeTransaction(from_minor(amount_minor), category, from_epoch_day(day), description, id=id)
+        elif t_type.lower() == "expense":
+            return ExpenseTransaction(from_minor(amount_minor), category, from_epoch_day(day), description, id=id)
+        return None
+
+    def _sync_tracing(self):
+        # Trace callback коштує виклик Python на кожен оператор (і на кожен оператор тригерів),
+        # тому ставиться лише поки ввімкнено журнал повільних запитів
+        tracing = METRICS.slow_query_threshold is not None
+        if tracing != self._tracing:
+            self.conn.set_trace_callback(METRICS.trace_sql if tracing else None)
+            self._tracing = tracing
+        return tracing
 
+    def _build(self, rows):
+        transactions = [t for t in map(self._row_to_transaction, rows) if t is not None]
+        METRICS.inc("db_rows_loaded_total", len(rows))
+        METRICS.inc("transactions_built_total", len(transactions), source="db")
+        return transactions
+
+    def _apply_aggregates(self, t_type, category, month, amount_minor, sign):
+        # Оновлює знімок у поточній SQL-транзакції (без commit)
+        for scope, key in (("total", ""), ("category", category), ("month", month)):
+            self.cursor.execute('''
+                INSERT INTO aggregates (scope, type, key, total, count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (scope, type, key) DO UPDATE SET
+                    total = total + excluded.total,
+                    count = count + excluded.count
+            ''', (scope, t_type, key, sign * amount_minor, sign))
+
+    @_timed("save_transaction")
     def save_transaction(self, transaction):
+        with self.conn:
+            self._insert(transaction)
+
+    def _insert(self, transaction):
+        # Вставка разом з оновленням знімка в поточній SQL-транзакції (без commit)
+        amount_minor = transaction.amount_minor
         self.cursor.execute('''
-            INSERT INTO transactions (type, amount, category, date, description)
+            INSERT INTO transactions (type, amount_minor, category, day, description)
             VALUES (?, ?, ?, ?, ?)
         ''', (
             transaction.get_type(),
-            transaction.amount,
+            amount_minor,
             transaction.category,
-            transaction.date.strftime('%Y-%m-%d'),
+            transaction.day,
             transaction.description
         ))
-        self.conn.commit()
+        transaction.id = self.cursor.lastrowid
+        self._apply_aggregates(transaction.get_type(), transaction.category,
+                               _month_key(transaction.date), amount_minor, 1)
+        self.cursor.execute('''
+            UPDATE meta SET value = max(value, ?) WHERE key = 'snapshot_last_id'
+        ''', (transaction.id,))
+        return transaction
 
-    def load_transactions(self):
-        self.cursor.execute('SELECT id, type, amount, category, date, description FROM transactions')
-        rows = self.cursor.fetchall()
+    @_timed("save_many")
+    def save_many(self, transactions, chunk_size=1000, on_batch=None):
+        # Потокова вставка пачками через executemany в одній SQL-транзакції.
+        # on_batch отримує збережені транзакції пачками лише після commit: їх перечитано з БД,
+        # тож пам'ять не залежить від розміру імпорту, а при відкаті спостерігачі нічого не бачать
+        source = transactions
+        transactions = iter(transactions)
+        saved = 0
+        first_id = last_id = None
+        batch = []
+        try:
+            with self.conn:
+                for batch in iter(lambda: list(islice(transactions, chunk_size)), []):
+                    rows = [(t.get_type(), t.amount_minor, t.category, t.day, t.description) for t in batch]
+                    self.cursor.executemany('''
+                        INSERT INTO transactions (type, amount_minor, category, day, description)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', rows)
+                    # AUTOINCREMENT видає id підряд, поки ми тримаємо блокування запису
+                    self.cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'")
+                    last_id = self.cursor.fetchone()[0]
+                    if first_id is None:
+                        first_id = last_id - len(batch) + 1
+                    deltas = defaultdict(lambda: [0, 0])
+                    for next_id, (t, row) in enumerate(zip(batch, rows), start=last_id - len(batch) + 1):
+                        t.id = next_id
+                        for key in (("total", t.get_type(), ""), ("category", t.get_type(), t.category),
+                                    ("month", t.get_type(), _month_key(t.date))):
+                            deltas[key][0] += row[1]
+                            deltas[key][1] += 1
+                    self.cursor.executemany('''
+                        INSERT INTO aggregates (scope, type, key, total, count)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT (scope, type, key) DO UPDATE SET
+                            total = total + excluded.total,
+                            count = count + excluded.count
+                    ''', [key + tuple(value) for key, value in deltas.items()])
+                    saved += len(batch)
+                if last_id is not None:
+                    self.cursor.execute('''
+                        UPDATE meta SET value = max(value, ?) WHERE key = 'snapshot_last_id'
+                    ''', (last_id,))
+        except BaseException:
+            # Відкочені id не лишаються на об'єктах, які ще доступні викликачу
+            for t in (source if isinstance(source, (list, tuple)) else batch):
+                t.id = None
+            raise
+        if on_batch is not None and first_id is not None:
+            cursor = self.conn.execute('''
+                SELECT id, type, amount_minor, category, day, description
+                FROM main.transactions WHERE id BETWEEN ? AND ? ORDER BY id
+            ''', (first_id, last_id))
+            for rows in iter(lambda: cursor.fetchmany(chunk_size), []):
+                on_batch([self._row_to_transaction(row) for row in rows])
+        return saved
 
-        transactions = []
-        for row in rows:
-            id, t_type, amount, category, date_str, description = row
-            if t_type.lower() == "income":
-                transactions.append(IncomeTransaction(amount, category, date_str, description, id=id))
-            elif t_type.lower() == "expense":
-                transactions.append(ExpenseTransaction(amount, category, date_str, description, id=id))
-        return transactions
+    @_timed("load_transactions")
+    def load_transactions(self, after_id=0):
+        return list(self.iter_transactions(after_id=after_id))
+
+    def iter_transactions(self, after_id=None, page_size=500, order="id", after_date=None, **filters):
+        # Keyset-пагінація: кожна сторінка — окремий запит від останнього ключа,
+        # тому пам'ять не залежить від розміру таблиці.
+        # order: "id" | "-id" | "date" | "-date" (дата сортується разом з id).
+        # За датою ключ — (after_date, after_id); без after_date дата шукається за after_id,
+        # і якщо такої транзакції вже немає (видалена), це помилка, а не перебір з початку.
+        # Кожен розділ читається власним індексом: за датою розділи йдуть по черзі
+        # (їхні роки не перетинаються), за id потоки розділів зливаються.
+        if order not in _ORDERINGS:
+            raise ValueError(f"Unknown order: {order}")
+        by_date, descending = _ORDERINGS[order]
+        clauses, params = _build_filters(**filters)
+        sources = self._sources(filters.get("date_from"), filters.get("date_to"))
+
+        key = None
+        if after_id is not None:
+            if not by_date:
+                key = (after_id,)
+            elif after_date is not None:
+                key = (to_epoch_day(after_date), after_id)
+            else:
+                key = self._date_key(after_id)
+                if key is None:
+                    raise ValueError(f"Transaction {after_id} not found; pass after_date to resume after it")
+        if key is not None:
+            # Розділи, що цілком лежать до ключа, не читаються
+            bounds = attrgetter("first_day", "last_day") if by_date else attrgetter("min_id", "max_id")
+            sources = [s for s in sources if s is None or (
+                bounds(s)[0] <= key[0] if descending else bounds(s)[1] >= key[0])]
+
+        streams = [self._iter_source(source, clauses, params, key, by_date, descending, page_size)
+                   for source in sources]
+        if len(streams) == 1:
+            return streams[0]
+        if by_date:
+            return chain.from_iterable(reversed(streams) if descending else streams)
+        return heapq.merge(*streams, key=attrgetter("id"), reverse=descending)
+
+    def _iter_source(self, source, clauses, params, key, by_date, descending, page_size):
+        op, direction = ("<", "DESC") if descending else (">", "ASC")
+        columns = "id, type, amount_minor, category, day, description"
+        while True:
+            where = list(clauses)
+            if key:
+                where.append(f"(day, id) {op} (?, ?)" if by_date else f"id {op} ?")
+            where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+            order_sql = f"day {direction}, id {direction}" if by_date else f"id {direction}"
+            sql = (f"SELECT {columns} FROM {self._schema(source)}.transactions {where_sql} "
+                   f"ORDER BY {order_sql} LIMIT ?")
+            with METRICS.timer("db_operation_seconds", sql=self._sync_tracing(), op="load_page"):
+                rows = self.conn.execute(sql, (*params, *(key or ()), page_size)).fetchall()
+            yield from self._build(rows)
+            if len(rows) < page_size:
+                return
+            last = rows[-1]
+            key = (last[4], last[0]) if by_date else (last[0],)
+
+    def _date_key(self, transaction_id):
+        # (day, id) транзакції — у основній БД або в архіві, чий діапазон id її містить
+        sources = [None] + [p for p in self._refresh_partitions() if p.min_id <= transaction_id <= p.max_id]
+        for source in sources:
+            row = self.conn.execute(f'SELECT day, id FROM {self._schema(source)}.transactions WHERE id = ?',
+                                    (transaction_id,)).fetchone()
+            if row:
+                return tuple(row)
+        return None
+
+    def query(self, type=None, date_from=None, date_to=None, categories=None, order="date", page_size=500):
+        # Фільтрація на боці SQLite через індекси (type, day) і (category, day)
+        return self.iter_transactions(order=order, page_size=page_size, type=type,
+                                      date_from=date_from, date_to=date_to, categories=categories)
+
+    @_timed("fetch_page")
+    def fetch_page(self, offset, limit, order="id", **filters):
+        # Сторінка за позицією — для віртуалізованого списку, що може стрибнути в будь-яке місце
+        if order not in _ORDERINGS:
+            raise ValueError(f"Unknown order: {order}")
+        by_date, descending = _ORDERINGS[order]
+        sources = self._sources(filters.get("date_from"), filters.get("date_to"))
+        if len(sources) > 1 and not by_date:
+            # id архівів і основної БД перемежовуються — позицію дає лише злиття потоків
+            return list(islice(self.iter_transactions(order=order, **filters), offset, offset + limit))
+        direction = "DESC" if descending else "ASC"
+        order_sql = f"day {direction}, id {direction}" if by_date else f"id {direction}"
+        clauses, params = _build_filters(**filters)
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        result = []
+        for source in (reversed(sources) if descending else sources):
+            schema = self._schema(source)
+            if len(sources) > 1:
+                # Розділи, що цілком лежать перед сторінкою, лише підраховуються
+                count = self.conn.execute(f'SELECT count(*) FROM {schema}.transactions {where_sql}',
+                                          params).fetchone()[0]
+                if offset >= count:
+                    offset -= count
+                    continue
+            rows = self.conn.execute(f'''
+                SELECT id, type, amount_minor, category, day, description FROM {schema}.transactions {where_sql}
+                ORDER BY {order_sql} LIMIT ? OFFSET ?
+            ''', (*params, limit, offset)).fetchall()
+            result.extend(self._build(rows))
+            limit -= len(rows)
+            offset = 0
+            if limit <= 0:
+                break
+        return result
+
+    @_timed("search")
+    def search(self, text, limit=50, offset=0, type=None, date_from=None, date_to=None, categories=None):
+        # Повнотекстовий пошук в описі та категорії; найрелевантніші (bm25) першими
+        match = _fts_query(text)
+        if match is None:
+            return []
+        clauses, params = _build_filters(type=type, date_from=date_from, date_to=date_to, categories=categories)
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sources = self._sources(date_from, date_to)
+        # Обмежений підрахунок: зупиняється на SEARCH_RANK_LIMIT + 1 збігу
+        hits = 0
+        for source in sources:
+            hits += self.conn.execute(f'''
+                SELECT count(*) FROM (
+                    SELECT 1 FROM {self._schema(source)}.transactions_fts WHERE transactions_fts MATCH ? LIMIT ?
+                )
+            ''', (match, SEARCH_RANK_LIMIT + 1 - hits)).fetchone()[0]
+            if hits > SEARCH_RANK_LIMIT:
+                break
+        ranked = hits <= SEARCH_RANK_LIMIT
+        if ranked:
+            rank_sql, order_sql = ", rank", "hits.rank, id DESC"
+        else:
+            # FTS5 сам віддає rowid за спаданням — вибірка зупиняється після LIMIT рядків
+            rank_sql, order_sql = "", "id DESC"
+        # З кількох розділів беремо по offset + limit найкращих і зливаємо їх тут
+        merged = len(sources) > 1
+        rows = []
+        for source in sources:
+            schema = self._schema(source)
+            rows += self.conn.execute(f'''
+                WITH hits AS (
+                    SELECT rowid AS id{rank_sql} FROM {schema}.transactions_fts WHERE transactions_fts MATCH ?
+                )
+                SELECT id, type, amount_minor, category, day, description{", hits.rank" if merged and ranked else ""}
+                FROM hits CROSS JOIN {schema}.transactions USING (id) {where_sql}
+                ORDER BY {order_sql} LIMIT ? OFFSET ?
+            ''', (match, *params, offset + limit if merged else limit, 0 if merged else offset)).fetchall()
+        if merged:
+            rows.sort(key=(lambda row: (row[6], -row[0])) if ranked else (lambda row: -row[0]))
+            rows = [row[:6] for row in rows[offset:offset + limit]]
+        return self._build(rows)
+
+    @_timed("count_search")
+    def count_search(self, text, limit=None, type=None, date_from=None, date_to=None, categories=None):
+        # limit обмежує підрахунок (досить для смуги прокрутки і значно дешевше на частих словах)
+        match = _fts_query(text)
+        if match is None:
+            return 0
+        clauses, params = _build_filters(type=type, date_from=date_from, date_to=date_to, categories=categories)
+        total = 0
+        for source in self._sources(date_from, date_to):
+            schema = self._schema(source)
+            if clauses:
+                sql = f'''
+                    WITH hits AS (SELECT rowid AS id FROM {schema}.transactions_fts WHERE transactions_fts MATCH ?)
+                    SELECT 1 FROM hits CROSS JOIN {schema}.transactions USING (id) WHERE {' AND '.join(clauses)}
+                '''
+            else:
+                sql = f'SELECT 1 FROM {schema}.transactions_fts WHERE transactions_fts MATCH ?'
+            args = [match, *params]
+            if limit is not None:
+                sql += ' LIMIT ?'
+                args.append(limit - total)
+            total += self.conn.execute(f'SELECT count(*) FROM ({sql})', args).fetchone()[0]
+            if limit is not None and total >= limit:
+                break
+        return total
+
+    @_timed("count_transactions")
+    def count_transactions(self, type=None, date_from=None, date_to=None, categories=None):
+        clauses, params = _build_filters(type=type, date_from=date_from, date_to=date_to, categories=categories)
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return sum(self.conn.execute(f'SELECT count(*) FROM {self._schema(source)}.transactions {where_sql}',
+                                     params).fetchone()[0]
+                   for source in self._sources(date_from, date_to))
+
+    @_timed("aggregate")
+    def aggregate(self, group_by="category", type=None, date_from=None, date_to=None, categories=None):
+        # group_by: одне поле або кортеж полів з _GROUP_BY; повертає {ключ: сума}
+        fields = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+        for field in fields:
+            if field not in _GROUP_BY:
+                raise ValueError(f"Unknown group_by: {field}")
+        clauses, params = _build_filters(type=type, date_from=date_from, date_to=date_to, categories=categories)
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Спершу сумуємо цілі копійки за цілими колонками, потім перетворюємо дні на ключі
+        columns_sql = ", ".join(dict.fromkeys(_GROUP_BY[field][0] for field in fields))
+        keys_sql = ", ".join(_GROUP_BY[field][1] for field in fields)
+        sources = self._sources(date_from, date_to)
+        totals = {}
+        for source in sources:
+            for row in self.conn.execute(f'''
+                SELECT {keys_sql}, sum(total) FROM (
+                    SELECT {columns_sql}, sum(amount_minor) AS total
+                    FROM {self._schema(source)}.transactions {where_sql}
+                    GROUP BY {columns_sql}
+                )
+                GROUP BY {keys_sql} ORDER BY {keys_sql}
+            ''', params):
+                key = row[0] if len(fields) == 1 else tuple(row[:-1])
+                totals[key] = totals.get(key, 0) + row[-1]
+        if len(sources) > 1:
+            totals = dict(sorted(totals.items()))
+        return {key: from_minor(total) for key, total in totals.items()}
+
+    def iter_daily_totals(self):
+        # (день від епохи, type, category, сума в копійках, кількість) — основа для core.rollups.Rollups
+        return chain.from_iterable(self.conn.execute(f'''
+            SELECT day, type, category, sum(amount_minor), count(*) FROM {self._schema(source)}.transactions
+            GROUP BY day, type, category
+        ''') for source in self._sources())
+
+    @_timed("load_frame")
+    def load_frame(self, type=None, date_from=None, date_to=None, categories=None):
+        # numpy імпортується лише тут, щоб не сповільнювати старт без аналітики
+        from core.frame import TransactionFrame, FRAME_COLUMNS_SQL
+        clauses, params = _build_filters(type=type, date_from=date_from, date_to=date_to, categories=categories)
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursors = (self.conn.execute(f'SELECT {FRAME_COLUMNS_SQL} FROM {self._schema(source)}.transactions {where_sql}',
+                                     params)
+                   for source in self._sources(date_from, date_to))
+        return TransactionFrame.from_cursor(_CursorChain(cursors))
 
     def delete_transaction(self, id):
-        self.cursor.execute('DELETE FROM transactions WHERE id = ?', (id,))
-        self.conn.commit()
+        deleted = self.delete_transactions([id])
+        return deleted[0] if deleted else None
+
+    @_timed("delete_transactions")
+    def delete_transactions(self, ids):
+        # Один DELETE ... RETURNING і один commit на весь набір id
+        with self.conn:
+            return self._delete_rows(ids)
+
+    def _delete_rows(self, ids):
+        ids = [int(i) for i in ids]
+        if not ids:
+            return []
+        self.cursor.execute('''
+            DELETE FROM transactions WHERE id IN (SELECT value FROM json_each(?))
+            RETURNING id, type, amount_minor, category, day, description
+        ''', (json.dumps(ids),))
+        rows = self.cursor.fetchall()
+        self._check_not_archived(set(ids).difference(row[0] for row in rows))
+        METRICS.inc("db_rows_loaded_total", len(rows))
+        # Рядки, новіші за знімок, у ньому ще не враховані
+        last_id = self.get_snapshot_last_id()
+        deleted = []
+        for row in rows:
+            transaction = self._row_to_transaction(row)
+            if transaction is None:
+                continue
+            if transaction.id <= last_id:
+                self._apply_aggregates(transaction.get_type(), transaction.category,
+                                       _month_key(transaction.date), row[2], -1)
+            deleted.append(transaction)
+        METRICS.inc("transactions_built_total", len(deleted), source="db")
+        return deleted
+
+    def _check_not_archived(self, ids):
+        # id, яких немає в основній БД, можуть лежати в архівах (лише для читання):
+        # тоді видалення не мовчить, а падає, і поточна SQL-транзакція відкочується.
+        # Межі id розділів перетинаються з основною БД, тож наявність перевіряється в самому архіві —
+        # окремим з'єднанням: _schema() може витіснити інший архів, а DETACH усередині транзакції неможливий
+        for p in self._refresh_partitions() if ids else ():
+            candidates = [i for i in ids if p.min_id <= i <= p.max_id]
+            if candidates:
+                conn = sqlite3.connect(self._archive_uri(p), uri=True)
+                try:
+                    found = conn.execute('SELECT min(id) FROM transactions WHERE id IN (SELECT value FROM json_each(?))',
+                                         (json.dumps(candidates),)).fetchone()[0]
+                finally:
+                    conn.close()
+                if found is not None:
+                    raise ValueError(f"Transaction {found} is in read-only archive {p.year}")
+
+    # ==== Знімок аналітики ====
+    def get_snapshot_last_id(self):
+        self.cursor.execute("SELECT value FROM meta WHERE key = 'snapshot_last_id'")
+        return self.cursor.fetchone()[0]
+
+    def load_snapshot(self):
+        self.cursor.execute('SELECT scope, type, key, total, count FROM aggregates')
+        return self.cursor.fetchall(), self.get_snapshot_last_id()
+
+    def fold_into_snapshot(self, after_id):
+        # Додає до знімка всі рядки з id > after_id одним GROUP BY на боці SQLite
+        with self.conn:
+            self.cursor.execute('SELECT max(id) FROM transactions WHERE id > ?', (after_id,))
+            last_id = self.cursor.fetchone()[0]
+            if last_id is None:
+                return after_id
+            for scope, (column_sql, key_sql) in _SNAPSHOT_KEYS.items():
+                self.cursor.execute(f'''
+                    INSERT INTO aggregates (scope, type, key, total, count)
+                    SELECT ?, t_type, {key_sql}, sum(total), sum(n) FROM (
+                        SELECT {_TYPE_NAME_SQL} AS t_type, {column_sql} AS g,
+                               sum(amount_minor) AS total, count(*) AS n
+                        FROM transactions
+                        WHERE id > ? AND id <= ? AND lower(type) IN ('income', 'expense')
+                        GROUP BY 1, 2
+                    )
+                    WHERE true
+                    GROUP BY 2, 3
+                    ON CONFLICT (scope, type, key) DO UPDATE SET
+                        total = total + excluded.total,
+                        count = count + excluded.count
+                ''', (scope, after_id, last_id))
+            self.cursor.execute('''
+                UPDATE meta SET value = ? WHERE key = 'snapshot_last_id'
+            ''', (last_id,))
+        return last_id
+
+    # ==== Бюджети ====
+    def load_budgets(self):
+        # (category, month, ліміт у копійках); month '' — ліміт на кожен місяць
+        return self.conn.execute('SELECT category, month, limit_minor FROM budgets').fetchall()
+
+    def save_budget(self, category, month, limit_minor):
+        with self.conn:
+            self.conn.execute('''
+                INSERT INTO budgets (category, month, limit_minor) VALUES (?, ?, ?)
+                ON CONFLICT (category, month) DO UPDATE SET limit_minor = excluded.limit_minor
+            ''', (category, month, limit_minor))
+
+    def delete_budget(self, category, month):
+        with self.conn:
+            return self.conn.execute('DELETE FROM budgets WHERE category = ? AND month = ?',
+                                     (category, month)).rowcount > 0
+
+    @_timed("budget_spending")
+    def budget_spending(self, categories):
+        # (month 'YYYY-MM', category, витрати в копійках) лише для вказаних категорій.
+        # Умова на lower(type) не користується індексом за типом, тож SQLite читає індекс
+        # (category, day): рядки вже впорядковані для внутрішнього GROUP BY, а одна категорія
+        # читає лише власні рядки.
+        params = (json.dumps(list(categories)),)
+        return list(chain.from_iterable(self.conn.execute(f'''
+            SELECT strftime('%Y-%m', day * 86400, 'unixepoch') AS month, category, sum(total) FROM (
+                SELECT category, day, sum(amount_minor) AS total FROM {self._schema(source)}.transactions
+                WHERE category IN (SELECT value FROM json_each(?)) AND lower(type) = 'expense'
+                GROUP BY category, day
+            )
+            GROUP BY category, month
+        ''', params) for source in self._sources()))
+
+    # ==== Архівні розділи (по файлу на рік) ====
+    def data_version(self):
+        # Змінюється, коли БД записало інше з'єднання (власні записи його не змінюють)
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _refresh_partitions(self):
+        # Реєстр перечитується, лише якщо БД змінило інше з'єднання
+        version = self.data_version()
+        if version != self._data_version:
+            self._partitions = [Partition(*row) for row in self.conn.execute(
+                f'SELECT {", ".join(Partition._fields)} FROM partitions ORDER BY year')]
+            self._data_version = version
+        return self._partitions
+
+    def list_partitions(self):
+        return list(self._refresh_partitions())
+
+    def _sources(self, date_from=None, date_to=None):
+        # Розділи, що перетинаються з діапазоном дат, у порядку років; None — основна БД
+        # (поточні роки: вона завжди новіша за всі архіви)
+        partitions = self._refresh_partitions()
+        if not partitions:
+            return [None]
+        first = to_epoch_day(date_from) if date_from is not None else None
+        last = to_epoch_day(date_to) if date_to is not None else None
+        sources = [p for p in partitions
+                   if (first is None or p.last_day >= first) and (last is None or p.first_day <= last)]
+        if last is None or last > partitions[-1].last_day:
+            sources.append(None)
+        return sources
+
+    def _archive_uri(self, partition):
+        # Архіви лежать поруч з основною БД
+        return _read_only_uri(Path(self.db_path).resolve().parent / partition.path)
+
+    def _schema(self, source):
+        # Архів приєднується лише для читання при першому зверненні; найдавніше
+        # використаний від'єднується, коли приєднано MAX_ATTACHED
+        if source is None:
+            return "main"
+        name = f"archive_{source.year}"
+        if name in self._attached:
+            self._attached.move_to_end(name)
+            return name
+        if len(self._attached) >= MAX_ATTACHED:
+            oldest, _ = self._attached.popitem(last=False)
+            self.conn.execute(f'DETACH DATABASE {oldest}')
+        self.conn.execute(f'ATTACH DATABASE ? AS {name}', (self._archive_uri(source),))
+        self._attached[name] = source
+        return name
+
+    def _stats(self, schema, where, params=()):
+        return self.conn.execute(_STATS_SQL.format(schema=schema, where=where), params).fetchone()
+
+    def _ledger_totals(self, last_id):
+        # (доходи, витрати) у копійках по основній БД (id <= last_id) і зареєстрованих архівах
+        _, _, _, income, expense = self._stats("main", "id <= ?", (last_id,))
+        for p in self._refresh_partitions():
+            income += p.income_minor
+            expense += p.expense_minor
+        return income, expense
+
+    def _snapshot_totals(self):
+        totals = dict(self.conn.execute("SELECT type, total FROM aggregates WHERE scope = 'total'"))
+        return totals.get("Income", 0), totals.get("Expense", 0)
+
+    def _check_no_older_rows(self, year, first_day):
+        first = self.conn.execute('SELECT min(day) FROM main.transactions').fetchone()[0]
+        if first is not None and first < first_day:
+            raise ValueError(f"Cannot archive year {year}: main database still has rows "
+                             f"from {from_epoch_day(first).year}")
+
+    def archive_year(self, year):
+        # Переносить рядки закритого року в окремий файл у два кроки:
+        # 1) копія в новий файл і звірка з основною БД (основна БД не змінюється);
+        # 2) під блокуванням запису — повторна звірка, реєстрація розділу, видалення рядків
+        #    з основної БД і перевірка, що загальні суми до і після збігаються зі знімком.
+        # Збій між кроками лишає дані в основній БД, а недобудований файл перезапишеться.
+        # Повертає Partition або None, якщо за рік немає рядків.
+        if year >= date.today().year:
+            raise ValueError(f"Year {year} is not closed yet")
+        partitions = self._refresh_partitions()
+        if partitions and year <= partitions[-1].year:
+            raise ValueError(f"Year {year} is already archived")
+        first_day, last_day = to_epoch_day(date(year, 1, 1)), to_epoch_day(date(year, 12, 31))
+        # Основна БД має лишатись новішою за всі архіви (на цьому побудовано _sources)
+        self._check_no_older_rows(year, first_day)
+        self.fold_into_snapshot(self.get_snapshot_last_id())
+        stats = self._stats("main", "day BETWEEN ? AND ?", (first_day, last_day))
+        if stats[0] == 0:
+            return None
+
+        path = archive_path(self.db_path, year)
+        if os.path.exists(path):
+            os.remove(path)
+        archive = sqlite3.connect(path)
+        try:
+            ensure_schema(archive)
+            archive.execute('ATTACH DATABASE ? AS source', (os.path.abspath(self.db_path),))
+            with archive:
+                archive.execute('''
+                    INSERT INTO transactions (id, type, amount_minor, category, day, description)
+                    SELECT id, type, amount_minor, category, day, description FROM source.transactions
+                    WHERE day BETWEEN ? AND ?
+                ''', (first_day, last_day))
+            archive.execute('DETACH DATABASE source')
+            copied = archive.execute(_STATS_SQL.format(schema="main", where="true")).fetchone()
+        finally:
+            archive.close()
+        if copied != stats:
+            os.remove(path)
+            raise RuntimeError(f"Archive {path} does not match year {year}")
+
+        rows, min_id, max_id, income, expense = stats
+        partition = Partition(year, os.path.basename(path), first_day, last_day, min_id, max_id, rows, income, expense)
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._check_no_older_rows(year, first_day)
+            if self._stats("main", "day BETWEEN ? AND ?", (first_day, last_day)) != stats:
+                raise RuntimeError(f"Year {year} changed while it was being archived")
+            last_id = self.get_snapshot_last_id()
+            before = self._ledger_totals(last_id)
+            self.conn.execute(f'INSERT INTO partitions ({", ".join(Partition._fields)}) VALUES '
+                              f'({", ".join("?" * len(Partition._fields))})', partition)
+            self.conn.execute('DELETE FROM transactions WHERE day BETWEEN ? AND ?', (first_day, last_day))
+            self._data_version = None
+            after = self._ledger_totals(last_id)
+            if not before == after == self._snapshot_totals():
+                raise RuntimeError(f"Totals changed while archiving year {year}: {before} -> {after}")
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            self._data_version = None
+            os.remove(path)
+            raise
+        return partition
+
+    def archive_years(self, through_year, vacuum=True):
+        # Архівує всі роки до through_year включно; vacuum стискає основну БД після перенесення
+        first = self.conn.execute('SELECT min(day) FROM transactions').fetchone()[0]
+        archived = []
+        if first is not None:
+            for year in range(from_epoch_day(first).year, through_year + 1):
+                partition = self.archive_year(year)
+                if partition is not None:
+                    archived.append(partition)
+        if archived and vacuum:
+            self.conn.execute('VACUUM')
+        return archived
+
+    def verify_partitions(self):
+        # Перевірка цілісності: вміст кожного архіву відповідає реєстру, а сума доходів
+        # і витрат по всіх розділах — знімку аналітики. Повертає список розбіжностей.
+        problems = []
+        _, _, _, income, expense = self._stats("main", "id <= ?", (self.get_snapshot_last_id(),))
+        for p in self._refresh_partitions():
+            try:
+                stats = self._stats(self._schema(p), "true")
+            except sqlite3.Error as e:
+                problems.append(f"{p.year}: {e}")
+                continue
+            if stats != (p.rows, p.min_id, p.max_id, p.income_minor, p.expense_minor):
+                problems.append(f"{p.year}: вміст архіву не збігається з реєстром")
+            income += stats[3]
+            expense += stats[4]
+        if (income, expense) != self._snapshot_totals():
+            problems.append("суми по розділах не збігаються зі знімком аналітики")
+        return problems
@@ -0,0 +1,72 @@
+import numpy as np
+
+from core.transaction import INCOME, EXPENSE, MINOR_UNITS
+
+# SQL, що одразу віддає колонки у вигляді чисел: тег типу, сума та день від епохи
+FRAME_COLUMNS_SQL = f'''
+    CASE lower(type) WHEN 'income' THEN {INCOME} WHEN 'expense' THEN {EXPENSE} ELSE 0 END,
+    amount_minor / {MINOR_UNITS}.0,
+    category,
+    day
+'''
+
+
+class TransactionFrame:
+    # Колонкове представлення транзакцій для векторизованої аналітики
+    def __init__(self, amounts, days, type_codes, category_codes, categories):
+        self.amounts = amounts                # float64
+        self.days = days                      # int32, дні від 1970-01-01
+        self.type_codes = type_codes          # int8, INCOME / EXPENSE
+        self.category_codes = category_codes  # int32, індекси у categories
+        self.categories = categories          # список назв категорій
+
+    @classmethod
+    def from_cursor(cls, cursor, chunk_size=65536):
+        # cursor має повертати рядки (type_code, amount, category, epoch_day) — див. FRAME_COLUMNS_SQL
+        category_index = {}
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            type_codes, amounts, categories, days = zip(*rows)
+            codes = [category_index.setdefault(c, len(category_index)) for c in categories]
+            chunks.append((
+                np.array(amounts, dtype=np.float64),
+                np.array(days, dtype=np.int32),
+                np.array(type_codes, dtype=np.int8),
+                np.array(codes, dtype=np.int32),
+            ))
+        if chunks:
+            columns = [np.concatenate(parts) for parts in zip(*chunks)]
+        else:
+            columns = [np.empty(0, dtype=dtype) for dtype in (np.float64, np.int32, np.int8, np.int32)]
+        return cls(*columns, list(category_index))
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def _mask(self, type_code):
+        if type_code is None:
+            return slice(None)
+        return self.type_codes == type_code
+
+    def total(self, type_code=None):
+        return float(self.amounts[self._mask(type_code)].sum())
+
+    def balance(self):
+        return self.total(INCOME) - self.total(EXPENSE)
+
+    def sum_by_category(self, type_code=None):
+        mask = self._mask(type_code)
+        codes = self.category_codes[mask]
+        sums = np.bincount(codes, weights=self.amounts[mask], minlength=len(self.categories))
+        present = np.bincount(codes, minlength=len(self.categories)) > 0
+        return {self.categories[i]: float(sums[i]) for i in np.flatnonzero(present)}
+
+    def sum_by_month(self, type_code=None):
+        mask = self._mask(type_code)
+        months = self.days[mask].astype('datetime64[D]').astype('datetime64[M]')
+        keys, inverse = np.unique(months, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=self.amounts[mask], minlength=len(keys))
+        return {str(key): float(value) for key, value in zip(keys, sums)}
@@ -0,0 +1,58 @@
+import csv
+import time
+from datetime import datetime
+
+# Відповідність полів транзакції заголовкам CSV за замовчуванням
+DEFAULT_COLUMNS = {
+    "type": "type",
+    "amount": "amount",
+    "category": "category",
+    "date": "date",
+    "description": "description",
+}
+
+
+def _parse_amount(value):
+    # Банківські виписки часто містять пробіли між розрядами і десяткову кому
+    return float(value.replace(" ", "").replace("\u00a0", "").replace(",", "."))
+
+
+def read_csv_rows(path, columns=None, delimiter=",", encoding="utf-8",
+                  date_format="%Y-%m-%d", default_category="Other"):
+    # Генератор кортежів для FinanceManager.add_transactions — файл читається потоково
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    with open(path, newline="", encoding=encoding) as f:
+        for record in csv.DictReader(f, delimiter=delimiter):
+            amount = _parse_amount(record[columns["amount"]])
+            t_type = record.get(columns["type"])
+            if not t_type:
+                # Виписка без колонки типу: знак суми визначає дохід/витрату
+                t_type = "Expense" if amount < 0 else "Income"
+                amount = abs(amount)
+            date = record[columns["date"]].strip()
+            if date_format != "%Y-%m-%d":
+                date = datetime.strptime(date, date_format)
+            category = record.get(columns["category"]) or default_category
+            description = record.get(columns["description"]) or ""
+            yield t_type, amount, category, date, description
+
+
+def import_csv(manager, path, chunk_size=1000, progress=None, **read_options):
+    started = time.perf_counter()
+    count = 0
+
+    def rows():
+        nonlocal count
+        for row in read_csv_rows(path, **read_options):
+            yield row
+            count += 1
+            if progress is not None and count % chunk_size == 0:
+                progress(count, time.perf_counter() - started)
+
+    added = manager.add_transactions(rows(), chunk_size=chunk_size)
+    seconds = time.perf_counter() - started
+    return {
+        "rows": added,
+        "seconds": seconds,
+        "rows_per_sec": added / seconds if seconds > 0 else 0.0,
+    }
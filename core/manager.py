@@ -1,49 +1,329 @@
-from core.transaction import TransactionFactory
+import threading
+from concurrent.futures import Future
+from datetime import date
+from core.transaction import TransactionFactory, to_minor
 from core.observer import Subject, Logger, Analytics
 from core.database import DatabaseHandler
+from core.rollups import Rollups
+from core.budget import Budget, EVERY_MONTH, check_month
+from core.cache import QueryCache, cache_key
+from core.connections import ConnectionManager
+from core.writer import GroupCommitWriter
+from core.metrics import METRICS
 
 class FinanceManager:
-    def __init__(self, db_path="data/finance.db"):
+    def __init__(self, db_path="data/finance.db", log_path="log.txt", profile="safe",
+                 group_commit=False, commit_window=0.0, readers=0, cache_entries=None):
+        # Спостерігачів сповіщають і головний потік, і потік запису
+        self._notify_lock = threading.RLock()
         self.subject = Subject()
-        self.logger = Logger()
+        self.logger = Logger(log_path)
         self.analytics = Analytics()
 
+        # Кеш результатів читання: записи скидаються сповіщеннями про змінені транзакції.
+        # cache_entries=0 вимикає кеш.
+        self.cache = QueryCache() if cache_entries is None else QueryCache(max_entries=cache_entries)
+
+        self.subject.attach(self.cache)
         self.subject.attach(self.logger)
         self.subject.attach(self.analytics)
 
-        self.db = DatabaseHandler(db_path)
+        self.db = DatabaseHandler(db_path, profile=profile)
+        self._rollups = None
 
-        # Повідомляємо аналітику про всі існуючі транзакції
-        for transaction in self.db.load_transactions():
-            self.subject.notify(transaction)
+        # Відновлюємо аналітику зі знімка і доганяємо лише новіші рядки
+        with METRICS.timer("startup_replay_seconds"):
+            snapshot, last_id = self.db.load_snapshot()
+            self.analytics.restore(snapshot)
+            for transaction in self.db.iter_transactions(after_id=last_id):
+                self.subject.notify_replayed(transaction)
+            self.db.fold_into_snapshot(last_id)
+
+        # Бюджети: лічильники витрат лише для категорій з лімітом, одним GROUP BY
+        self.budget = Budget(self.subject)
+        self._restore_budget()
+        self.subject.attach(self.budget)
+
+        # Груповий commit: записи йдуть через окремий потік і підтверджуються пачками.
+        # readers > 0 додатково відкриває пул read-only з'єднань для *_async запитів.
+        self.writer = None
+        self.connections = None
+        if readers:
+            self.connections = ConnectionManager(db_path, profile=profile, readers=readers,
+                                                 commit_window=commit_window,
+                                                 on_commit=self._on_write_committed)
+            self.writer = self.connections.writer
+        elif group_commit:
+            self.writer = GroupCommitWriter(db_path, profile=profile, window=commit_window,
+                                            on_commit=self._on_write_committed)
+        # Записи інших процесів (напр. CLI під час роботи GUI) скидають кеш повністю
+        self._main_version = self._foreign_version = None
+        self.cache.validator = self._foreign_writes_marker
 
     def close(self):
+        if self.connections is not None:
+            self.connections.close()
+        elif self.writer is not None:
+            self.writer.close()
+        self.logger.close()
         self.db.close()
 
+    def _on_write_committed(self, kind, result):
+        with self._notify_lock:
+            if kind == "save":
+                self.subject.notify(result)
+            elif kind == "delete":
+                for transaction in result:
+                    self.subject.notify_removed(transaction)
+            elif kind == "read":
+                apply, data = result
+                if apply is not None:
+                    apply(data)
+
+    def _foreign_writes_marker(self):
+        # Змінюється лише від записів інших з'єднань. Без потоку запису всі записи йдуть через
+        # self.db, тож досить його data_version. З потоком запису її змінюють і власні commit'и
+        # (кеш уже скинув по них лише потрібні записи) — тоді про сторонні записи питаємо
+        # з'єднання потоку запису, для якого його власні commit'и не рахуються
+        version = self.db.data_version()
+        if self.writer is None:
+            return version
+        if version != self._main_version:
+            self._main_version = version
+            self._foreign_version = self.writer.read(lambda db: (None, db.data_version())).result()[1]
+        return self._foreign_version
+
+    def _in_commit_order(self, load, apply):
+        # load(db) читає стан БД, apply(дані) підключає його до спостерігачів. Між ними не повинно
+        # загубитись жодне сповіщення: з потоком запису load іде в його черзі між commit'ами,
+        # а apply — одразу після сповіщень про записи, які load уже бачив
+        if self.writer is None:
+            with self._notify_lock:
+                apply(load(self.db))
+        else:
+            self.writer.read(lambda db: (apply, load(db))).result()
+
     def add_transaction(self, transaction_type, amount, category, date, description):
+        return self.add_transaction_async(transaction_type, amount, category, date, description).result()
+
+    def add_transaction_async(self, transaction_type, amount, category, date, description):
+        # Повертає Future, що завершується після надійного commit; спостерігачі вже сповіщені
         transaction = TransactionFactory.create_transaction(
             transaction_type, amount, category, date, description
         )
+        METRICS.inc("transactions_built_total", source="input")
+        if self.writer is not None:
+            return self.writer.save(transaction)
 
         self.db.save_transaction(transaction)
-        self.subject.notify(transaction)
-        return transaction
+        with self._notify_lock:
+            self.subject.notify(transaction)
+        future = Future()
+        future.set_result(transaction)
+        return future
+
+    def add_transactions(self, rows, chunk_size=1000):
+        # rows: ітерабельне кортежів (type, amount, category, date, description)
+        transactions = (TransactionFactory.create_transaction(*row) for row in rows)
+        try:
+            saved = self.db.save_many(transactions, chunk_size=chunk_size, on_batch=self._notify_many)
+            METRICS.inc("transactions_built_total", saved, source="input")
+            return saved
+        except Exception:
+            # Спостерігачі чують лише закомічені пачки; якщо збій стався вже під час сповіщень,
+            # синхронізуємо аналітику зі знімком у БД
+            snapshot, _ = self.db.load_snapshot()
+            self.analytics.restore(snapshot)
+            self._restore_budget()
+            self.cache.clear()
+            if self._rollups is not None:
+                self.subject.detach(self._rollups)
+                self._rollups = None
+            raise
+
+    def _notify_many(self, transactions):
+        with self._notify_lock:
+            self.subject.notify_many(transactions)
 
     def get_balance(self):
         income = self.analytics.total_income
         expense = self.analytics.total_expense
         return income - expense
 
+    # ==== Читання через кеш (повертаються копії: кешований результат не змінюється ззовні) ====
     def get_all_transactions(self):
-        return self.db.load_transactions()
+        key, scope = cache_key("all")
+        return list(self.cache.fetch(key, scope, self.db.load_transactions))
+
+    def iter_transactions(self, after_id=None, page_size=500, order="id", after_date=None):
+        return self.db.iter_transactions(after_id=after_id, page_size=page_size, order=order, after_date=after_date)
+
+    def query(self, type=None, date_from=None, date_to=None, categories=None, order="date"):
+        # Ітератор, як і раніше: без кешу рядки читаються посторінково під час перебору
+        key, scope = cache_key("query", type=type, date_from=date_from, date_to=date_to,
+                               categories=categories, order=order)
+        return self.cache.fetch_rows(key, scope, lambda: self.db.query(
+            type=type, date_from=date_from, date_to=date_to, categories=categories, order=order))
+
+    def get_page(self, offset, limit, order="id", type=None, date_from=None, date_to=None, categories=None):
+        key, scope = cache_key("page", type=type, date_from=date_from, date_to=date_to, categories=categories,
+                               offset=offset, limit=limit, order=order)
+        return list(self.cache.fetch(key, scope, lambda: self.db.fetch_page(
+            offset, limit, order=order, type=type, date_from=date_from, date_to=date_to, categories=categories)))
+
+    def search(self, text, limit=50, offset=0, type=None, date_from=None, date_to=None, categories=None):
+        # Пошук за словами (і їх початками) в описі та категорії, з тими ж фільтрами, що й query;
+        # offset/limit — для посторінкового перегляду
+        # Область запису кешу — лише фільтри: нова транзакція в ній може збігтися з текстом
+        key, scope = cache_key("search", type=type, date_from=date_from, date_to=date_to, categories=categories,
+                               text=text, limit=limit, offset=offset)
+        return list(self.cache.fetch(key, scope, lambda: self.db.search(
+            text, limit=limit, offset=offset, type=type, date_from=date_from, date_to=date_to,
+            categories=categories)))
+
+    def count_search(self, text, limit=None, type=None, date_from=None, date_to=None, categories=None):
+        key, scope = cache_key("count_search", type=type, date_from=date_from, date_to=date_to,
+                               categories=categories, text=text, limit=limit)
+        return self.cache.fetch(key, scope, lambda: self.db.count_search(
+            text, limit=limit, type=type, date_from=date_from, date_to=date_to, categories=categories))
+
+    def count_transactions(self, type=None, date_from=None, date_to=None, categories=None):
+        key, scope = cache_key("count", type=type, date_from=date_from, date_to=date_to, categories=categories)
+        return self.cache.fetch(key, scope, lambda: self.db.count_transactions(
+            type=type, date_from=date_from, date_to=date_to, categories=categories))
+
+    def aggregate(self, group_by="category", type=None, date_from=None, date_to=None, categories=None):
+        key, scope = cache_key("aggregate", type=type, date_from=date_from, date_to=date_to,
+                               categories=categories, group_by=group_by)
+        return dict(self.cache.fetch(key, scope, lambda: self.db.aggregate(
+            group_by=group_by, type=type, date_from=date_from, date_to=date_to, categories=categories)))
+
+    def get_frame(self, type=None, date_from=None, date_to=None, categories=None):
+        return self.db.load_frame(type=type, date_from=date_from, date_to=date_to, categories=categories)
+
+    @property
+    def rollups(self):
+        # Будуються одним GROUP BY при першому зверненні, далі оновлюються інкрементально
+        if self._rollups is None:
+            self._in_commit_order(self._load_rollups, self._attach_rollups)
+        return self._rollups
+
+    @staticmethod
+    def _load_rollups(db):
+        rollups = Rollups()
+        rollups.load_rows(db.iter_daily_totals())
+        return rollups
+
+    def _attach_rollups(self, rollups):
+        if self._rollups is None:
+            self.subject.attach(rollups)
+            self._rollups = rollups
 
     def get_summary(self):
         return self.analytics.summary()
 
     def delete_transaction_by_id(self, transaction_id):
-        self.db.delete_transaction(transaction_id)
-        # Після видалення треба оновити аналітику:
-        self.analytics.total_income = 0
-        self.analytics.total_expense = 0
-        for transaction in self.db.load_transactions():
-            self.subject.notify(transaction)
+        deleted = self.delete_transactions_by_ids([transaction_id])
+        return deleted[0] if deleted else None
+
+    def delete_transactions_by_ids(self, transaction_ids):
+        if self.writer is not None:
+            return self.writer.delete(transaction_ids).result()
+        transactions = self.db.delete_transactions(transaction_ids)
+        with self._notify_lock:
+            for transaction in transactions:
+                self.subject.notify_removed(transaction)
+        return transactions
+
+    # ==== Бюджети (місячні ліміти витрат за категоріями) ====
+    def _restore_budget(self):
+        limits = self.db.load_budgets()
+        spending = self.db.budget_spending({category for category, _, _ in limits}) if limits else ()
+        self.budget.restore(limits, spending)
+
+    def set_budget(self, category, amount, month=None):
+        # month None — ліміт на кожен місяць, 'YYYY-MM' — лише на вказаний;
+        # якщо поріг уже перетнуто, спостерігачі одразу отримують on_alert
+        month = check_month(month or EVERY_MONTH)
+        limit_minor = to_minor(amount)
+        if limit_minor <= 0:
+            raise ValueError("Budget amount must be positive")
+        self.db.save_budget(category, month, limit_minor)
+
+        def load(db):
+            # Витрати читаються, лише поки категорія ще не відстежується
+            return None if self.budget.tracks(category) else db.budget_spending([category])
+
+        def apply(spending):
+            if spending is not None and not self.budget.tracks(category):
+                self.budget.load_spending(spending, notify=False)
+            self.budget.set_limit(category, limit_minor, month)
+
+        self._in_commit_order(load, apply)
+
+    def remove_budget(self, category, month=None):
+        month = check_month(month or EVERY_MONTH)
+        removed = self.db.delete_budget(category, month)
+        with self._notify_lock:
+            self.budget.remove_limit(category, month)
+        return removed
+
+    def budget_report(self, month=None):
+        # [(category, витрачено, ліміт)] за місяць 'YYYY-MM' (за замовчуванням поточний)
+        if month is None:
+            month = date.today().strftime("%Y-%m")
+        return self.budget.report(check_month(month))
+
+    # ==== Архівні розділи (закриті роки в окремих файлах) ====
+    def archive_years(self, through_year, vacuum=True):
+        self.cache.clear()
+        return self.db.archive_years(through_year, vacuum=vacuum)
+
+    def list_partitions(self):
+        return self.db.list_partitions()
+
+    def verify_partitions(self):
+        return self.db.verify_partitions()
+
+    # ==== Асинхронне читання (Future; для asyncio — asyncio.wrap_future) ====
+    def submit_read(self, func, *args, **kwargs):
+        # func(db, ...) у пулі читання; без пулу — одразу в поточному потоці
+        if self.connections is not None:
+            return self.connections.read(func, *args, **kwargs)
+        future = Future()
+        try:
+            future.set_result(func(self.db, *args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def query_async(self, type=None, date_from=None, date_to=None, categories=None, order="date"):
+        return self.submit_read(lambda db: list(db.query(type=type, date_from=date_from, date_to=date_to,
+                                                         categories=categories, order=order)))
+
+    def search_async(self, text, limit=50, offset=0, type=None, date_from=None, date_to=None, categories=None):
+        return self.submit_read(DatabaseHandler.search, text, limit=limit, offset=offset, type=type,
+                                date_from=date_from, date_to=date_to, categories=categories)
+
+    def aggregate_async(self, group_by="category", type=None, date_from=None, date_to=None, categories=None):
+        # Спільний кеш з aggregate: влучання повертає готовий Future, промах кешується після читання
+        key, scope = cache_key("aggregate", type=type, date_from=date_from, date_to=date_to,
+                               categories=categories, group_by=group_by)
+        found, totals = self.cache.get(key)
+        if found:
+            future = Future()
+            future.set_result(dict(totals))
+            return future
+        generation = self.cache.generation
+        future = self.submit_read(DatabaseHandler.aggregate, group_by=group_by, type=type,
+                                  date_from=date_from, date_to=date_to, categories=categories)
+
+        def store(f):
+            if f.exception() is None:
+                self.cache.put(key, scope, dict(f.result()), generation)
+        future.add_done_callback(store)
+        return future
+
+    def get_frame_async(self, type=None, date_from=None, date_to=None, categories=None):
+        return self.submit_read(DatabaseHandler.load_frame, type=type, date_from=date_from,
+                                date_to=date_to, categories=categories)
@@ -0,0 +1,277 @@
+import bisect
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Межі кошиків гістограм латентності, секунди (верхні межі, як `le` у Prometheus)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Префікс імен метрик у форматі Prometheus
+PROMETHEUS_PREFIX = "finance_"
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # останній кошик — понад найбільшу межу
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        # Оцінка за кошиками: верхня межа кошика, в який потрапляє q-та частка спостережень
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        cumulative, seen = {}, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            cumulative[str(bound)] = seen
+        cumulative["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": cumulative,
+        }
+
+
+class _Timer:
+    # Контекстний менеджер Metrics.timer; без генератора — дешевший на гарячих шляхах
+    __slots__ = ("metrics", "key", "sql", "started", "statements", "outer")
+
+    def __init__(self, metrics, key, sql):
+        self.metrics = metrics
+        self.key = key
+        self.sql = sql
+
+    def __enter__(self):
+        if self.sql:
+            local = self.metrics._local
+            self.outer = getattr(local, "statements", None)
+            self.statements = local.statements = []
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        finished = time.perf_counter()
+        self.metrics._observe(self.key, finished - self.started)
+        if self.sql:
+            self.metrics._local.statements = self.outer
+            self.metrics._check_slow(self.key, self.statements, finished)
+        return False
+
+
+def _series(name, labels):
+    # Ключ серії: ім'я + впорядковані мітки (сортування потрібне лише для кількох міток)
+    return name, tuple(sorted(labels.items()) if len(labels) > 1 else labels.items())
+
+
+def _labels_sql(labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels)
+
+
+class Metrics:
+    # Реєстр гістограм і лічильників процесу. Серії ідентифікуються іменем і мітками:
+    # metrics.timer("db_operation_seconds", op="save_transaction").
+    # slow_query_threshold (секунди) вмикає журнал повільних запитів: SQL операцій
+    # збирається через sqlite3 trace callback (див. DatabaseHandler) і записується,
+    # якщо окремий оператор виконувався довше за поріг.
+    def __init__(self, slow_query_threshold=None, slow_query_log=None):
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_query_log = slow_query_log   # файл, куди дописуються повільні запити
+        self.slow_queries = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._local = threading.local()
+        self._profiler = None
+        self.profile = None  # підсумок останнього профілювання
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.slow_queries.clear()
+            self.profile = None
+
+    # ==== Запис ====
+    def timer(self, name, sql=False, **labels):
+        return _Timer(self, _series(name, labels), sql)
+
+    def observe(self, name, seconds, **labels):
+        self._observe(_series(name, labels), seconds)
+
+    def _observe(self, key, seconds):
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = _series(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def histogram(self, name, **labels):
+        return self._histograms.get(_series(name, labels))
+
+    def counter(self, name, **labels):
+        return self._counters.get(_series(name, labels), 0)
+
+    # ==== Журнал повільних запитів ====
+    def trace_sql(self, statement):
+        # sqlite3 trace callback: час початку кожного оператора в межах поточного таймера
+        statements = getattr(self._local, "statements", None)
+        if statements is not None:
+            statements.append((time.perf_counter(), statement))
+
+    def _check_slow(self, key, statements, finished):
+        threshold = self.slow_query_threshold
+        if threshold is None or not statements:
+            return
+        # Рядки "-- TRIGGER ..." — частина попереднього оператора, їхній час належить йому
+        statements = [s for s in statements if not s[1].startswith("--")]
+        ends = [started for started, _ in statements[1:]] + [finished]
+        operation = dict(key[1]).get("op", key[0])
+        for (started, statement), ended in zip(statements, ends):
+            seconds = ended - started
+            if seconds < threshold:
+                continue
+            entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "operation": operation,
+                     "seconds": seconds, "sql": " ".join(statement.split())}
+            self.inc("slow_queries_total")
+            self.slow_queries.append(entry)
+            if self.slow_query_log:
+                with self._lock, open(self.slow_query_log, "a", encoding="utf-8") as f:
+                    f.write(f"{entry['time']}\t{seconds * 1000:.1f} ms\t{operation}\t{entry['sql']}\n")
+
+    # ==== Профілювання (вмикається під час роботи) ====
+    @property
+    def profiling(self):
+        return self._profiler is not None
+
+    def start_profiling(self, memory=True):
+        # cProfile бачить лише потік, що ввімкнув профілювання; tracemalloc — усі потоки
+        import cProfile
+        if self._profiler is not None:
+            return
+        if memory:
+            import tracemalloc
+            tracemalloc.start()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop_profiling(self, path=None, top=20):
+        # Зупиняє профілювання; path — файл для pstats (snakeviz, python -m pstats).
+        # Повертає і зберігає в self.profile найдорожчі функції та місця виділення пам'яті.
+        import pstats
+        import tracemalloc
+        if self._profiler is None:
+            return None
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        profile = {"cpu": stream.getvalue()}
+        if tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+            tracemalloc.stop()
+            profile["memory_peak_kib"] = peak / 1024
+            profile["memory"] = [{"where": str(stat.traceback), "size_kib": stat.size / 1024, "count": stat.count}
+                                 for stat in statistics]
+        self.profile = profile
+        return profile
+
+    def toggle_profiling(self, path=None):
+        # Для гарячої клавіші в GUI: вмикає профілювання або зупиняє його і повертає підсумок
+        if self.profiling:
+            return self.stop_profiling(path)
+        self.start_profiling()
+        return None
+
+    # ==== Вивід ====
+    def snapshot(self):
+        with self._lock:
+            histograms = [{"name": name, "labels": dict(labels), **histogram.to_dict()}
+                          for (name, labels), histogram in sorted(self._histograms.items())]
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "histograms": histograms,
+            "counters": counters,
+            "slow_queries": list(self.slow_queries),
+            "profile": self.profile,
+        }
+
+    def to_prometheus(self):
+        # Текстовий формат експозиції Prometheus (напр. для textfile collector node_exporter)
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                metric = PROMETHEUS_PREFIX + name
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                base = _labels_sql(labels)
+                prefix = base + "," if base else ""
+                seen = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    seen += count
+                    lines.append(f'{metric}_bucket{{{prefix}le="{bound}"}} {seen}')
+                lines.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+                suffix = f"{{{base}}}" if base else ""
+                lines.append(f"{metric}_sum{suffix} {histogram.sum}")
+                lines.append(f"{metric}_count{suffix} {histogram.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = PROMETHEUS_PREFIX + name
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                base = _labels_sql(labels)
+                lines.append(f"{metric}{{{base}}} {value}" if base else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # .prom / .txt — формат Prometheus, інакше JSON; запис атомарний (через тимчасовий файл)
+        if path.endswith((".prom", ".txt")):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return path
+
+
+# Спільний реєстр процесу
+METRICS = Metrics()
@@ -1,4 +1,13 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from core.metrics import METRICS
+from core.transaction import INCOME, EXPENSE, to_minor, from_minor
 
 # ==== Інтерфейс Observer ====
 class Observer(ABC):
@@ -6,6 +15,23 @@ class Observer(ABC):
     def update(self, transaction):
         pass
 
+    def on_remove(self, transaction):
+        # Викликається після видалення транзакції; за замовчуванням нічого не робить
+        pass
+
+    def update_many(self, transactions):
+        # Пакетне оновлення; спостерігачі можуть перевизначити для швидшої обробки
+        for transaction in transactions:
+            self.update(transaction)
+
+    def on_replay(self, transaction):
+        # Історичний рядок, що доганяється при старті; за замовчуванням — як update
+        self.update(transaction)
+
+    def on_alert(self, alert):
+        # Подія від іншого спостерігача (напр. core.budget.BudgetAlert); за замовчуванням ігнорується
+        pass
+
 # ==== Клас Subject ====
 class Subject:
     def __init__(self):
@@ -17,27 +43,210 @@ class Subject:
     def detach(self, observer: Observer):
         self._observers.remove(observer)
 
+    # Кожен виклик спостерігача потрапляє в гістограму observer_seconds{observer, event}
     def notify(self, transaction):
         for observer in self._observers:
-            observer.update(transaction)
+            with METRICS.timer("observer_seconds", observer=type(observer).__name__, event="update"):
+                observer.update(transaction)
+
+    def notify_many(self, transactions):
+        for observer in self._observers:
+            with METRICS.timer("observer_seconds", observer=type(observer).__name__, event="update_many"):
+                observer.update_many(transactions)
+
+    def notify_removed(self, transaction):
+        for observer in self._observers:
+            with METRICS.timer("observer_seconds", observer=type(observer).__name__, event="remove"):
+                observer.on_remove(transaction)
+
+    def notify_alert(self, alert):
+        for observer in self._observers:
+            with METRICS.timer("observer_seconds", observer=type(observer).__name__, event="alert"):
+                observer.on_alert(alert)
+
+    def notify_replayed(self, transaction):
+        # Догін при старті — по рядку за виклик; його час міряє FinanceManager цілком
+        for observer in self._observers:
+            observer.on_replay(transaction)
 
 # ==== Логгер, який веде журнал ====
+_FLUSH = object()
+_STOP = object()
+
+
 class Logger(Observer):
+    # Рядки потрапляють у чергу, а фоновий потік пише їх у файл пачками
+    def __init__(self, path="log.txt", max_bytes=1024 * 1024, backup_count=3,
+                 batch_size=256, flush_interval=0.5):
+        self.path = path
+        self.max_bytes = max_bytes          # 0 — без ротації
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
     def update(self, transaction):
-        with open("log.txt", "a", encoding="utf-8") as f:
-            f.write(f"[LOG] Додано: {transaction}\n")
+        self._put(f"[LOG] Додано: {transaction}\n")
+
+    def update_many(self, transactions):
+        for transaction in transactions:
+            self._put(f"[LOG] Додано: {transaction}\n")
+
+    def on_remove(self, transaction):
+        self._put(f"[LOG] Видалено: {transaction}\n")
+
+    def on_replay(self, transaction):
+        # Історичні рядки вже були залоговані при додаванні
+        pass
+
+    def on_alert(self, alert):
+        self._put(f"[BUDGET] {alert}\n")
+
+    def flush(self):
+        if self._thread is not None:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+            atexit.unregister(self.close)
+
+    def _put(self, line):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="finance-logger", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+        self._queue.put(line)
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.batch_size and items[-1] is not _FLUSH and items[-1] is not _STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._write([item for item in items if isinstance(item, str)])
+            except OSError as e:
+                print(f"[LOG] Не вдалося записати журнал: {e}", file=sys.stderr)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if items[-1] is _STOP:
+                return
+
+    def _write(self, lines):
+        if not lines:
+            return
+        data = "".join(lines)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.max_bytes and os.path.exists(self.path):
+            size = os.path.getsize(self.path)
+            if size and size + len(data.encode("utf-8")) > self.max_bytes:
+                self._rotate()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+
+    def _rotate(self):
+        # log.txt -> log.txt.1 -> ... -> log.txt.<backup_count>
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
 
 # ==== Аналітика (можна доповнити далі) ====
 class Analytics(Observer):
+    # Лічильники ведуться в цілих копійках (без накопичення похибки float),
+    # назовні — у гривнях, як і раніше
     def __init__(self):
-        self.total_income = 0
-        self.total_expense = 0
+        self.income_minor = 0
+        self.expense_minor = 0
+        self.category_minor = defaultdict(int)  # (type, category) -> копійки
+        self.month_minor = defaultdict(int)     # (type, 'YYYY-MM') -> копійки
+
+    @property
+    def total_income(self):
+        return from_minor(self.income_minor)
+
+    @property
+    def total_expense(self):
+        return from_minor(self.expense_minor)
+
+    @property
+    def by_category(self):
+        return {key: from_minor(total) for key, total in self.category_minor.items()}
+
+    @property
+    def by_month(self):
+        return {key: from_minor(total) for key, total in self.month_minor.items()}
 
     def update(self, transaction):
-        if transaction.get_type() == "Income":
-            self.total_income += transaction.amount
-        elif transaction.get_type() == "Expense":
-            self.total_expense += transaction.amount
+        self._apply(transaction, 1)
+
+    def on_remove(self, transaction):
+        self._apply(transaction, -1)
+
+    def _apply(self, transaction, sign):
+        type_code = transaction.type_code
+        amount = sign * transaction.amount_minor
+        if type_code == INCOME:
+            self.income_minor += amount
+        elif type_code == EXPENSE:
+            self.expense_minor += amount
+        else:
+            return
+        t_type = transaction.get_type()
+        d = transaction.date
+        self.category_minor[(t_type, transaction.category)] += amount
+        self.month_minor[(t_type, f"{d.year:04d}-{d.month:02d}")] += amount
+
+    def restore(self, rows):
+        # rows: (scope, type, key, total, count) з таблиці aggregates (total — у копійках)
+        self.income_minor = 0
+        self.expense_minor = 0
+        self.category_minor.clear()
+        self.month_minor.clear()
+        for scope, t_type, key, total, count in rows:
+            if scope == "total":
+                if t_type == "Income":
+                    self.income_minor = total
+                elif t_type == "Expense":
+                    self.expense_minor = total
+            elif scope == "category":
+                self.category_minor[(t_type, key)] = total
+            elif scope == "month":
+                self.month_minor[(t_type, key)] = total
+
+    def load_frame(self, frame):
+        # Повний перерахунок з TransactionFrame — векторизовано, без об'єктів Transaction
+        self.income_minor = to_minor(frame.total(INCOME))
+        self.expense_minor = to_minor(frame.total(EXPENSE))
+        self.category_minor.clear()
+        self.month_minor.clear()
+        for type_code, t_type in ((INCOME, "Income"), (EXPENSE, "Expense")):
+            for category, total in frame.sum_by_category(type_code).items():
+                self.category_minor[(t_type, category)] = to_minor(total)
+            for month, total in frame.sum_by_month(type_code).items():
+                self.month_minor[(t_type, month)] = to_minor(total)
 
     def summary(self):
         return {
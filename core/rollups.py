@@ -0,0 +1,117 @@
+from collections import defaultdict
+from datetime import date
+
+from core.observer import Observer
+from core.transaction import INCOME, EXPENSE, EPOCH_ORDINAL, from_minor
+
+GRANULARITIES = ("day", "week", "month", "year")
+
+_TYPE_CODES = {"income": INCOME, "expense": EXPENSE}
+
+
+def period_key(granularity, d):
+    # Цілочисельний ключ періоду: легко сортувати і перебирати підряд
+    if granularity == "day":
+        return d.toordinal()
+    if granularity == "week":
+        return d.toordinal() - d.weekday()  # понеділок тижня
+    if granularity == "month":
+        return d.year * 12 + d.month - 1
+    if granularity == "year":
+        return d.year
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def period_label(granularity, key):
+    if granularity in ("day", "week"):
+        return date.fromordinal(key).isoformat()
+    if granularity == "month":
+        return f"{key // 12:04d}-{key % 12 + 1:02d}"
+    return f"{key:04d}"
+
+
+# ==== Інкрементальні зведення за періодами ====
+class Rollups(Observer):
+    # buckets[g][(період, тип, категорія)] і totals[g][(період, тип)] -> [сума в копійках, кількість];
+    # кожне додавання/видалення змінює сталу кількість комірок
+    def __init__(self):
+        self.buckets = {g: defaultdict(lambda: [0, 0]) for g in GRANULARITIES}
+        self.totals = {g: defaultdict(lambda: [0, 0]) for g in GRANULARITIES}
+
+    def update(self, transaction):
+        self._apply(transaction.date, transaction.type_code, transaction.category, transaction.amount_minor, 1)
+
+    def on_remove(self, transaction):
+        self._apply(transaction.date, transaction.type_code, transaction.category, transaction.amount_minor, -1)
+
+    def load_rows(self, rows):
+        # rows: (день від епохи, type, category, сума в копійках, кількість),
+        # напр. з DatabaseHandler.iter_daily_totals
+        for day, t_type, category, total, count in rows:
+            type_code = _TYPE_CODES.get(t_type.lower())
+            if type_code is not None:
+                self._add(date.fromordinal(day + EPOCH_ORDINAL), type_code, category, total, count)
+
+    def _apply(self, d, type_code, category, amount, sign):
+        if type_code in (INCOME, EXPENSE):
+            self._add(d, type_code, category, sign * amount, sign)
+
+    def _add(self, d, type_code, category, amount, count):
+        for g in GRANULARITIES:
+            period = period_key(g, d)
+            for table, key in ((self.buckets[g], (period, type_code, category)),
+                               (self.totals[g], (period, type_code))):
+                cell = table[key]
+                cell[0] += amount
+                cell[1] += count
+                if cell[1] == 0:
+                    del table[key]
+
+    # ==== Запити ====
+    def by_period(self, granularity="month", type_code=None, category=None):
+        # {ключ періоду: сума}; без type_code — чистий потік (дохід - витрати)
+        result = defaultdict(int)
+        if category is None:
+            items = ((period, t, total) for (period, t), (total, _) in self.totals[granularity].items())
+        else:
+            items = ((period, t, total) for (period, t, c), (total, _) in self.buckets[granularity].items()
+                     if c == category)
+        for period, t, total in items:
+            if type_code is None:
+                result[period] += total if t == INCOME else -total
+            elif t == type_code:
+                result[period] += total
+        return {period: from_minor(total) for period, total in result.items()}
+
+    def _series(self, granularity, type_code):
+        # Неперервний ряд від першого до останнього періоду (порожні — нулі)
+        values = self.by_period(granularity, type_code)
+        if not values:
+            return []
+        first, last = min(values), max(values)
+        step = 7 if granularity == "week" else 1
+        return [(p, values.get(p, 0)) for p in range(first, last + 1, step)]
+
+    def running_balance(self, granularity="month"):
+        balance = 0
+        result = []
+        for period, net in self._series(granularity, None):
+            balance += net
+            result.append((period_label(granularity, period), balance))
+        return result
+
+    def rolling_average(self, months=3, type_code=EXPENSE):
+        series = self._series("month", type_code)
+        result = []
+        window = 0
+        for i, (period, value) in enumerate(series):
+            window += value
+            if i >= months:
+                window -= series[i - months][1]
+            result.append((period_label("month", period), window / min(i + 1, months)))
+        return result
+
+    def month_over_month(self, type_code=EXPENSE):
+        series = self._series("month", type_code)
+        return [(period_label("month", period), value - previous)
+                for (_, previous), (period, value) in zip(series, series[1:])]
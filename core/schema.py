@@ -0,0 +1,298 @@
+import sqlite3
+import sys
+
+from core.transaction import MINOR_UNITS
+
+# Версія 2: суми — цілі копійки (amount_minor), дати — цілі дні від 1970-01-01 (day).
+# Нова БД створюється одразу з таблицями версії 2, далі застосовуються наступні міграції.
+BASE_VERSION = 2
+
+# Скільки рядків копіює міграція за одну SQL-транзакцію
+MIGRATION_CHUNK = 5000
+
+_TRANSACTIONS_SQL = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        type TEXT NOT NULL,
+        amount_minor INTEGER NOT NULL,
+        category TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        description TEXT
+    )
+'''
+
+_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_transactions_day ON transactions (day, id)',
+    'CREATE INDEX IF NOT EXISTS idx_transactions_type_day ON transactions (type, day)',
+    'CREATE INDEX IF NOT EXISTS idx_transactions_category_day ON transactions (category, day)',
+)
+
+# Знімок аналітики: scope = 'total' | 'category' | 'month', total — у копійках
+_AGGREGATES_SQL = '''
+    CREATE TABLE IF NOT EXISTS aggregates (
+        scope TEXT NOT NULL,
+        type TEXT NOT NULL,
+        key TEXT NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (scope, type, key)
+    )
+'''
+
+_META_SQL = '''
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+'''
+
+# Вирази перетворення рядка старої схеми (amount REAL, date TEXT) у нову
+_V1_COLUMNS = f'''
+    id, type,
+    CAST(round(amount * {MINOR_UNITS}) AS INTEGER),
+    category,
+    CAST(julianday(date) - 2440587.5 AS INTEGER),
+    description
+'''
+
+# Поки триває копіювання, тригери дзеркалять зміни старої таблиці в нову,
+# тож інші процеси (стара версія застосунку) можуть і далі писати в БД
+_MIRROR_TRIGGERS = (
+    f'''
+    CREATE TRIGGER IF NOT EXISTS migrate_v2_insert AFTER INSERT ON transactions BEGIN
+        INSERT OR REPLACE INTO transactions_v2 (id, type, amount_minor, category, day, description)
+        VALUES (NEW.id, NEW.type, CAST(round(NEW.amount * {MINOR_UNITS}) AS INTEGER), NEW.category,
+                CAST(julianday(NEW.date) - 2440587.5 AS INTEGER), NEW.description);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS migrate_v2_update AFTER UPDATE ON transactions BEGIN
+        DELETE FROM transactions_v2 WHERE id = OLD.id;
+        INSERT OR REPLACE INTO transactions_v2 (id, type, amount_minor, category, day, description)
+        VALUES (NEW.id, NEW.type, CAST(round(NEW.amount * {MINOR_UNITS}) AS INTEGER), NEW.category,
+                CAST(julianday(NEW.date) - 2440587.5 AS INTEGER), NEW.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS migrate_v2_delete AFTER DELETE ON transactions BEGIN
+        DELETE FROM transactions_v2 WHERE id = OLD.id;
+    END
+    ''',
+)
+
+
+def _copy_chunk(conn, after_id, chunk_size):
+    # Копіює наступні chunk_size рядків (id > after_id); повертає останній скопійований id або None
+    last_id = conn.execute('''
+        SELECT max(id) FROM (SELECT id FROM transactions WHERE id > ? ORDER BY id LIMIT ?)
+    ''', (after_id, chunk_size)).fetchone()[0]
+    if last_id is None:
+        return None
+    # OR IGNORE: рядки, які вже потрапили в нову таблицю через тригер, новіші за копію
+    conn.execute(f'''
+        INSERT OR IGNORE INTO transactions_v2 (id, type, amount_minor, category, day, description)
+        SELECT {_V1_COLUMNS} FROM transactions WHERE id > ? AND id <= ?
+    ''', (after_id, last_id))
+    return last_id
+
+
+def migrate_to_v2(conn, chunk_size=MIGRATION_CHUNK, progress=None):
+    # Онлайн-міграція старої таблиці пачками. Кожна пачка — окрема SQL-транзакція,
+    # а позиція зберігається в meta, тому перервану міграцію можна продовжити.
+    # progress(скопійовано, всього) викликається після кожної пачки.
+    with conn:
+        conn.execute(_TRANSACTIONS_SQL.format(name="transactions_v2"))
+        for trigger in _MIRROR_TRIGGERS:
+            conn.execute(trigger)
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('migrate_v2_last_id', 0)")
+    after_id = conn.execute("SELECT value FROM meta WHERE key = 'migrate_v2_last_id'").fetchone()[0]
+    total = conn.execute('SELECT count(*) FROM transactions').fetchone()[0]
+    copied = conn.execute('SELECT count(*) FROM transactions WHERE id <= ?', (after_id,)).fetchone()[0]
+
+    while True:
+        with conn:
+            last_id = _copy_chunk(conn, after_id, chunk_size)
+            if last_id is None:
+                break
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'migrate_v2_last_id'", (last_id,))
+        copied += conn.execute('SELECT count(*) FROM transactions WHERE id > ? AND id <= ?',
+                               (after_id, last_id)).fetchone()[0]
+        after_id = last_id
+        if progress is not None:
+            progress(copied, total)
+
+    # Заміна таблиць — одна коротка транзакція під блокуванням запису
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        while after_id is not None:
+            after_id = _copy_chunk(conn, after_id, chunk_size)
+        for name in ("migrate_v2_insert", "migrate_v2_update", "migrate_v2_delete"):
+            conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'").fetchone()
+        conn.execute('DROP TABLE transactions')
+        conn.execute('ALTER TABLE transactions_v2 RENAME TO transactions')
+        if row is not None:
+            # Видалені з кінця id не повинні видаватись повторно
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'transactions'")
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'transactions', max(?, ifnull(max(id), 0)) "
+                         "FROM transactions", (row[0],))
+        for statement in _INDEXES:
+            conn.execute(statement)
+        # Старий знімок рахувався у гривнях — його перебудує DatabaseHandler
+        conn.execute('DROP TABLE IF EXISTS aggregates')
+        conn.execute("DELETE FROM meta WHERE key IN ('snapshot_last_id', 'migrate_v2_last_id')")
+        conn.execute('PRAGMA user_version = 2')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+# Повнотекстовий індекс опису й категорії (external content: тексти не дублюються).
+# Тригери підтримують його при будь-якому записі, включно з executemany і DELETE ... RETURNING.
+_FTS_STATEMENTS = (
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description, category,
+        content='transactions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts (rowid, description, category)
+        VALUES (NEW.id, NEW.description, NEW.category);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+        VALUES ('delete', OLD.id, OLD.description, OLD.category);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description, category ON transactions BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+        VALUES ('delete', OLD.id, OLD.description, OLD.category);
+        INSERT INTO transactions_fts (rowid, description, category)
+        VALUES (NEW.id, NEW.description, NEW.category);
+    END
+    ''',
+    # Наповнення індексу для наявних рядків
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+)
+
+# Реєстр архівних розділів (по файлу на рік). Суми й кількість фіксуються під час
+# архівації і звіряються перевіркою цілісності; закриті роки захищені від вставки.
+_PARTITION_STATEMENTS = (
+    '''
+    CREATE TABLE IF NOT EXISTS partitions (
+        year INTEGER PRIMARY KEY,
+        path TEXT NOT NULL,
+        first_day INTEGER NOT NULL,
+        last_day INTEGER NOT NULL,
+        min_id INTEGER NOT NULL,
+        max_id INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        income_minor INTEGER NOT NULL,
+        expense_minor INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS transactions_closed_insert BEFORE INSERT ON transactions
+    WHEN NEW.day <= (SELECT max(last_day) FROM partitions) BEGIN
+        SELECT RAISE(ABORT, 'transaction date falls into an archived year');
+    END
+    ''',
+)
+
+# Місячні ліміти витрат за категоріями: month '' — ліміт на кожен місяць,
+# 'YYYY-MM' — перевизначення для одного місяця
+_BUDGET_STATEMENTS = (
+    '''
+    CREATE TABLE IF NOT EXISTS budgets (
+        category TEXT NOT NULL,
+        month TEXT NOT NULL DEFAULT '',
+        limit_minor INTEGER NOT NULL,
+        PRIMARY KEY (category, month)
+    )
+    ''',
+)
+
+# Міграції схеми: після застосування i-ї міграції PRAGMA user_version = i + 1.
+# Елемент — кортеж SQL-інструкцій або функція (conn, chunk_size, progress).
+MIGRATIONS = [
+    # 1: індекси старої схеми для keyset-пагінації та фільтрів за типом/категорією і датою
+    (
+        'CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date, id)',
+        'CREATE INDEX IF NOT EXISTS idx_transactions_type_date ON transactions (type, date)',
+        'CREATE INDEX IF NOT EXISTS idx_transactions_category_date ON transactions (category, date)',
+    ),
+    # 2: цілі копійки й дні від епохи замість REAL/TEXT
+    migrate_to_v2,
+    # 3: повнотекстовий пошук (FTS5)
+    _FTS_STATEMENTS,
+    # 4: архівні розділи за роками
+    _PARTITION_STATEMENTS,
+    # 5: місячні бюджети за категоріями
+    _BUDGET_STATEMENTS,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn, chunk_size=MIGRATION_CHUNK, progress=None):
+    # Застосовує відсутні міграції; повертає версію схеми до міграції
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        if callable(step):
+            step(conn, chunk_size=chunk_size, progress=progress)
+        else:
+            with conn:
+                for statement in step:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {number}')
+    return version
+
+
+def ensure_schema(conn, chunk_size=MIGRATION_CHUNK, progress=None):
+    # Створює нову БД одразу в останній версії або мігрує наявну.
+    # Повертає True, якщо дані старої схеми були перетворені (знімок треба перебудувати).
+    conn.execute(_META_SQL)
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions'").fetchone()
+    if exists is None:
+        conn.execute(_TRANSACTIONS_SQL.format(name="transactions"))
+        for statement in _INDEXES:
+            conn.execute(statement)
+        conn.execute(f'PRAGMA user_version = {BASE_VERSION}')
+    converted = migrate(conn, chunk_size, progress) < BASE_VERSION
+    conn.execute(_AGGREGATES_SQL)
+    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('snapshot_last_id', 0)")
+    conn.commit()
+    return converted
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Міграція БД Finance Tracker до останньої версії схеми")
+    parser.add_argument("db_path")
+    parser.add_argument("--chunk-size", type=int, default=MIGRATION_CHUNK)
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db_path)
+    try:
+        before = conn.execute('PRAGMA user_version').fetchone()[0]
+
+        def progress(copied, total):
+            print(f"\r{copied}/{total}", end="", file=sys.stderr, flush=True)
+        ensure_schema(conn, args.chunk_size, progress)
+        after = conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+    print(f"\nВерсія схеми: {before} -> {after}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,53 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import date, datetime
+
+# Цілочисельні теги типу — дешевше порівнювати, ніж рядки з get_type()
+INCOME = 1
+EXPENSE = 2
+
+# У БД суми зберігаються в копійках, а дати — як кількість днів від 1970-01-01
+MINOR_UNITS = 100
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def to_minor(amount):
+    # Округлення «від нуля», як round() у SQLite
+    minor = int(abs(amount) * MINOR_UNITS + 0.5)
+    return minor if amount >= 0 else -minor
+
+
+def from_minor(minor):
+    return minor / MINOR_UNITS
+
+
+def to_epoch_day(d):
+    # datetime/date або рядок 'YYYY-MM-DD'
+    if isinstance(d, str):
+        d = date.fromisoformat(d[:10])
+    return d.toordinal() - EPOCH_ORDINAL
+
+
+def from_epoch_day(day):
+    return datetime.fromordinal(day + EPOCH_ORDINAL)
+
+
+def _parse_date(date):
+    if isinstance(date, datetime):
+        return date
+    # Швидкий шлях для канонічного 'YYYY-MM-DD', решта — через strptime як і раніше
+    if len(date) == 10 and date[4] == '-' and date[7] == '-':
+        return datetime.fromisoformat(date)
+    return datetime.strptime(date, '%Y-%m-%d')
+
 
 class Transaction(ABC):
+    __slots__ = ("amount", "category", "date", "description", "id")
+    type_code = None
+
     def __init__(self, amount, category, date, description, id=None):
         self.amount = amount
         self.category = category
-        self.date = date if isinstance(date, datetime) else datetime.strptime(date, '%Y-%m-%d')
+        self.date = _parse_date(date)
         self.description = description
         self.id = id  # ← потрібен для видалення по ID
 
@@ -13,16 +55,30 @@ class Transaction(ABC):
     def get_type(self):
         pass
 
+    @property
+    def amount_minor(self):
+        return to_minor(self.amount)
+
+    @property
+    def day(self):
+        return to_epoch_day(self.date)
+
     def __repr__(self):
         return f"#{self.id} [{self.get_type()}] {self.date.date()} - {self.category}: {self.amount} ({self.description})"
 
 
 class IncomeTransaction(Transaction):
+    __slots__ = ()
+    type_code = INCOME
+
     def get_type(self):
         return "Income"
 
 
 class ExpenseTransaction(Transaction):
+    __slots__ = ()
+    type_code = EXPENSE
+
     def get_type(self):
         return "Expense"
 
@@ -0,0 +1,169 @@
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+from core.database import DatabaseHandler
+from core.metrics import METRICS
+
+_STOP = object()
+
+# Операції з гістограмою db_operation_seconds — під тими ж іменами, що й на прямому шляху
+# (DatabaseHandler); латентність рахується від постановки в чергу до commit
+_TIMED_OPS = {"save": "save_transaction", "delete": "delete_transactions"}
+
+
+class GroupCommitWriter:
+    # Окремий потік із власним з'єднанням: записи, що надійшли майже одночасно,
+    # виконуються в одній SQL-транзакції й підтверджуються одним commit.
+    # Future кожної операції завершується лише після commit (тобто запис уже надійний
+    # у межах обраного профілю).
+    def __init__(self, db_path, profile="balanced", window=0.0, max_batch=256, on_commit=None):
+        self.db_path = db_path
+        self.profile = profile
+        self.window = window          # скільки чекати на сусідні записи; 0 — лише ті, що вже в черзі
+        self.max_batch = max_batch
+        self.on_commit = on_commit    # on_commit(kind, result) у потоці запису, до завершення Future
+        self.commits = 0
+        self.operations = 0
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="finance-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def save(self, transaction):
+        return self.submit("save", DatabaseHandler._insert, transaction)
+
+    def delete(self, ids):
+        return self.submit("delete", DatabaseHandler._delete_rows, list(ids))
+
+    def read(self, func):
+        # func(db) виконується між commit'ами, поза транзакцією (тож архіви можна приєднувати
+        # й від'єднувати): бачить усі записи, поставлені в чергу раніше, а on_commit("read", ...)
+        # іде одразу після сповіщень про них
+        return self.submit("read", func)
+
+    def submit(self, kind, func, *args):
+        # func(db, *args) виконується в потоці запису без власного commit
+        if self._thread is None:
+            raise RuntimeError("Writer is closed")
+        future = Future()
+        self._queue.put((kind, func, args, future, time.perf_counter()))
+        return future
+
+    def close(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _run(self):
+        try:
+            db = DatabaseHandler(self.db_path, profile=self.profile)
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            stop = False
+            while not stop:
+                batch = self._collect(self._queue.get())
+                if batch[-1] is _STOP:
+                    stop = True
+                    batch.pop()
+                writes = []
+                for item in batch:
+                    if item[0] != "read":
+                        writes.append(item)
+                        continue
+                    if writes:
+                        self._commit_batch(db, writes)
+                        writes = []
+                    self._read(db, item)
+                if writes:
+                    self._commit_batch(db, writes)
+        finally:
+            db.close()
+
+    def _commit_batch(self, db, batch):
+        done = []
+        started = time.perf_counter()
+        try:
+            db.conn.execute("BEGIN IMMEDIATE")
+            for kind, func, args, future, _ in batch:
+                # Точка збереження на операцію: помилка однієї не скасовує решту групи
+                db.conn.execute("SAVEPOINT op")
+                try:
+                    result = func(db, *args)
+                except Exception as e:
+                    db.conn.execute("ROLLBACK TO op")
+                    future.set_exception(e)
+                else:
+                    done.append((kind, result, future))
+                db.conn.execute("RELEASE op")
+            db.conn.commit()
+        except Exception as e:
+            if db.conn.in_transaction:
+                db.conn.rollback()
+            for _, _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            self._observe_latency(batch)
+            return
+        self._observe_latency(batch)
+        METRICS.observe("writer_commit_seconds", time.perf_counter() - started)
+        METRICS.inc("writer_operations_total", len(batch))
+        self.commits += 1
+        self.operations += len(batch)
+        for kind, result, future in done:
+            self._deliver(kind, result, future)
+
+    @staticmethod
+    def _observe_latency(batch):
+        finished = time.perf_counter()
+        for kind, _, _, _, queued in batch:
+            op = _TIMED_OPS.get(kind)
+            if op is not None:
+                METRICS.observe("db_operation_seconds", finished - queued, op=op)
+
+    def _read(self, db, item):
+        kind, func, args, future, _ = item
+        try:
+            result = func(db, *args)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            self._deliver(kind, result, future)
+
+    def _deliver(self, kind, result, future):
+        if self.on_commit is not None:
+            try:
+                self.on_commit(kind, result)
+            except Exception as e:
+                print(f"[WRITER] Помилка обробника commit: {e}", file=sys.stderr)
+        future.set_result(result)
@@ -0,0 +1,237 @@
+import argparse
+import csv
+import json
+import sys
+from datetime import date
+
+from core.importer import DEFAULT_COLUMNS, import_csv
+from core.manager import FinanceManager
+from core.metrics import METRICS
+from core.transaction import from_minor
+
+# Консольний інтерфейс без Tk і matplotlib: завантажуються лише core і БД,
+# бібліотека графіків — тільки для `report --chart`
+
+
+def _filters(args):
+    return {
+        "type": getattr(args, "type", None),
+        "date_from": getattr(args, "date_from", None),
+        "date_to": getattr(args, "date_to", None),
+        "categories": getattr(args, "category", None),
+    }
+
+
+def _print_json(data, out):
+    json.dump(data, out, ensure_ascii=False, indent=2)
+    out.write("\n")
+
+
+def cmd_balance(manager, args, out):
+    out.write(f"{manager.get_balance():.2f}\n")
+    return 0
+
+
+def cmd_summary(manager, args, out):
+    summary = manager.get_summary()
+    summary["balance"] = manager.get_balance()
+    summary["count"] = manager.count_transactions()
+    if args.json:
+        _print_json(summary, out)
+    else:
+        out.write(f"Дохід: {summary['income']:.2f}\n"
+                  f"Витрати: {summary['expense']:.2f}\n"
+                  f"Баланс: {summary['balance']:.2f}\n"
+                  f"Транзакцій: {summary['count']}\n")
+    return 0
+
+
+def cmd_import(manager, args, out):
+    def progress(count, seconds):
+        print(f"\r{count} рядків, {seconds:.1f} с", end="", file=sys.stderr, flush=True)
+    try:
+        stats = import_csv(manager, args.path, chunk_size=args.chunk_size, progress=progress,
+                           delimiter=args.delimiter, encoding=args.encoding, date_format=args.date_format)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Помилка імпорту: {e}", file=sys.stderr)
+        return 1
+    out.write(f"Імпортовано {stats['rows']} рядків за {stats['seconds']:.2f} с "
+              f"({stats['rows_per_sec']:.0f} рядків/с)\n")
+    return 0
+
+
+def cmd_export(manager, args, out):
+    # Рядки читаються з БД посторінково і відразу пишуться у файл — пам'ять не росте з обсягом
+    f = out if args.path == "-" else open(args.path, "w", newline="", encoding=args.encoding)
+    try:
+        writer = csv.writer(f, delimiter=args.delimiter)
+        writer.writerow(DEFAULT_COLUMNS.values())
+        count = 0
+        for t in manager.query(order="date", **_filters(args)):
+            writer.writerow((t.get_type(), f"{t.amount:.2f}", t.category, t.date.date().isoformat(), t.description))
+            count += 1
+    finally:
+        if f is not out:
+            f.close()
+    if f is not out:
+        out.write(f"Експортовано {count} рядків у {args.path}\n")
+    return 0
+
+
+def cmd_report(manager, args, out):
+    # {ключ: (дохід, витрати)} з одного GROUP BY у SQLite
+    rows = {}
+    for (key, t_type), total in manager.aggregate((args.by, "type"), **_filters(args)).items():
+        income, expense = rows.get(key, (0.0, 0.0))
+        rows[key] = (income + total, expense) if t_type == "Income" else (income, expense + total)
+
+    if args.json:
+        _print_json([{args.by: key, "income": income, "expense": expense, "balance": income - expense}
+                     for key, (income, expense) in rows.items()], out)
+    else:
+        width = max([len(str(key)) for key in rows] + [len(args.by)])
+        out.write(f"{args.by:<{width}}  {'Дохід':>12}  {'Витрати':>12}  {'Баланс':>12}\n")
+        for key, (income, expense) in rows.items():
+            out.write(f"{key:<{width}}  {income:>12.2f}  {expense:>12.2f}  {income - expense:>12.2f}\n")
+
+    if args.chart:
+        from charts.chart import save_chart
+        if args.by == "month":
+            save_chart("monthly_bar", rows, args.chart)
+        else:
+            expenses = {key: expense for key, (_, expense) in rows.items() if expense > 0}
+            if not expenses:
+                print("Немає витрат для побудови графіку.", file=sys.stderr)
+                return 1
+            save_chart("expense_pie", expenses, args.chart)
+    return 0
+
+
+def cmd_budget(manager, args, out):
+    # Спершу зміни (--set / --remove), далі стан бюджетів за місяць
+    try:
+        if args.set:
+            category, amount = args.set
+            manager.set_budget(category, float(amount.replace(",", ".")), month=args.month)
+        if args.remove:
+            if not manager.remove_budget(args.remove, month=args.month):
+                print(f"Бюджет не знайдено: {args.remove}", file=sys.stderr)
+                return 1
+        report = manager.budget_report(args.month)
+    except ValueError as e:
+        print(f"Помилка бюджету: {e}", file=sys.stderr)
+        return 1
+    for category, spent, limit in report:
+        mark = "  !" if spent >= limit else ""
+        out.write(f"{category}: {spent:.2f} / {limit:.2f} ({spent / limit:.0%}){mark}\n")
+    return 0
+
+
+def _print_partitions(partitions, out):
+    for p in partitions:
+        out.write(f"{p.year}: {p.path}, {p.rows} рядків, дохід {from_minor(p.income_minor):.2f}, "
+                  f"витрати {from_minor(p.expense_minor):.2f}\n")
+
+
+def cmd_archive(manager, args, out):
+    through = args.through if args.through is not None else date.today().year - 1
+    try:
+        archived = manager.archive_years(through, vacuum=not args.no_vacuum)
+    except (ValueError, RuntimeError) as e:
+        print(f"Помилка архівації: {e}", file=sys.stderr)
+        return 1
+    if not archived:
+        out.write("Немає рядків для архівації\n")
+    _print_partitions(archived, out)
+    return cmd_check(manager, args, out, quiet=True)
+
+
+def cmd_check(manager, args, out, quiet=False):
+    if not quiet:
+        _print_partitions(manager.list_partitions(), out)
+    problems = manager.verify_partitions()
+    for problem in problems:
+        print(f"Розбіжність: {problem}", file=sys.stderr)
+    if not problems:
+        out.write("Цілісність: суми збігаються\n")
+    return 1 if problems else 0
+
+
+def _add_filter_arguments(parser):
+    parser.add_argument("--type", choices=["Income", "Expense"])
+    parser.add_argument("--from", dest="date_from", metavar="YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", metavar="YYYY-MM-DD")
+    parser.add_argument("--category", action="append", help="можна вказати кілька разів")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m finance_tracker",
+                                     description="Finance Tracker без графічного інтерфейсу")
+    parser.add_argument("--db", default="data/finance.db", help="шлях до БД (за замовчуванням data/finance.db)")
+    parser.add_argument("--log", default="log.txt", help="файл журналу операцій")
+    parser.add_argument("--metrics", metavar="FILE", help="зберегти метрики: .prom — формат Prometheus, інакше JSON")
+    parser.add_argument("--slow-query-ms", type=float, metavar="MS", help="записувати SQL, повільніші за MS мілісекунд")
+    parser.add_argument("--profile", metavar="FILE", help="профілювати команду (cProfile + tracemalloc) у FILE")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    balance = commands.add_parser("balance", help="поточний баланс")
+    balance.set_defaults(handler=cmd_balance)
+
+    summary = commands.add_parser("summary", help="доходи, витрати, баланс")
+    summary.add_argument("--json", action="store_true")
+    summary.set_defaults(handler=cmd_summary)
+
+    import_ = commands.add_parser("import", help="імпорт транзакцій з CSV")
+    import_.add_argument("path")
+    import_.add_argument("--delimiter", default=",")
+    import_.add_argument("--encoding", default="utf-8")
+    import_.add_argument("--date-format", default="%Y-%m-%d")
+    import_.add_argument("--chunk-size", type=int, default=1000)
+    import_.set_defaults(handler=cmd_import)
+
+    export = commands.add_parser("export", help="експорт транзакцій у CSV")
+    export.add_argument("path", help="файл або '-' для stdout")
+    export.add_argument("--delimiter", default=",")
+    export.add_argument("--encoding", default="utf-8")
+    _add_filter_arguments(export)
+    export.set_defaults(handler=cmd_export)
+
+    report = commands.add_parser("report", help="доходи й витрати по місяцях або категоріях")
+    report.add_argument("--by", choices=["month", "category"], default="month")
+    report.add_argument("--json", action="store_true")
+    report.add_argument("--chart", metavar="FILE", help="зберегти графік (png, svg, pdf)")
+    _add_filter_arguments(report)
+    report.set_defaults(handler=cmd_report)
+
+    archive = commands.add_parser("archive", help="перенести закриті роки в архівні файли")
+    archive.add_argument("--through", type=int, metavar="YEAR", help="останній рік архіву (за замовчуванням минулий)")
+    archive.add_argument("--no-vacuum", action="store_true", help="не стискати основну БД після перенесення")
+    archive.set_defaults(handler=cmd_archive)
+
+    budget = commands.add_parser("budget", help="місячні бюджети за категоріями")
+    budget.add_argument("--month", metavar="YYYY-MM", help="місяць (за замовчуванням поточний); "
+                                                          "з --set/--remove — ліміт лише на цей місяць")
+    budget.add_argument("--set", nargs=2, metavar=("CATEGORY", "AMOUNT"), help="встановити ліміт")
+    budget.add_argument("--remove", metavar="CATEGORY", help="прибрати ліміт")
+    budget.set_defaults(handler=cmd_budget)
+
+    check = commands.add_parser("check", help="архівні розділи і перевірка цілісності")
+    check.set_defaults(handler=cmd_check)
+    return parser
+
+
+def main(argv=None, out=None):
+    args = build_parser().parse_args(argv)
+    if args.slow_query_ms is not None:
+        METRICS.slow_query_threshold = args.slow_query_ms / 1000
+    if args.profile:
+        METRICS.start_profiling()
+    manager = FinanceManager(db_path=args.db, log_path=args.log)
+    try:
+        return args.handler(manager, args, out or sys.stdout)
+    finally:
+        manager.close()
+        if args.profile:
+            METRICS.stop_profiling(args.profile)
+        if args.metrics:
+            METRICS.write(args.metrics)
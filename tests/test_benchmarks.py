@@ -0,0 +1,55 @@
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.generator import generate_rows, generate_ledger
+from benchmarks.run import run_benchmarks, compare_reports
+from core.manager import FinanceManager
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_generator_is_seeded_and_skewed(self):
+        rows = list(generate_rows(3000, seed=7))
+        self.assertEqual(rows, list(generate_rows(3000, seed=7)))
+        self.assertNotEqual(rows, list(generate_rows(3000, seed=8)))
+        counts = Counter(category for t_type, _, category, _, _ in rows if t_type == "Expense")
+        self.assertGreater(counts["Food"], 5 * counts["Repair"])
+        years = {date[:4] for _, _, _, date, _ in rows}
+        self.assertGreater(len(years), 3)
+
+    def test_generate_ledger_builds_snapshot(self):
+        db_path = os.path.join(self.test_dir, "ledger.db")
+        self.assertEqual(generate_ledger(db_path, 500, seed=1), 500)
+        manager = FinanceManager(db_path=db_path, log_path=os.path.join(self.test_dir, "log.txt"))
+        try:
+            expected = sum(a if t == "Income" else -a for t, a, _, _, _ in generate_rows(500, seed=1))
+            self.assertAlmostEqual(manager.get_balance(), expected, places=4)
+        finally:
+            manager.close()
+
+    def test_run_and_compare(self):
+        report = run_benchmarks([300], repeat=1, ops=5, only=["startup", "add_transaction"],
+                                work_dir=self.test_dir)
+        self.assertEqual(set(report["results"]["300"]), {"startup", "add_transaction"})
+        self.assertEqual(report["results"]["300"]["add_transaction"]["ops"], 5)
+        slower = {"results": {"300": {name: dict(result, median_s=result["median_s"] * 2)
+                                      for name, result in report["results"]["300"].items()}}}
+        comparison = compare_reports(report, slower, threshold=0.5)
+        self.assertEqual(len(comparison["regressions"]), 2)
+        self.assertEqual(compare_reports(slower, report)["regressions"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
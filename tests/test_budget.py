@@ -0,0 +1,123 @@
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.manager import FinanceManager
+from core.observer import Observer
+
+
+class AlertRecorder(Observer):
+    def __init__(self):
+        self.alerts = []
+
+    def update(self, transaction):
+        pass
+
+    def on_alert(self, alert):
+        self.alerts.append(alert)
+
+
+class TestBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.manager = self._open()
+        self.manager.add_transactions([
+            ("Expense", 300, "Food", "2024-01-05", "market"),
+            ("Expense", 200, "Food", "2024-02-10", "cafe"),
+            ("Expense", 50, "Taxi", "2024-01-07", "ride"),
+            ("Income", 5000, "Food", "2024-01-01", "refund"),
+        ])
+        self.recorder = AlertRecorder()
+        self.manager.subject.attach(self.recorder)
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.test_dir)
+
+    def _open(self):
+        return FinanceManager(db_path=os.path.join(self.test_dir, "finance.db"),
+                              log_path=os.path.join(self.test_dir, "log.txt"))
+
+    def test_counters_follow_adds_and_removes(self):
+        self.manager.set_budget("Food", 1000)
+        self.assertEqual(self.manager.budget.spent, {"Food": {"2024-01": 30000, "2024-02": 20000}})
+        added = self.manager.add_transaction("Expense", 450, "Food", "2024-01-20", "party")
+        self.manager.add_transaction("Expense", 999, "Other", "2024-01-20", "no budget")
+        self.assertEqual(self.manager.budget.spent["Food"]["2024-01"], 75000)
+        self.assertNotIn("Other", self.manager.budget.spent)
+        self.manager.delete_transaction_by_id(added.id)
+        self.assertEqual(self.manager.budget_report("2024-01"), [("Food", 300.0, 1000.0)])
+
+    def test_threshold_crossings_reach_other_observers(self):
+        self.manager.set_budget("Food", 500)
+        self.assertEqual(self.recorder.alerts, [])
+        self.manager.add_transaction("Expense", 120, "Food", "2024-01-15", "dinner")
+        added = self.manager.add_transaction("Expense", 100, "Food", "2024-01-16", "more")
+        self.manager.add_transaction("Expense", 1, "Food", "2024-01-17", "same level")
+        self.manager.delete_transaction_by_id(added.id)
+        self.assertEqual([(a.month, a.category, a.level, a.previous) for a in self.recorder.alerts],
+                         [("2024-01", "Food", 0.8, 0), ("2024-01", "Food", 1.0, 0.8),
+                          ("2024-01", "Food", 0.8, 1.0)])
+        self.assertTrue(self.recorder.alerts[1].rising)
+        self.assertIn("перевищено", str(self.recorder.alerts[1]))
+        self.assertEqual(self.manager.budget.alerts("2024-01"), {"Food": 0.8})
+
+        self.manager.logger.flush()
+        with open(os.path.join(self.test_dir, "log.txt"), encoding="utf-8") as f:
+            self.assertEqual(f.read().count("[BUDGET]"), 3)
+
+    def test_month_override_and_lowered_limit(self):
+        self.manager.set_budget("Food", 1000)
+        self.manager.set_budget("Food", 250, month="2024-02")
+        self.assertEqual([(a.month, a.level) for a in self.recorder.alerts], [("2024-02", 0.8)])
+        self.manager.set_budget("Food", 300)
+        self.assertEqual([(a.month, a.level) for a in self.recorder.alerts[1:]], [("2024-01", 1.0)])
+        self.assertTrue(self.manager.remove_budget("Food", month="2024-02"))
+        self.assertEqual(self.manager.budget_report("2024-02"), [("Food", 200.0, 300.0)])
+        with self.assertRaises(ValueError):
+            self.manager.set_budget("Food", 100, month="2024-13")
+        with self.assertRaises(ValueError):
+            self.manager.set_budget("Food", 0)
+
+    def test_limit_set_between_commit_and_its_notification(self):
+        self.manager.close()
+        self.manager = FinanceManager(db_path=os.path.join(self.test_dir, "finance.db"),
+                                      log_path=os.path.join(self.test_dir, "log.txt"), group_commit=True)
+        # Рядок уже закомічено, але сповіщення про нього ще не почалось: ліміт, виставлений
+        # у цей момент, не повинен врахувати його двічі
+        committed, release = threading.Event(), threading.Event()
+        on_commit = self.manager.writer.on_commit
+
+        def delayed(kind, result):
+            committed.set()
+            release.wait(5)
+            on_commit(kind, result)
+
+        self.manager.writer.on_commit = delayed
+        future = self.manager.add_transaction_async("Expense", 100, "Taxi", "2024-01-20", "late ride")
+        self.assertTrue(committed.wait(5))
+        threading.Timer(0.2, release.set).start()
+        self.manager.set_budget("Taxi", 500)
+        future.result()
+        self.assertEqual(self.manager.budget.spent["Taxi"], {"2024-01": 15000})
+        self.assertEqual(self.manager.budget_report("2024-01")[0], ("Taxi", 150.0, 500.0))
+
+    def test_budgets_persist_and_reload_counters(self):
+        self.manager.set_budget("Food", 350)
+        self.manager.set_budget("Taxi", 40, month="2024-01")
+        self.manager.close()
+        self.manager = self._open()
+        self.assertEqual(self.manager.budget.limits, {("Food", ""): 35000, ("Taxi", "2024-01"): 4000})
+        self.assertEqual(self.manager.budget.alerts("2024-01"), {"Food": 0.8, "Taxi": 1.0})
+        self.assertEqual(self.manager.budget_report("2024-01"),
+                         [("Taxi", 50.0, 40.0), ("Food", 300.0, 350.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
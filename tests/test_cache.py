@@ -0,0 +1,125 @@
+import unittest
+import os
+import sys
+import sqlite3
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.manager import FinanceManager
+from core.cache import QueryCache, cache_key
+
+
+class TestQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "finance.db")
+        self.manager = self._open()
+        self.manager.add_transactions([
+            ("Expense", 100, "Food", "2024-01-05", "market"),
+            ("Expense", 40, "Taxi", "2024-01-07", "ride"),
+            ("Expense", 60, "Food", "2024-02-10", "cafe"),
+            ("Income", 1000, "Salary", "2024-02-01", "pay"),
+        ])
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.test_dir)
+
+    def _open(self, **options):
+        return FinanceManager(db_path=self.db_path, log_path=os.path.join(self.test_dir, "log.txt"), **options)
+
+    def test_repeated_reads_hit_and_return_copies(self):
+        m = self.manager
+        first = m.aggregate("category", type="expense", date_from="2024-01-01")
+        first["Food"] = 0
+        self.assertEqual(m.aggregate("category", type="Expense", date_from="2024-01-01"), {"Food": 160.0, "Taxi": 40.0})
+        self.assertEqual([t.id for t in m.query(categories=["Food"])], [1, 3])
+        self.assertEqual([t.id for t in m.query(categories=("Food",))], [1, 3])
+        self.assertEqual(len(m.get_all_transactions()), 4)
+        m.get_all_transactions().clear()
+        self.assertEqual(len(m.get_all_transactions()), 4)
+        stats = m.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (4, 3, 3))
+
+    def test_writes_invalidate_only_overlapping_entries(self):
+        m = self.manager
+        january = dict(date_from="2024-01-01", date_to="2024-01-31")
+        m.aggregate("category", **january)
+        m.count_transactions(categories=["Taxi"])
+        m.count_transactions(type="Income")
+        february = m.get_page(0, 10, order="date", date_from="2024-02-01")
+
+        added = m.add_transaction("Expense", 5, "Food", "2024-02-20", "snack")
+        self.assertEqual(m.cache.stats()["entries"], 3)
+        self.assertEqual([t.id for t in m.get_page(0, 10, order="date", date_from="2024-02-01")],
+                         [t.id for t in february] + [added.id])
+
+        m.delete_transaction_by_id(2)
+        self.assertEqual(m.aggregate("category", **january), {"Food": 100.0})
+        self.assertEqual(m.count_transactions(categories=["Taxi"]), 0)
+        self.assertEqual(m.count_transactions(type="Income"), 1)
+        self.assertEqual(m.cache.stats()["invalidations"], 3)
+
+        m.add_transactions([("Income", 10, "Gift", "2023-12-31", "")])
+        self.assertEqual(m.count_transactions(type="Income"), 2)
+
+    def test_lru_eviction_and_row_limit(self):
+        m = self._open(cache_entries=2)
+        try:
+            for category in ("Food", "Taxi", "Salary"):
+                m.count_transactions(categories=[category])
+            m.count_transactions(categories=["Salary"])
+            self.assertEqual(m.cache.stats()["evictions"], 1)
+            self.assertEqual(m.cache.stats()["hits"], 1)
+        finally:
+            m.close()
+
+        cache = QueryCache(max_rows=3)
+        key, scope = cache_key("all")
+        cache.put(key, scope, [1, 2, 3, 4], cache.generation)
+        self.assertEqual(cache.get(key), (False, None))
+
+    def test_result_read_before_a_write_is_not_stored(self):
+        m = self.manager
+        key, scope = cache_key("count")
+        generation = m.cache.generation
+        stale = m.db.count_transactions()
+        m.add_transaction("Expense", 1, "Food", "2024-03-01", "")
+        m.cache.put(key, scope, stale, generation)
+        self.assertEqual(m.count_transactions(), 5)
+
+        rows = m.query(type="Expense")
+        next(rows)
+        self.assertEqual(m.cache.stats()["entries"], 1)
+
+    def test_other_connections_and_writer_thread(self):
+        self.assertEqual(self.manager.count_transactions(), 4)
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute("DELETE FROM transactions WHERE id = 4")
+        conn.close()
+        self.assertEqual(self.manager.count_transactions(), 3)
+
+        self.manager.close()
+        self.manager = self._open(group_commit=True)
+        self.assertEqual(self.manager.aggregate("type"), {"Expense": 200.0})
+        self.assertEqual(self.manager.count_transactions(categories=["Taxi"]), 1)
+        self.manager.add_transaction("Income", 7, "Gift", "2024-03-01", "")
+        self.assertEqual(self.manager.aggregate("type"), {"Expense": 200.0, "Income": 7.0})
+        # Власний commit потоку запису скидає лише записи, яких він стосується
+        self.assertEqual(self.manager.count_transactions(categories=["Taxi"]), 1)
+        self.assertEqual(self.manager.cache.stats()["hits"], 1)
+
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute("DELETE FROM transactions WHERE category = 'Taxi'")
+        conn.close()
+        self.assertEqual(self.manager.count_transactions(categories=["Taxi"]), 0)
+        self.assertEqual(self.manager.aggregate("type"), {"Expense": 160.0, "Income": 7.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.manager import FinanceManager
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from charts.chart import ChartService
+except ImportError:
+    matplotlib = None
+
+
+@unittest.skipUnless(matplotlib, "matplotlib не встановлено")
+class TestChartService(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.manager = FinanceManager(db_path=os.path.join(self.test_dir, "test_finance.db"),
+                                      log_path=os.path.join(self.test_dir, "log.txt"))
+        self.service = ChartService(self.manager)
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.test_dir)
+
+    def _add_sample(self):
+        self.manager.add_transaction("Income", 1000, "Salary", "2024-01-05", "")
+        self.manager.add_transaction("Expense", 200, "Food", "2024-01-10", "")
+        self.manager.add_transaction("Expense", 300, "Rent", "2024-02-01", "")
+
+    def test_no_data(self):
+        self.assertFalse(self.service.render("expense_pie"))
+        with self.assertRaises(ValueError):
+            self.service.render("scatter")
+
+    def test_cache_invalidated_only_on_change(self):
+        self._add_sample()
+        first = self.service.data.expenses_by_category()
+        self.assertEqual(first, {"Food": 200, "Rent": 300})
+        self.assertIs(self.service.data.expenses_by_category(), first)
+        t = self.manager.add_transaction("Expense", 50, "Food", "2024-02-03", "")
+        self.assertEqual(self.service.data.expenses_by_category()["Food"], 250)
+        self.manager.delete_transaction_by_id(t.id)
+        self.assertEqual(self.service.data.expenses_by_category()["Food"], 200)
+
+    def test_data_read_before_a_write_is_not_cached(self):
+        data = self.service.data
+
+        def read_then_write():
+            result = self.manager.aggregate("category", type="Expense")
+            self.manager.add_transaction("Expense", 50, "Food", "2024-02-03", "")
+            return result
+
+        self.assertEqual(data._cached("expense_pie", read_then_write), {})
+        self.assertNotIn("expense_pie", data._cache)
+        self.assertEqual(data.expenses_by_category(), {"Food": 50})
+
+    def test_prepare_in_background_fills_cache(self):
+        manager = FinanceManager(db_path=os.path.join(self.test_dir, "pool.db"),
+                                 log_path=os.path.join(self.test_dir, "log.txt"), profile="balanced", readers=2)
+        try:
+            service = ChartService(manager)
+            manager.add_transaction("Expense", 200, "Food", "2024-01-10", "")
+            self.assertEqual(service.data.prepare("expense_pie").result(timeout=5), {"Food": 200})
+            self.assertEqual(service.data.prepare("monthly_bar").result(timeout=5), {"2024-01": (0, 200)})
+            self.assertIn("expense_pie", service.data._cache)
+            self.assertTrue(service.render("monthly_bar"))
+        finally:
+            manager.close()
+
+    def test_all_kinds_reuse_one_figure(self):
+        self._add_sample()
+        figure = self.service.figure
+        for kind in ("expense_pie", "monthly_bar", "balance_line", "expense_pie"):
+            self.assertTrue(self.service.render(kind))
+        self.assertIs(self.service.figure, figure)
+        self.assertEqual(len(figure.axes), 1)
+        self.assertEqual(plt.get_fignums(), [])
+        self.assertEqual(self.service.data.monthly(), {"2024-01": (1000, 200), "2024-02": (0, 300)})
+        self.assertEqual(self.service.data.balance_over_time(), [("2024-01", 800), ("2024-02", 500)])
+
+    def test_bars_updated_in_place(self):
+        self._add_sample()
+        self.service.render("monthly_bar")
+        income_bars = self.service._artists[0]
+        self.manager.add_transaction("Income", 500, "Bonus", "2024-02-10", "")
+        self.service.render("monthly_bar")
+        self.assertIs(self.service._artists[0], income_bars)
+        self.assertEqual(income_bars[1].get_height(), 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import shutil
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from finance_tracker.cli import main
+from benchmarks.run import run_benchmarks
+from core.metrics import METRICS
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "finance.db")
+        self.csv_path = os.path.join(self.test_dir, "in.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write("type,amount,category,date,description\n"
+                    "Income,1000,Salary,2024-01-05,pay\n"
+                    "Expense,\"12,50\",Food,2024-01-06,lunch\n"
+                    "Expense,30,Taxi,2024-02-01,ride\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        code = main(["--db", self.db_path, "--log", os.path.join(self.test_dir, "log.txt"), *argv], out=out)
+        self.assertEqual(code, 0)
+        return out.getvalue()
+
+    def test_import_balance_summary(self):
+        self.assertIn("3", self.run_cli("import", self.csv_path))
+        self.assertEqual(self.run_cli("balance"), "957.50\n")
+        summary = json.loads(self.run_cli("summary", "--json"))
+        self.assertEqual(summary, {"income": 1000.0, "expense": 42.5, "balance": 957.5, "count": 3})
+
+    def test_export_round_trip(self):
+        self.run_cli("import", self.csv_path)
+        exported = os.path.join(self.test_dir, "out.csv")
+        self.run_cli("export", exported)
+        self.assertEqual(self.run_cli("export", "-", "--type", "Expense", "--from", "2024-02-01").splitlines(),
+                         ["type,amount,category,date,description", "Expense,30.00,Taxi,2024-02-01,ride"])
+
+        self.db_path = os.path.join(self.test_dir, "copy.db")
+        self.run_cli("import", exported)
+        self.assertEqual(self.run_cli("balance"), "957.50\n")
+
+    def test_report_by_month_and_category(self):
+        self.run_cli("import", self.csv_path)
+        months = json.loads(self.run_cli("report", "--by", "month", "--json"))
+        self.assertEqual(months, [
+            {"month": "2024-01", "income": 1000.0, "expense": 12.5, "balance": 987.5},
+            {"month": "2024-02", "income": 0.0, "expense": 30.0, "balance": -30.0},
+        ])
+        lines = self.run_cli("report", "--by", "category", "--type", "Expense").splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:]], ["Food", "Taxi"])
+
+    def test_archive_and_check(self):
+        self.run_cli("import", self.csv_path)
+        output = self.run_cli("archive", "--through", "2024")
+        self.assertTrue(output.startswith("2024: finance.2024.db, 3 рядків"))
+        self.assertIn("Цілісність", self.run_cli("check"))
+        self.assertEqual(self.run_cli("balance"), "957.50\n")
+
+    def test_budget_set_and_report(self):
+        self.run_cli("import", self.csv_path)
+        self.run_cli("budget", "--set", "Taxi", "25")
+        self.assertEqual(self.run_cli("budget", "--set", "Food", "20,00", "--month", "2024-01"),
+                         "Food: 12.50 / 20.00 (62%)\nTaxi: 0.00 / 25.00 (0%)\n")
+        self.assertEqual(self.run_cli("budget", "--month", "2024-02"), "Taxi: 30.00 / 25.00 (120%)  !\n")
+
+    def test_metrics_output(self):
+        path = os.path.join(self.test_dir, "metrics.prom")
+        METRICS.reset()
+        self.run_cli("--metrics", path, "import", self.csv_path)
+        with open(path, encoding="utf-8") as f:
+            self.assertIn('finance_transactions_built_total{source="input"} 3', f.read())
+
+    def test_cold_start_skips_gui_and_charts(self):
+        self.run_cli("import", self.csv_path)
+        code = ("import sys; from finance_tracker.cli import main; "
+                f"main(['--db', {self.db_path!r}, '--log', {os.path.join(self.test_dir, 'log.txt')!r}, 'summary']); "
+                "print(sorted(m for m in ('matplotlib', 'tkinter', 'numpy') if m in sys.modules))")
+        completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(completed.stdout.splitlines()[-1], "[]")
+
+    def test_cold_start_benchmark(self):
+        report = run_benchmarks([200], repeat=1, only=["cli_cold_start"], work_dir=self.test_dir)
+        result = report["results"]["200"]["cli_cold_start"]
+        self.assertGreater(result["import_s"], 0)
+        self.assertEqual(result["heavy_imports"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.manager import FinanceManager
+from ui.list_model import TransactionListModel
+
+
+class TestTransactionListModel(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.manager = FinanceManager(db_path=os.path.join(self.test_dir, "finance.db"),
+                                      log_path=os.path.join(self.test_dir, "log.txt"))
+        self.manager.add_transactions(
+            ("Expense" if i % 2 else "Income", i + 1, f"C{i % 3}", f"2024-01-{i % 28 + 1:02d}", f"row {i}")
+            for i in range(50))
+        self.model = TransactionListModel(self.manager, page_size=10, order="id")
+
+    def tearDown(self):
+        self.model.close()
+        self.manager.close()
+        shutil.rmtree(self.test_dir)
+
+    def _loaded(self):
+        # Скільки рядків довелось прочитати з БД (сторінки кешуються)
+        return sum(len(page) for page in self.model._pages.values())
+
+    def test_rows_fetch_only_needed_pages(self):
+        self.assertEqual(len(self.model), 50)
+        rows = self.model.rows(12, 18)
+        self.assertEqual([t.id for t in rows], list(range(13, 19)))
+        self.assertEqual(sorted(self.model._pages), [1])
+        self.assertEqual([t.id for t in self.model.rows(45, 60)], list(range(46, 51)))
+        self.assertEqual(self._loaded(), 20)
+
+    def test_filters_run_in_database(self):
+        self.model.set_filters(type="expense", categories=["C0"])
+        expected = [t.id for t in self.manager.query(type="Expense", categories=["C0"], order="id")]
+        self.assertEqual(len(self.model), len(expected))
+        self.assertEqual([t.id for t in self.model.rows(0, 100)], expected)
+
+    def test_changes_keep_unaffected_pages(self):
+        self.model.rows(0, 50)
+        added = self.manager.add_transaction("Income", 5, "C1", "2024-02-01", "new")
+        self.assertTrue(self.model.apply_pending())
+        self.assertEqual(len(self.model), 51)
+        self.assertEqual(sorted(self.model._pages), [0, 1, 2, 3, 4])
+        self.assertEqual(self.model.rows(50, 51)[0].id, added.id)
+
+        self.manager.delete_transaction_by_id(25)
+        self.model.apply_pending()
+        self.assertEqual(sorted(self.model._pages), [0, 1])
+        self.assertEqual([t.id for t in self.model.rows(23, 26)], [24, 26, 27])
+        self.assertFalse(self.model.apply_pending())
+
+    def test_changes_outside_filter_are_ignored(self):
+        self.model.set_filters(type="Income", date_from="2024-01-01", date_to="2024-01-31")
+        count = len(self.model)
+        self.model.rows(0, count)
+        self.manager.add_transaction("Expense", 1, "C0", "2024-01-05", "filtered out")
+        self.manager.add_transaction("Income", 1, "C0", "2024-03-05", "out of range")
+        self.assertFalse(self.model.apply_pending())
+        self.assertEqual(len(self.model), count)
+
+    def test_search_pages_and_refresh(self):
+        self.model.set_filters(type="Expense", text="C2")
+        expected = self.manager.search("C2", limit=100, type="Expense")
+        self.assertEqual(len(self.model), len(expected))
+        self.assertEqual([t.id for t in self.model.rows(0, 100)], [t.id for t in expected])
+        self.manager.add_transaction("Expense", 5, "C2", "2024-02-01", "new")
+        self.assertTrue(self.model.apply_pending())
+        self.assertEqual(len(self.model), len(expected) + 1)
+        self.model.set_filters(text="")
+        self.assertEqual(len(self.model), 51)
+
+    def test_descending_date_order(self):
+        model = TransactionListModel(self.manager, page_size=10, order="-date")
+        try:
+            expected = [t.id for t in self.manager.query(order="-date")]
+            self.assertEqual([t.id for t in model.rows(0, 50)], expected)
+            added = self.manager.add_transaction("Income", 5, "C1", "2024-02-01", "latest")
+            model.apply_pending()
+            self.assertEqual(model.rows(0, 1)[0].id, added.id)
+        finally:
+            model.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
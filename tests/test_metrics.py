@@ -0,0 +1,110 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.manager import FinanceManager
+from core.metrics import METRICS, Histogram
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        METRICS.reset()
+        self.manager = FinanceManager(db_path=os.path.join(self.test_dir, "finance.db"),
+                                      log_path=os.path.join(self.test_dir, "log.txt"))
+
+    def tearDown(self):
+        self.manager.close()
+        METRICS.slow_query_threshold = None
+        if METRICS.profiling:
+            METRICS.stop_profiling()
+        METRICS.reset()
+        shutil.rmtree(self.test_dir)
+
+    def test_histogram_buckets_and_quantiles(self):
+        histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+        for value in (0.0005, 0.002, 0.003, 0.05, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 2, 1, 1])
+        self.assertEqual(histogram.quantile(0.5), 0.01)
+        self.assertEqual(histogram.quantile(1.0), 3.0)
+        self.assertEqual(histogram.to_dict()["buckets"], {"0.001": 1, "0.01": 3, "0.1": 4, "+Inf": 5})
+
+    def test_hot_paths_are_timed_and_counted(self):
+        added = self.manager.add_transaction("Income", 10, "Salary", "2024-01-01", "pay")
+        self.manager.add_transaction("Expense", 3, "Food", "2024-01-02", "lunch")
+        self.assertEqual(len(self.manager.get_all_transactions()), 2)
+        self.manager.delete_transaction_by_id(added.id)
+
+        for op in ("save_transaction", "load_transactions", "delete_transactions"):
+            self.assertGreaterEqual(METRICS.histogram("db_operation_seconds", op=op).count, 1, op)
+        self.assertEqual(METRICS.histogram("observer_seconds", observer="Analytics", event="update").count, 2)
+        self.assertEqual(METRICS.histogram("observer_seconds", observer="Logger", event="remove").count, 1)
+        self.assertEqual(METRICS.counter("transactions_built_total", source="input"), 2)
+        # 2 рядки завантажено списком + 1 повернутий DELETE ... RETURNING
+        self.assertEqual(METRICS.counter("db_rows_loaded_total"), 3)
+        self.assertEqual(METRICS.counter("transactions_built_total", source="db"), 3)
+
+    def test_writer_thread_reports_same_operations(self):
+        self.manager.close()
+        self.manager = FinanceManager(db_path=os.path.join(self.test_dir, "finance.db"),
+                                      log_path=os.path.join(self.test_dir, "log.txt"), group_commit=True)
+        METRICS.reset()
+        added = self.manager.add_transaction("Income", 10, "Salary", "2024-01-01", "pay")
+        self.manager.add_transaction_async("Expense", 3, "Food", "2024-01-02", "lunch").result()
+        self.manager.delete_transaction_by_id(added.id)
+        self.assertEqual(METRICS.histogram("db_operation_seconds", op="save_transaction").count, 2)
+        self.assertEqual(METRICS.histogram("db_operation_seconds", op="delete_transactions").count, 1)
+
+    def test_slow_query_log_uses_trace_callback(self):
+        self.manager.add_transactions(("Expense", i, "Food", "2024-01-02", "x") for i in range(1, 50))
+        log_path = os.path.join(self.test_dir, "slow.log")
+        METRICS.slow_query_log = log_path
+        METRICS.slow_query_threshold = 0.0
+        try:
+            self.manager.aggregate("category")
+        finally:
+            METRICS.slow_query_log = None
+        entry = METRICS.slow_queries[-1]
+        self.assertEqual(entry["operation"], "aggregate")
+        self.assertIn("sum(amount_minor)", entry["sql"])
+        with open(log_path, encoding="utf-8") as f:
+            self.assertIn("aggregate", f.read())
+
+        METRICS.slow_query_threshold = None
+        self.manager.count_transactions()
+        self.assertFalse(self.manager.db._tracing)
+
+    def test_prometheus_and_json_output(self):
+        self.manager.add_transaction("Income", 10, "Salary", "2024-01-01", "pay")
+        text = METRICS.to_prometheus()
+        self.assertIn("# TYPE finance_db_operation_seconds histogram", text)
+        self.assertIn('finance_db_operation_seconds_bucket{op="save_transaction",le="+Inf"} 1', text)
+        self.assertIn('finance_transactions_built_total{source="input"} 1', text)
+
+        path = METRICS.write(os.path.join(self.test_dir, "metrics.json"))
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        names = {(h["name"], h["labels"].get("op")) for h in snapshot["histograms"]}
+        self.assertIn(("db_operation_seconds", "save_transaction"), names)
+
+    def test_profiling_toggle(self):
+        self.assertIsNone(METRICS.toggle_profiling())
+        self.assertTrue(METRICS.profiling)
+        self.manager.add_transactions(("Expense", i, "Food", "2024-01-02", "x") for i in range(1, 200))
+        path = os.path.join(self.test_dir, "run.prof")
+        profile = METRICS.toggle_profiling(path)
+        self.assertFalse(METRICS.profiling)
+        self.assertTrue(os.path.exists(path))
+        self.assertIn("save_many", profile["cpu"])
+        self.assertGreater(profile["memory_peak_kib"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import os
+import sys
+import sqlite3
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.manager import FinanceManager
+from core.database import DatabaseHandler, archive_path
+
+
+class TestPartitions(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "finance.db")
+        self.manager = self._open()
+        self.manager.add_transactions(
+            ("Expense" if i % 3 else "Income", i % 7 + 0.25, f"C{i % 4}",
+             f"{2020 + i % 4}-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"row {i} word{i % 5}")
+            for i in range(400))
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.test_dir)
+
+    def _open(self, **options):
+        return FinanceManager(db_path=self.db_path, log_path=os.path.join(self.test_dir, "log.txt"), **options)
+
+    def _reads(self):
+        m = self.manager
+        return {
+            "balance": m.get_balance(),
+            "count": m.count_transactions(),
+            "range": m.count_transactions(date_from="2021-03-01", date_to="2022-06-30"),
+            "aggregate": m.aggregate(("month", "type"), categories=["C1", "C2"]),
+            "date_page": [t.id for t in m.get_page(150, 30, order="date", type="Expense")],
+            "newest_page": [t.id for t in m.get_page(90, 30, order="-date")],
+            "id_page": [t.id for t in m.get_page(120, 30, order="id")],
+            "query": [t.id for t in m.query(date_from="2021-12-01", date_to="2022-01-31")],
+            "after_id": [t.id for t in m.iter_transactions(after_id=200, page_size=7, order="-id")],
+            "after_date": [t.id for t in m.iter_transactions(after_id=200, page_size=7, order="date")],
+            "daily": sorted(m.db.iter_daily_totals()),
+            "search": sorted(t.id for t in m.search("word2", limit=1000)),
+            "count_search": m.count_search("word2", type="Income", date_to="2022-12-31"),
+        }
+
+    def test_reads_are_unchanged_after_archiving(self):
+        before = self._reads()
+        archived = self.manager.archive_years(2022)
+        self.assertEqual([p.year for p in archived], [2020, 2021, 2022])
+        self.assertEqual(sum(p.rows for p in archived), 300)
+        self.assertTrue(all(os.path.exists(archive_path(self.db_path, year)) for year in (2020, 2021, 2022)))
+        self.assertEqual(self.manager.count_transactions(), 400)
+        self.assertEqual(self.manager.db.conn.execute("SELECT count(*) FROM main.transactions").fetchone()[0], 100)
+        self.assertEqual(self._reads(), before)
+        self.assertEqual(self.manager.verify_partitions(), [])
+
+    def test_date_range_prunes_partitions(self):
+        self.manager.archive_years(2022)
+        self.manager.close()
+        self.manager = self._open()
+        self.assertEqual(self.manager.count_transactions(date_from="2023-01-01"), 100)
+        self.assertEqual(list(self.manager.db._attached), [])
+        self.manager.count_transactions(date_from="2021-05-01", date_to="2021-06-01")
+        self.assertEqual(list(self.manager.db._attached), ["archive_2021"])
+
+    def test_archived_years_are_closed_for_writes(self):
+        self.manager.archive_years(2021)
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.manager.add_transaction("Income", 1, "C0", "2020-06-01", "late")
+        with self.assertRaises(ValueError):
+            self.manager.db.archive_year(2021)
+        self.assertEqual(self.manager.archive_years(2021), [])
+        added = self.manager.add_transaction("Income", 1, "C0", "2022-06-01", "open year")
+        newest = next(iter(self.manager.query(date_from="2022-06-01", date_to="2022-06-01", order="-id")))
+        self.assertEqual(newest.id, added.id)
+
+    def test_deleting_archived_rows_fails_loudly(self):
+        self.manager.archive_years(2021)
+        archived = next(iter(self.manager.query(date_to="2020-12-31", order="id")))
+        current = next(iter(self.manager.query(date_from="2022-01-01", order="id")))
+        self.assertLess(current.id, self.manager.db.list_partitions()[0].max_id)
+        with self.assertRaisesRegex(ValueError, "read-only archive 2020"):
+            self.manager.delete_transactions_by_ids([current.id, archived.id])
+        self.assertEqual(self.manager.count_transactions(), 400)
+        self.assertEqual([t.id for t in self.manager.delete_transactions_by_ids([current.id, 10_000])], [current.id])
+
+        self.manager.close()
+        self.manager = self._open(group_commit=True)
+        with self.assertRaisesRegex(ValueError, "read-only archive 2020"):
+            self.manager.delete_transaction_by_id(archived.id)
+        self.assertEqual(self.manager.count_transactions(), 399)
+
+    def test_years_are_archived_oldest_first(self):
+        before = self._reads()
+        with self.assertRaises(ValueError):
+            self.manager.db.archive_year(2021)
+        self.assertFalse(os.path.exists(archive_path(self.db_path, 2021)))
+        self.assertEqual(self.manager.db._refresh_partitions(), [])
+        self.assertEqual(self.manager.count_transactions(date_to="2020-12-31"), 100)
+        self.assertEqual(self._reads(), before)
+        self.assertEqual([p.year for p in self.manager.archive_years(2021)], [2020, 2021])
+
+    def test_read_pool_sees_archives(self):
+        self.manager.close()
+        self.manager = self._open(profile="balanced", readers=2)
+        expected = self.manager.aggregate("year")
+        self.manager.archive_years(2021)
+        self.assertEqual(self.manager.aggregate_async("year").result(), expected)
+
+    def test_writer_thread_reads_more_archives_than_attach_limit(self):
+        # 14 архівів — більше за ліміт SQLite (10 ATTACH на з'єднання)
+        self.manager.add_transactions(("Expense", 1, "C1", f"{year}-06-01", "old") for year in range(2006, 2020))
+        expected = self.manager.rollups.running_balance("year")
+        self.assertEqual(len(self.manager.archive_years(2019)), 14)
+        self.manager.close()
+        self.manager = self._open(group_commit=True)
+        self.assertEqual(self.manager.rollups.running_balance("year"), expected)
+        self.manager.set_budget("C1", 1000)
+        self.assertEqual(self.manager.budget.spent["C1"]["2006-06"], 100)
+        self.assertEqual(self.manager.count_transactions(date_to="2019-12-31"), 14)
+
+    def test_integrity_check_detects_changed_archive(self):
+        self.manager.archive_years(2020)
+        conn = sqlite3.connect(archive_path(self.db_path, 2020))
+        with conn:
+            conn.execute("UPDATE transactions SET amount_minor = amount_minor + 1 WHERE id = (SELECT min(id) FROM transactions)")
+        conn.close()
+        db = DatabaseHandler(self.db_path)
+        try:
+            self.assertEqual(len(db.verify_partitions()), 2)
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import os
+import sys
+import random
+import tempfile
+import shutil
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.manager import FinanceManager
+from core.rollups import Rollups, GRANULARITIES, period_key, period_label
+from core.transaction import INCOME, EXPENSE
+
+CATEGORIES = ["Food", "Rent", "Taxi", "Fun", "Salary"]
+
+
+def recompute(transactions, granularity, type_code):
+    # Еталон: повний перерахунок по всіх транзакціях
+    result = defaultdict(int)
+    for t in transactions:
+        if type_code is None:
+            result[period_key(granularity, t.date)] += t.amount if t.type_code == INCOME else -t.amount
+        elif t.type_code == type_code:
+            result[period_key(granularity, t.date)] += t.amount
+    return dict(result)
+
+
+class TestRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.manager = FinanceManager(db_path=os.path.join(self.test_dir, "test_finance.db"),
+                                      log_path=os.path.join(self.test_dir, "log.txt"))
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.test_dir)
+
+    def _random_rows(self, rng, count):
+        start = date(2022, 11, 20)
+        for _ in range(count):
+            d = start + timedelta(days=rng.randrange(800))
+            yield (rng.choice(["Income", "Expense"]), rng.randrange(1, 5000), rng.choice(CATEGORIES),
+                   d.isoformat(), "random")
+
+    def test_incremental_matches_full_recomputation(self):
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                self.manager.add_transactions(self._random_rows(rng, 60), chunk_size=16)
+                rollups = self.manager.rollups  # далі — лише інкрементальні оновлення
+                for row in self._random_rows(rng, 40):
+                    self.manager.add_transaction(*row)
+                ids = [t.id for t in self.manager.get_all_transactions()]
+                self.manager.delete_transactions_by_ids(rng.sample(ids, 30))
+                self.manager.delete_transaction_by_id(rng.choice(ids))
+
+                remaining = self.manager.get_all_transactions()
+                fresh = Rollups()
+                fresh.load_rows(self.manager.db.iter_daily_totals())
+                for g in GRANULARITIES:
+                    for type_code in (None, INCOME, EXPENSE):
+                        expected = recompute(remaining, g, type_code)
+                        self.assertEqual(rollups.by_period(g, type_code), expected)
+                        self.assertEqual(fresh.by_period(g, type_code), expected)
+                    self.assertEqual(dict(rollups.buckets[g]), dict(fresh.buckets[g]))
+                if remaining:
+                    self.assertEqual(rollups.running_balance("day")[-1][1], self.manager.get_balance())
+                self.manager.delete_transactions_by_ids(t.id for t in remaining)
+                self.assertEqual(rollups.running_balance(), [])
+
+    def test_built_between_commit_and_its_notification(self):
+        self.manager.close()
+        self.manager = FinanceManager(db_path=os.path.join(self.test_dir, "test_finance.db"),
+                                      log_path=os.path.join(self.test_dir, "log.txt"), group_commit=True)
+        # Рядок уже закомічено, але сповіщення про нього ще не почалось: rollups,
+        # побудовані в цей момент, не повинні врахувати його двічі
+        committed, release = threading.Event(), threading.Event()
+        on_commit = self.manager.writer.on_commit
+
+        def delayed(kind, result):
+            committed.set()
+            release.wait(5)
+            on_commit(kind, result)
+
+        self.manager.writer.on_commit = delayed
+        future = self.manager.add_transaction_async("Expense", 10, "Food", "2024-01-01", "")
+        self.assertTrue(committed.wait(5))
+        threading.Timer(0.2, release.set).start()
+        rollups = self.manager.rollups
+        future.result()
+        self.manager.add_transaction("Expense", 5, "Food", "2024-01-01", "")
+        self.assertEqual(rollups.by_period("day", EXPENSE), {period_key("day", date(2024, 1, 1)): 15})
+
+    def test_removed_periods_are_dropped(self):
+        t = self.manager.add_transaction("Expense", 10, "Food", "2024-01-01", "")
+        rollups = self.manager.rollups
+        self.assertEqual(len(rollups.buckets["day"]), 1)
+        self.manager.delete_transaction_by_id(t.id)
+        self.assertEqual(len(rollups.buckets["day"]), 0)
+        self.assertEqual(len(rollups.totals["year"]), 0)
+
+    def test_running_balance_fills_gaps(self):
+        self.manager.add_transaction("Income", 1000, "Salary", "2024-01-05", "")
+        self.manager.add_transaction("Expense", 300, "Rent", "2024-03-01", "")
+        self.assertEqual(self.manager.rollups.running_balance(),
+                         [("2024-01", 1000), ("2024-02", 1000), ("2024-03", 700)])
+        self.assertEqual(self.manager.rollups.running_balance("year"), [("2024", 700)])
+
+    def test_rolling_average_and_month_over_month(self):
+        for month, amount in ((1, 100), (2, 200), (4, 600)):
+            self.manager.add_transaction("Expense", amount, "Food", f"2024-{month:02d}-10", "")
+        rollups = self.manager.rollups
+        self.assertEqual(rollups.rolling_average(months=2),
+                         [("2024-01", 100), ("2024-02", 150), ("2024-03", 100), ("2024-04", 300)])
+        self.assertEqual(rollups.month_over_month(),
+                         [("2024-02", 100), ("2024-03", -200), ("2024-04", 600)])
+
+    def test_weeks_start_on_monday(self):
+        self.manager.add_transaction("Expense", 5, "Taxi", "2024-01-07", "")  # неділя
+        self.manager.add_transaction("Expense", 7, "Taxi", "2024-01-08", "")  # понеділок
+        weeks = self.manager.rollups.by_period("week", EXPENSE, category="Taxi")
+        self.assertEqual({period_label("week", k): v for k, v in weeks.items()},
+                         {"2024-01-01": 5, "2024-01-08": 7})
+
+
+if __name__ == '__main__':
+    unittest.main()
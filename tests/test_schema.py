@@ -0,0 +1,110 @@
+import unittest
+import os
+import sys
+import sqlite3
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.schema import ensure_schema, migrate_to_v2, SCHEMA_VERSION
+from core.manager import FinanceManager
+from core.transaction import to_epoch_day
+from datetime import date
+
+
+def _legacy_db(path, count):
+    # БД старої схеми (amount REAL, date TEXT) з count рядками
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, "
+                 "amount REAL NOT NULL, category TEXT NOT NULL, date TEXT NOT NULL, description TEXT)")
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+    conn.executemany("INSERT INTO transactions (type, amount, category, date, description) VALUES (?, ?, ?, ?, ?)",
+                     [("Expense" if i % 3 else "Income", i + 0.05, f"C{i % 4}", f"2024-{i % 12 + 1:02d}-15", f"row {i}")
+                      for i in range(count)])
+    conn.commit()
+    return conn
+
+
+class TestSchemaMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "finance.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_new_db_created_at_latest_version(self):
+        conn = sqlite3.connect(self.db_path)
+        self.assertFalse(ensure_schema(conn))
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(transactions)")]
+        self.assertEqual(columns, ["id", "type", "amount_minor", "category", "day", "description"])
+        conn.close()
+
+    def test_search_index_backfilled_for_existing_rows(self):
+        conn = _legacy_db(self.db_path, 12)
+        self.assertTrue(ensure_schema(conn, chunk_size=5))
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+        ids = [row[0] for row in conn.execute(
+            "SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH 'C1' ORDER BY rowid")]
+        self.assertEqual(ids, [2, 6, 10])
+        conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('integrity-check')")
+        conn.close()
+
+    def test_chunked_migration_resumes_after_interruption(self):
+        conn = _legacy_db(self.db_path, 25)
+        calls = []
+
+        def interrupt(copied, total):
+            calls.append((copied, total))
+            raise KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            migrate_to_v2(conn, chunk_size=10, progress=interrupt)
+        self.assertEqual(calls, [(10, 25)])
+        self.assertEqual(conn.execute("SELECT count(*) FROM transactions_v2").fetchone()[0], 10)
+
+        progress = []
+        migrate_to_v2(conn, chunk_size=10, progress=lambda copied, total: progress.append(copied))
+        self.assertEqual(progress, [20, 25])
+        self.assertEqual(conn.execute("SELECT count(*) FROM transactions").fetchone()[0], 25)
+        self.assertEqual(conn.execute("SELECT amount_minor, day FROM transactions WHERE id = 3").fetchone(),
+                         (205, to_epoch_day(date(2024, 3, 15))))
+        self.assertIsNone(conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'transactions_v2' OR type = 'trigger'").fetchone())
+        conn.close()
+
+    def test_writes_during_migration_are_mirrored(self):
+        conn = _legacy_db(self.db_path, 20)
+        # Інший процес продовжує писати у стару таблицю між пачками
+        writer = sqlite3.connect(self.db_path)
+
+        def concurrent_writes(copied, total):
+            if copied == 5:
+                with writer:
+                    writer.execute("DELETE FROM transactions WHERE id = 2")
+                    writer.execute("UPDATE transactions SET amount = 99.99 WHERE id = 15")
+                    writer.execute("INSERT INTO transactions (type, amount, category, date, description) "
+                                   "VALUES ('Income', 7.5, 'Gift', '2024-06-01', 'late')")
+        migrate_to_v2(conn, chunk_size=5, progress=concurrent_writes)
+        writer.close()
+        conn.close()
+
+        manager = FinanceManager(db_path=self.db_path, log_path=os.path.join(self.test_dir, "log.txt"))
+        try:
+            transactions = {t.id: t for t in manager.get_all_transactions()}
+            self.assertEqual(len(transactions), 20)
+            self.assertNotIn(2, transactions)
+            self.assertEqual(transactions[15].amount, 99.99)
+            self.assertEqual(transactions[21].description, "late")
+            self.assertEqual(manager.add_transaction("Income", 1, "A", "2024-01-01", "").id, 22)
+            expected = sum(t.amount_minor if t.type_code == 1 else -t.amount_minor
+                           for t in transactions.values()) + 100
+            self.assertEqual(round(manager.get_balance() * 100), expected)
+        finally:
+            manager.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,11 +3,22 @@ import os
 import sys
 import tempfile
 import shutil
+import sqlite3
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from core.manager import FinanceManager
-from core.transaction import TransactionFactory
+from core.importer import import_csv
+from core.observer import Observer, Logger, Analytics
+from core.transaction import TransactionFactory, INCOME, EXPENSE, to_epoch_day
+from core.schema import SCHEMA_VERSION
+from datetime import date
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class TestFinanceManager(unittest.TestCase):
 
@@ -64,6 +75,7 @@ class TestFinanceManager(unittest.TestCase):
         if os.path.exists(log_path):
             os.remove(log_path)
         self.manager.add_transaction("Income", 100, "Gift", "2024-01-01", "New year gift")
+        self.manager.logger.flush()
         with open(log_path, encoding="utf-8") as f:
             self.assertIn("Додано", f.read())
 
@@ -82,7 +94,6 @@ class TestFinanceManager(unittest.TestCase):
         self.assertGreaterEqual(summary["income"], 0)
 
     def test_subject_attach_and_detach(self):
-        from core.observer import Logger
         subject = self.manager.subject
         logger = Logger()
         subject.attach(logger)
@@ -119,5 +130,325 @@ class TestFinanceManager(unittest.TestCase):
     def test_balance_no_transactions(self):
         self.assertEqual(self.manager.get_balance(), 0)
 
+    def test_snapshot_restored_on_restart(self):
+        self.manager.add_transaction("Income", 1000, "Salary", "2024-01-01", "January salary")
+        self.manager.add_transaction("Expense", 250, "Food", "2024-01-15", "Groceries")
+        self.manager.close()
+        self.manager = FinanceManager(db_path=self.db_path)
+        self.assertEqual(self.manager.get_summary(), {"income": 1000, "expense": 250})
+        self.assertEqual(self.manager.analytics.by_category[("Expense", "Food")], 250)
+        self.assertEqual(self.manager.analytics.by_month[("Income", "2024-01")], 1000)
+
+    def test_startup_replays_only_rows_after_snapshot(self):
+        self.manager.add_transaction("Income", 1000, "Salary", "2024-01-01", "January salary")
+        self.manager.close()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO transactions (type, amount_minor, category, day, description) "
+                     "VALUES ('Expense', 4000, 'Taxi', ?, 'external')", (to_epoch_day(date(2024, 2, 3)),))
+        conn.commit()
+        conn.close()
+        self.manager = FinanceManager(db_path=self.db_path)
+        self.assertEqual(self.manager.get_balance(), 960)
+        snapshot, last_id = self.manager.db.load_snapshot()
+        self.assertEqual(last_id, 2)
+        self.assertIn(("month", "Expense", "2024-02", 4000, 1), snapshot)
+
+    def test_snapshot_updated_on_delete(self):
+        t = self.manager.add_transaction("Expense", 100, "Food", "2024-01-01", "Pizza")
+        self.manager.add_transaction("Expense", 30, "Food", "2024-01-02", "Coffee")
+        self.manager.delete_transaction_by_id(t.id)
+        self.manager.close()
+        self.manager = FinanceManager(db_path=self.db_path)
+        self.assertEqual(self.manager.get_summary()["expense"], 30)
+        self.assertEqual(self.manager.analytics.by_category[("Expense", "Food")], 30)
+
+    def test_delete_returns_removed_transaction(self):
+        t = self.manager.add_transaction("Expense", 75, "Cafe", "2024-03-05", "Lunch")
+        removed = self.manager.delete_transaction_by_id(t.id)
+        self.assertEqual(removed.id, t.id)
+        self.assertEqual(removed.amount, 75)
+        self.assertIsNone(self.manager.delete_transaction_by_id(t.id))
+
+    def test_delete_notifies_on_remove_only(self):
+        class Recorder(Observer):
+            def __init__(self):
+                self.added, self.removed = [], []
+
+            def update(self, transaction):
+                self.added.append(transaction.id)
+
+            def on_remove(self, transaction):
+                self.removed.append(transaction.id)
+
+        t1 = self.manager.add_transaction("Income", 100, "Job", "2024-01-01", "Work")
+        self.manager.add_transaction("Income", 200, "Job", "2024-01-02", "Work")
+        recorder = Recorder()
+        self.manager.subject.attach(recorder)
+        self.manager.delete_transaction_by_id(t1.id)
+        self.assertEqual(recorder.added, [])
+        self.assertEqual(recorder.removed, [t1.id])
+        self.assertEqual(self.manager.get_balance(), 200)
+
+    def test_delete_many_transactions(self):
+        ids = [self.manager.add_transaction("Expense", 10, "Food", "2024-01-01", f"#{i}").id
+               for i in range(5)]
+        removed = self.manager.delete_transactions_by_ids(ids[:3] + [9999])
+        self.assertEqual(sorted(t.id for t in removed), ids[:3])
+        self.assertEqual(len(self.manager.get_all_transactions()), 2)
+        self.assertEqual(self.manager.get_summary()["expense"], 20)
+        self.assertEqual(self.manager.analytics.by_category[("Expense", "Food")], 20)
+
+    def test_add_transactions_bulk_assigns_ids(self):
+        rows = [("Income" if i % 2 else "Expense", 10, "Bulk", "2024-01-01", f"row {i}") for i in range(25)]
+        added = self.manager.add_transactions(iter(rows), chunk_size=7)
+        self.assertEqual(added, 25)
+        loaded = self.manager.get_all_transactions()
+        self.assertEqual([t.id for t in loaded], list(range(1, 26)))
+        self.assertEqual(self.manager.get_balance(), 120 - 130)
+        self.manager.close()
+        self.manager = FinanceManager(db_path=self.db_path)
+        self.assertEqual(self.manager.get_summary(), {"income": 120, "expense": 130})
+
+    def test_add_transactions_rolls_back_on_invalid_row(self):
+        rows = [("Income", 10, "Ok", "2024-01-01", ""), ("loan", 5, "Bad", "2024-01-01", "")]
+        with self.assertRaises(ValueError):
+            self.manager.add_transactions(rows, chunk_size=1)
+        self.assertEqual(self.manager.get_all_transactions(), [])
+        self.assertEqual(self.manager.get_balance(), 0)
+
+    def test_failed_import_notifies_nobody(self):
+        class Recorder(Observer):
+            def __init__(self):
+                self.seen = []
+
+            def update(self, transaction):
+                self.seen.append(transaction.id)
+
+        self.manager.close()
+        log_path = os.path.join(self.test_dir, "log.txt")
+        self.manager = FinanceManager(db_path=self.db_path, log_path=log_path)
+        recorder = Recorder()
+        self.manager.subject.attach(recorder)
+        rows = [("Expense", i, "Food", "2024-01-01", f"#{i}") for i in range(1, 6)] + [("loan", 1, "Bad", "2024-01-01", "")]
+        with self.assertRaises(ValueError):
+            self.manager.add_transactions(rows, chunk_size=2)
+        self.assertEqual(recorder.seen, [])
+        self.assertEqual(self.manager.count_transactions(), 0)
+
+        batch = [TransactionFactory.create_transaction("Income", 1, "Ok", "2024-01-01", "") for _ in range(3)]
+        batch[2].category = None
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.manager.db.save_many(batch, chunk_size=2)
+        self.assertEqual([t.id for t in batch], [None, None, None])
+
+        self.manager.add_transactions(rows[:5], chunk_size=2)
+        self.assertEqual(recorder.seen, [1, 2, 3, 4, 5])
+        self.manager.logger.flush()
+        with open(log_path, encoding="utf-8") as f:
+            self.assertEqual(f.read().count("Додано"), 5)
+
+    def test_import_bank_statement_csv(self):
+        csv_path = os.path.join(self.test_dir, "statement.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("Дата;Сума;Категорія;Опис\n")
+            f.write("01.02.2024;-1 250,50;Food;Market\n")
+            f.write("03.02.2024;20000;Salary;February\n")
+        stats = import_csv(self.manager, csv_path, delimiter=";", date_format="%d.%m.%Y",
+                           columns={"date": "Дата", "amount": "Сума",
+                                    "category": "Категорія", "description": "Опис"})
+        self.assertEqual(stats["rows"], 2)
+        self.assertGreater(stats["rows_per_sec"], 0)
+        self.assertAlmostEqual(self.manager.get_summary()["expense"], 1250.5)
+        self.assertEqual(self.manager.get_summary()["income"], 20000)
+
+    def test_iter_transactions_pages_by_id(self):
+        self.manager.add_transactions(
+            [("Expense", i, "Food", "2024-01-01", f"#{i}") for i in range(1, 12)], chunk_size=5)
+        ids = [t.id for t in self.manager.iter_transactions(page_size=3)]
+        self.assertEqual(ids, list(range(1, 12)))
+        ids = [t.id for t in self.manager.iter_transactions(after_id=8, page_size=2)]
+        self.assertEqual(ids, [9, 10, 11])
+        ids = [t.id for t in self.manager.iter_transactions(after_id=4, page_size=2, order="-id")]
+        self.assertEqual(ids, [3, 2, 1])
+
+    def test_iter_transactions_pages_by_date(self):
+        dates = ["2024-03-01", "2024-01-01", "2024-02-01", "2024-01-01", "2024-02-15"]
+        for d in dates:
+            self.manager.add_transaction("Income", 1, "Job", d, d)
+        result = [(str(t.date.date()), t.id) for t in self.manager.iter_transactions(page_size=2, order="date")]
+        self.assertEqual(result, sorted(result))
+        self.assertEqual(len(result), 5)
+        newest_first = [t.id for t in self.manager.iter_transactions(page_size=2, order="-date")]
+        self.assertEqual(newest_first, [1, 5, 3, 4, 2])
+        self.assertEqual([t.id for t in self.manager.iter_transactions(after_id=3, order="date")], [5, 1])
+
+        cursor = next(iter(self.manager.iter_transactions(after_id=4, order="date")))
+        self.manager.delete_transaction_by_id(cursor.id)
+        with self.assertRaises(ValueError):
+            self.manager.iter_transactions(after_id=cursor.id, order="date")
+        resumed = self.manager.iter_transactions(after_id=cursor.id, after_date=cursor.date, order="date")
+        self.assertEqual([t.id for t in resumed], [5, 1])
+
+    def test_iter_transactions_unknown_order(self):
+        with self.assertRaises(ValueError):
+            list(self.manager.iter_transactions(order="amount"))
+
+    def _add_sample_ledger(self):
+        self.manager.add_transactions([
+            ("Income", 1000, "Salary", "2024-01-05", "Jan"),
+            ("Expense", 200, "Food", "2024-01-10", "Market"),
+            ("Expense", 50, "Taxi", "2024-01-20", "Ride"),
+            ("Income", 1100, "Salary", "2024-02-05", "Feb"),
+            ("Expense", 300, "Food", "2024-02-11", "Market"),
+            ("Expense", 80, "Fun", "2024-03-01", "Cinema"),
+        ])
+
+    def test_query_filters_in_sql(self):
+        self._add_sample_ledger()
+        expenses = list(self.manager.query(type="expense"))
+        self.assertEqual([t.amount for t in expenses], [200, 50, 300, 80])
+        february = list(self.manager.query(date_from="2024-02-01", date_to="2024-02-29"))
+        self.assertEqual([t.description for t in february], ["Feb", "Market"])
+        food_taxi = list(self.manager.query(type="Expense", categories=["Food", "Taxi"], date_to="2024-01-31"))
+        self.assertEqual([t.category for t in food_taxi], ["Food", "Taxi"])
+
+    def test_aggregate_group_by(self):
+        self._add_sample_ledger()
+        self.assertEqual(self.manager.aggregate("category", type="Expense"),
+                         {"Food": 500, "Fun": 80, "Taxi": 50})
+        self.assertEqual(self.manager.aggregate("month", type="Expense"),
+                         {"2024-01": 250, "2024-02": 300, "2024-03": 80})
+        self.assertEqual(self.manager.aggregate("type"), {"Expense": 630, "Income": 2100})
+        self.assertEqual(self.manager.aggregate(("month", "type"), date_from="2024-02-01")[("2024-02", "Income")], 1100)
+        with self.assertRaises(ValueError):
+            self.manager.aggregate("amount")
+
+    def test_migration_converts_existing_db(self):
+        old_path = os.path.join(self.test_dir, "old.db")
+        conn = sqlite3.connect(old_path)
+        conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, "
+                     "amount REAL NOT NULL, category TEXT NOT NULL, date TEXT NOT NULL, description TEXT)")
+        conn.execute("INSERT INTO transactions (type, amount, category, date, description) "
+                     "VALUES ('Expense', 15.29, 'Food', '2023-12-31', 'old row')")
+        conn.commit()
+        conn.close()
+        manager = FinanceManager(db_path=old_path)
+        try:
+            conn = manager.db.conn
+            self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+            indexes = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'transactions'")}
+            self.assertTrue({"idx_transactions_type_day", "idx_transactions_category_day"} <= indexes)
+            plan = " ".join(str(row) for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE type = 'Expense' AND day >= 19723"))
+            self.assertIn("idx_transactions_type_day", plan)
+            self.assertEqual(conn.execute("SELECT amount_minor, day FROM transactions").fetchone(),
+                             (1529, to_epoch_day(date(2023, 12, 31))))
+            t, = manager.get_all_transactions()
+            self.assertEqual((t.amount, t.date.date()), (15.29, date(2023, 12, 31)))
+            self.assertEqual(manager.aggregate("category"), {"Food": 15.29})
+            self.assertEqual(manager.get_summary()["expense"], 15.29)
+            self.assertEqual(manager.db.get_snapshot_last_id(), 1)
+        finally:
+            manager.close()
+
+    def test_amounts_summed_in_minor_units(self):
+        for _ in range(10):
+            self.manager.add_transaction("Expense", 0.1, "Food", "2024-01-01", "Gum")
+        self.assertEqual(self.manager.get_summary()["expense"], 1.0)
+        self.assertEqual(self.manager.aggregate("month"), {"2024-01": 1.0})
+        self.assertEqual(self.manager.db.conn.execute("SELECT sum(amount_minor) FROM transactions").fetchone()[0], 100)
+
+    def test_search_descriptions_and_categories(self):
+        pizza = self.manager.add_transaction("Expense", 100, "Food", "2024-01-01", "Піца")
+        self.manager.add_transaction("Expense", 30, "Cafe", "2024-01-02", "Кава і піца з друзями")
+        self.manager.add_transaction("Income", 1000, "Salary", "2024-01-03", "Зарплата")
+        self.manager.add_transactions([("Expense", 5, "Food", "2024-02-01", "Хліб")])
+
+        # bm25: коротший опис з тим самим словом релевантніший
+        self.assertEqual([t.id for t in self.manager.search("піца")], [pizza.id, 2])
+        self.assertEqual([t.id for t in self.manager.search("ПІЦА друзями")], [2])
+        self.assertEqual([t.description for t in self.manager.search("food", date_from="2024-02-01")], ["Хліб"])
+        self.assertEqual([t.description for t in self.manager.search("зарп*")], ["Зарплата"])
+        self.assertEqual(self.manager.search("піца OR \"хліб\""), [])
+        self.assertEqual(self.manager.search("  "), [])
+        self.assertEqual(self.manager.count_search("піца"), 2)
+        self.assertEqual(len(self.manager.search("піца", limit=1)) + len(self.manager.search("піца", limit=1, offset=1)), 2)
+
+        self.manager.delete_transaction_by_id(pizza.id)
+        self.assertEqual([t.description for t in self.manager.search("піца")], ["Кава і піца з друзями"])
+        self.assertEqual(self.manager.count_search("food", type="Expense"), 1)
+
+    def test_transaction_slots_and_type_code(self):
+        t = TransactionFactory.create_transaction("Expense", 20, "Test", "2024-01-01", "Test")
+        self.assertEqual(t.type_code, EXPENSE)
+        self.assertEqual(TransactionFactory.create_transaction("income", 1, "A", "2024-01-01", "").type_code, INCOME)
+        self.assertFalse(hasattr(t, "__dict__"))
+        with self.assertRaises(ValueError):
+            TransactionFactory.create_transaction("Expense", 20, "Test", "2024-13-01", "Bad month")
+
+    @unittest.skipUnless(numpy, "numpy не встановлено")
+
+    def test_transaction_frame_matches_sql_aggregates(self):
+        self._add_sample_ledger()
+        frame = self.manager.get_frame()
+        self.assertEqual(len(frame), 6)
+        self.assertEqual(frame.balance(), self.manager.get_balance())
+        self.assertEqual(frame.sum_by_category(EXPENSE), self.manager.aggregate("category", type="Expense"))
+        self.assertEqual(frame.sum_by_month(INCOME), {"2024-01": 1000, "2024-02": 1100})
+        self.assertEqual(len(self.manager.get_frame(type="Income", date_from="2024-02-01")), 1)
+        self.assertEqual(self.manager.get_frame(categories=[]).sum_by_category(), {})
+
+    @unittest.skipUnless(numpy, "numpy не встановлено")
+
+    def test_analytics_rebuild_from_frame(self):
+        self._add_sample_ledger()
+        rebuilt = Analytics()
+        rebuilt.load_frame(self.manager.get_frame())
+        self.assertEqual(rebuilt.summary(), self.manager.get_summary())
+        self.assertEqual(dict(rebuilt.by_month), dict(self.manager.analytics.by_month))
+        self.assertEqual(dict(rebuilt.by_category), dict(self.manager.analytics.by_category))
+
+    def _read_log(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_logger_custom_path_flushed_on_close(self):
+        log_path = os.path.join(self.test_dir, "logs", "finance.log")
+        manager = FinanceManager(db_path=os.path.join(self.test_dir, "other.db"), log_path=log_path)
+        manager.add_transaction("Income", 100, "Gift", "2024-01-01", "Async")
+        t = manager.add_transaction("Expense", 5, "Food", "2024-01-02", "Tea")
+        manager.delete_transaction_by_id(t.id)
+        manager.close()
+        lines = self._read_log(log_path).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[2].startswith("[LOG] Видалено: #2"))
+
+    def test_logger_skips_replayed_rows(self):
+        log_path = os.path.join(self.test_dir, "replay.log")
+        db_path = os.path.join(self.test_dir, "replay.db")
+        manager = FinanceManager(db_path=db_path, log_path=log_path)
+        manager.add_transaction("Income", 100, "Gift", "2024-01-01", "Once")
+        manager.db.conn.execute("UPDATE meta SET value = 0 WHERE key = 'snapshot_last_id'")
+        manager.db.conn.execute("DELETE FROM aggregates")
+        manager.db.conn.commit()
+        manager.close()
+        manager = FinanceManager(db_path=db_path, log_path=log_path)
+        self.assertEqual(manager.get_balance(), 100)
+        manager.close()
+        self.assertEqual(len(self._read_log(log_path).splitlines()), 1)
+
+    def test_logger_rotates_by_size(self):
+        log_path = os.path.join(self.test_dir, "rotate.log")
+        logger = Logger(log_path, max_bytes=200, backup_count=2, batch_size=1)
+        for i in range(12):
+            logger.update(TransactionFactory.create_transaction("Income", i, "Rotate", "2024-01-01", "x" * 20))
+        logger.close()
+        self.assertTrue(os.path.exists(log_path + ".1"))
+        self.assertTrue(os.path.exists(log_path + ".2"))
+        self.assertFalse(os.path.exists(log_path + ".3"))
+        self.assertLessEqual(os.path.getsize(log_path), 200)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,193 @@
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+import threading
+import asyncio
+import sqlite3
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.database import DatabaseHandler
+from core.connections import ConnectionManager
+from core.manager import FinanceManager
+from core.transaction import TransactionFactory
+from core.writer import GroupCommitWriter
+
+
+class TestConnectionProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_profiles_set_pragmas(self):
+        expected = {"safe": ("delete", 2), "balanced": ("wal", 1), "bulk": ("wal", 0)}
+        for profile, (journal, synchronous) in expected.items():
+            with self.subTest(profile=profile):
+                db = DatabaseHandler(os.path.join(self.test_dir, f"{profile}.db"), profile=profile)
+                try:
+                    self.assertEqual(db.conn.execute("PRAGMA journal_mode").fetchone()[0], journal)
+                    self.assertEqual(db.conn.execute("PRAGMA synchronous").fetchone()[0], synchronous)
+                finally:
+                    db.close()
+
+    def test_default_profile_keeps_wal_of_open_database(self):
+        path = os.path.join(self.test_dir, "shared.db")
+        gui = DatabaseHandler(path, profile="balanced")
+        try:
+            gui.save_transaction(TransactionFactory.create_transaction("Income", 10, "Job", "2024-01-01", ""))
+            cli = DatabaseHandler(path)
+            try:
+                self.assertEqual(cli.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+                self.assertEqual(cli.count_transactions(), 1)
+            finally:
+                cli.close()
+            gui.save_transaction(TransactionFactory.create_transaction("Income", 5, "Job", "2024-01-02", ""))
+            self.assertEqual(gui.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        finally:
+            gui.close()
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            DatabaseHandler(os.path.join(self.test_dir, "x.db"), profile="turbo")
+
+
+class TestGroupCommit(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "test_finance.db")
+        self.manager = FinanceManager(db_path=self.db_path, log_path=os.path.join(self.test_dir, "log.txt"),
+                                      profile="balanced", group_commit=True, commit_window=0.01)
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_future_resolves_after_commit_with_observers_notified(self):
+        future = self.manager.add_transaction_async("Income", 100, "Job", "2024-01-01", "async")
+        t = future.result(timeout=5)
+        self.assertIsNotNone(t.id)
+        self.assertEqual(self.manager.get_balance(), 100)
+        self.assertEqual([x.id for x in self.manager.get_all_transactions()], [t.id])
+
+    def test_concurrent_writes_share_commits(self):
+        def worker(n):
+            for i in range(25):
+                self.manager.add_transaction("Expense", 1, "Food", "2024-01-01", f"{n}-{i}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.manager.writer.operations, 100)
+        self.assertLess(self.manager.writer.commits, 100)
+        self.assertEqual(self.manager.get_summary()["expense"], 100)
+        self.assertEqual(len(self.manager.get_all_transactions()), 100)
+
+    def test_delete_through_writer(self):
+        t = self.manager.add_transaction("Expense", 40, "Food", "2024-01-01", "")
+        self.assertEqual(self.manager.delete_transaction_by_id(t.id).id, t.id)
+        self.assertEqual(self.manager.get_balance(), 0)
+        self.manager.close()
+        self.manager = FinanceManager(db_path=self.db_path, log_path=os.path.join(self.test_dir, "log.txt"))
+        self.assertEqual(self.manager.get_all_transactions(), [])
+        self.assertEqual(self.manager.get_balance(), 0)
+
+    def test_failed_operation_does_not_abort_group(self):
+        def broken(db):
+            db.conn.execute("INSERT INTO transactions (type) VALUES ('Income')")  # NOT NULL
+
+        writer = GroupCommitWriter(self.db_path, window=0.05)
+        try:
+            bad = writer.submit("custom", broken)
+            good = writer.save(TransactionFactory.create_transaction("Income", 5, "A", "2024-01-01", ""))
+            with self.assertRaises(Exception):
+                bad.result(timeout=5)
+            self.assertIsNotNone(good.result(timeout=5).id)
+        finally:
+            writer.close()
+        with self.assertRaises(RuntimeError):
+            writer.save(None)
+
+
+class TestConnectionManager(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "test_finance.db")
+        self.manager = FinanceManager(db_path=self.db_path, log_path=os.path.join(self.test_dir, "log.txt"),
+                                      profile="balanced", readers=3)
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_requires_wal_profile(self):
+        with self.assertRaises(ValueError):
+            ConnectionManager(self.db_path, profile="safe")
+
+    def test_async_reads_run_in_pool(self):
+        self.manager.add_transaction("Income", 100, "Job", "2024-01-01", "")
+        self.manager.add_transaction("Expense", 30, "Food", "2024-01-02", "")
+        thread_name = self.manager.submit_read(lambda db: threading.current_thread().name).result(timeout=5)
+        self.assertTrue(thread_name.startswith("finance-reader"))
+        self.assertEqual([t.amount for t in self.manager.query_async(type="Expense").result(timeout=5)], [30])
+        self.assertEqual(self.manager.aggregate_async("type").result(timeout=5), {"Expense": 30, "Income": 100})
+
+    def test_readers_are_read_only(self):
+        future = self.manager.submit_read(lambda db: db.conn.execute("DELETE FROM transactions"))
+        with self.assertRaises(sqlite3.OperationalError):
+            future.result(timeout=5)
+
+    def test_reads_concurrent_with_writes(self):
+        stop = threading.Event()
+        errors = []
+
+        def write():
+            for i in range(50):
+                self.manager.add_transaction("Expense", 1, "Food", "2024-01-01", str(i))
+            stop.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        counts = []
+        while not stop.is_set():
+            try:
+                counts.append(self.manager.submit_read(
+                    lambda db: db.conn.execute("SELECT count(*) FROM transactions").fetchone()[0]).result(timeout=5))
+            except Exception as e:
+                errors.append(e)
+                break
+        writer.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(counts, sorted(counts))
+        self.assertEqual(len(self.manager.query_async().result(timeout=5)), 50)
+
+    def test_asyncio_friendly(self):
+        self.manager.add_transaction("Income", 10, "Job", "2024-01-01", "")
+
+        async def main():
+            return await asyncio.wrap_future(self.manager.aggregate_async("category"))
+
+        self.assertEqual(asyncio.run(main()), {"Job": 10})
+
+    def test_sync_manager_returns_completed_futures(self):
+        manager = FinanceManager(db_path=os.path.join(self.test_dir, "sync.db"),
+                                 log_path=os.path.join(self.test_dir, "log.txt"))
+        try:
+            manager.add_transaction("Income", 10, "Job", "2024-01-01", "")
+            future = manager.query_async()
+            self.assertTrue(future.done())
+            self.assertEqual(len(future.result()), 1)
+        finally:
+            manager.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
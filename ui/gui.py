@@ -2,13 +2,31 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
 import os
-
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from collections import defaultdict
+import time
+from collections import deque
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from core.manager import FinanceManager
+from core.metrics import METRICS
+from core.observer import Observer
+from charts.chart import ChartService, CHART_KINDS
+from ui.transaction_list import TransactionListView
+
+
+class BudgetBanner(Observer):
+    # Сповіщення бюджету можуть прийти з потоку запису — лише черга,
+    # а напис оновлює головний потік у update_display
+    def __init__(self):
+        self.pending = deque()
+
+    def update(self, transaction):
+        pass
+
+    def on_replay(self, transaction):
+        pass
+
+    def on_alert(self, alert):
+        self.pending.append(alert)
 
 
 class FinanceApp:
@@ -16,8 +34,13 @@ class FinanceApp:
         self.root = root
         self.root.title("💰 Фінансовий трекер")
         self.root.state('zoomed')
-        self.manager = FinanceManager()
+        # WAL + окремий потік запису + пул читання: запити не блокують головний потік Tk
+        self.manager = FinanceManager(profile="balanced", readers=2)
+        self.chart_service = None  # matplotlib завантажується з першим графіком
         self.chart_canvas = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # F9 вмикає/зупиняє профілювання (cProfile + tracemalloc) під час роботи
+        self.root.bind("<F9>", lambda e: self.toggle_profiling())
 
         # 🎨 Стилізація
         self.style = ttk.Style()
@@ -43,8 +66,13 @@ class FinanceApp:
         root.columnconfigure(1, weight=2)
         root.rowconfigure(0, weight=1)
 
+        self.budget_banner = BudgetBanner()
+        self.manager.subject.attach(self.budget_banner)
+
         self.build_right_ui()
         self.build_left_ui()
+        self._show_budget_status()
+        self.apply_filter()
         self.update_display()
 
     def build_right_ui(self):
@@ -80,8 +108,14 @@ class FinanceApp:
         self.delete_button = ttk.Button(self.right_frame, text="🗑️ Видалити вибране", command=self.delete_selected_transaction)
         self.delete_button.grid(row=6, column=0, columnspan=2, pady=5, padx=5, sticky="we")
 
-        self.chart_button = ttk.Button(self.right_frame, text="📊 Графік витрат у вікні", command=self.render_expense_chart_in_gui)
-        self.chart_button.grid(row=7, column=0, columnspan=2, pady=5, padx=5, sticky="we")
+        self.chart_kind_var = tk.StringVar()
+        self.chart_kind_combobox = ttk.Combobox(self.right_frame, textvariable=self.chart_kind_var,
+                                                values=list(CHART_KINDS.values()), state="readonly")
+        self.chart_kind_combobox.grid(row=7, column=0, sticky="we", padx=5, pady=5)
+        self.chart_kind_combobox.set(CHART_KINDS["expense_pie"])
+
+        self.chart_button = ttk.Button(self.right_frame, text="📊 Графік у вікні", command=self.render_chart_in_gui)
+        self.chart_button.grid(row=7, column=1, pady=5, padx=5, sticky="we")
 
         self.balance_label = ttk.Label(self.right_frame, text="Баланс: 0 грн", font=("Segoe UI", 11, "bold"))
         self.balance_label.grid(row=8, column=0, columnspan=2, pady=10)
@@ -92,18 +126,26 @@ class FinanceApp:
                                             values=["Всі", "Income", "Expense"], state="readonly")
         self.filter_combobox.grid(row=9, column=1, sticky="we", padx=5, pady=2)
         self.filter_combobox.set("Всі")
-        self.filter_combobox.bind("<<ComboboxSelected>>", lambda e: self.update_display())
+        self.filter_combobox.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+
+        ttk.Label(self.right_frame, text="Пошук:").grid(row=10, column=0, sticky="w", padx=5, pady=2)
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(self.right_frame, textvariable=self.search_var)
+        self.search_entry.grid(row=10, column=1, sticky="we", padx=5, pady=2)
+        self.search_entry.bind("<Return>", lambda e: self.apply_filter())
+        self.search_button = ttk.Button(self.right_frame, text="🔍 Знайти", command=self.apply_filter)
+        self.search_button.grid(row=11, column=0, columnspan=2, pady=5, padx=5, sticky="we")
+
+        self.budget_label = ttk.Label(self.right_frame, text="", foreground="#c0392b", wraplength=360)
+        self.budget_label.grid(row=12, column=0, columnspan=2, pady=5, padx=5, sticky="we")
 
     def build_left_ui(self):
         self.left_frame.rowconfigure(0, weight=1)
         self.left_frame.columnconfigure(0, weight=1)
 
-        self.transactions_text = tk.Text(self.left_frame, wrap=tk.WORD, font=("Consolas", 10), bg="white", fg="#2d3436")
-        self.transactions_text.grid(row=0, column=0, sticky="nsew")
-
-        scrollbar = ttk.Scrollbar(self.left_frame, command=self.transactions_text.yview)
-        scrollbar.grid(row=0, column=1, sticky="ns")
-        self.transactions_text.config(yscrollcommand=scrollbar.set)
+        # Показує лише видиме вікно рядків; сторінки дочитуються з БД під час прокрутки
+        self.transactions_list = TransactionListView(self.left_frame, self.manager)
+        self.transactions_list.grid(row=0, column=0, columnspan=2, sticky="nsew")
 
     def add_transaction(self):
         try:
@@ -112,44 +154,75 @@ class FinanceApp:
             category = self.category_entry.get()
             date = self.date_entry.get()
             description = self.description_entry.get()
-            self.manager.add_transaction(t_type, amount, category, date, description)
-            messagebox.showinfo("Успіх", "Транзакцію додано!")
-            self.clear_inputs()
-            self.update_display()
+            future = self.manager.add_transaction_async(t_type, amount, category, date, description)
         except Exception as e:
             messagebox.showerror("Помилка", str(e))
+            return
+        self._when_done(future, self._on_transaction_added)
+
+    def _on_transaction_added(self, future):
+        try:
+            future.result()
+        except Exception as e:
+            messagebox.showerror("Помилка", str(e))
+            return
+        messagebox.showinfo("Успіх", "Транзакцію додано!")
+        self.clear_inputs()
+        self.update_display()
 
     def delete_selected_transaction(self):
         try:
-            selection = self.transactions_text.get(tk.SEL_FIRST, tk.SEL_LAST)
-            if not selection.strip().startswith("#"):
-                messagebox.showwarning("Увага", "Виділіть рядок з транзакцією (починається з #ID).")
+            ids = self.transactions_list.selected_ids()
+            if not ids:
+                messagebox.showwarning("Увага", "Виберіть транзакції у списку.")
                 return
-            transaction_id = int(selection.strip().split()[0][1:])
-            if messagebox.askyesno("Підтвердження", f"Видалити транзакцію #{transaction_id}?"):
-                self.manager.delete_transaction_by_id(transaction_id)
-                messagebox.showinfo("Успішно", "Транзакцію видалено.")
+            label = ", ".join(f"#{i}" for i in ids)
+            if messagebox.askyesno("Підтвердження", f"Видалити транзакції {label}?"):
+                if self.manager.delete_transactions_by_ids(ids):
+                    messagebox.showinfo("Успішно", "Транзакцію видалено.")
+                else:
+                    messagebox.showwarning("Увага", "Транзакції не знайдено.")
                 self.update_display()
         except Exception as e:
             messagebox.showerror("Помилка", f"Не вдалося видалити: {e}")
 
-    def render_expense_chart_in_gui(self):
-        transactions = self.manager.get_all_transactions()
-        data = defaultdict(float)
-        for t in transactions:
-            if t.get_type().lower() == "expense":
-                data[t.category] += t.amount
-        if not data:
-            messagebox.showinfo("Інфо", "Немає витрат для побудови графіку.")
+    def _when_done(self, future, callback):
+        # Tk не потокобезпечний: результат фонової задачі забираємо опитуванням з головного потоку
+        if future.done():
+            callback(future)
+        else:
+            self.root.after(20, self._when_done, future, callback)
+
+    def render_chart_in_gui(self):
+        kind = next(k for k, title in CHART_KINDS.items() if title == self.chart_kind_var.get())
+        if self.chart_service is None:
+            self.chart_service = ChartService(self.manager)
+        self._when_done(self.chart_service.data.prepare(kind), lambda future: self._draw_chart(kind, future))
+
+    def _draw_chart(self, kind, future):
+        try:
+            future.result()
+        except Exception as e:
+            messagebox.showerror("Помилка", f"Не вдалося побудувати графік: {e}")
             return
-        if self.chart_canvas:
-            self.chart_canvas.get_tk_widget().destroy()
-        fig, ax = plt.subplots(figsize=(5, 5))
-        ax.pie(data.values(), labels=data.keys(), autopct='%1.1f%%', startangle=140)
-        ax.set_title("Витрати по категоріях")
-        self.chart_canvas = FigureCanvasTkAgg(fig, master=self.left_frame)
-        self.chart_canvas.draw()
-        self.chart_canvas.get_tk_widget().grid(row=1, column=0, columnspan=2, pady=10, sticky="nsew")
+        if not self.chart_service.render(kind):
+            messagebox.showinfo("Інфо", "Немає даних для побудови графіку.")
+            return
+        if self.chart_canvas is None:
+            # Полотно створюється один раз і далі лише перемальовується
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.chart_canvas = FigureCanvasTkAgg(self.chart_service.figure, master=self.left_frame)
+            self.chart_canvas.get_tk_widget().grid(row=1, column=0, columnspan=2, pady=10, sticky="nsew")
+        self.chart_canvas.draw_idle()
+
+    def render_expense_chart_in_gui(self):
+        self.chart_kind_combobox.set(CHART_KINDS["expense_pie"])
+        self.render_chart_in_gui()
+
+    def on_close(self):
+        # Дописуємо журнал і закриваємо БД перед виходом
+        self.manager.close()
+        self.root.destroy()
 
     def clear_inputs(self):
         self.amount_entry.delete(0, tk.END)
@@ -157,13 +230,45 @@ class FinanceApp:
         self.date_entry.delete(0, tk.END)
         self.description_entry.delete(0, tk.END)
 
-    def update_display(self):
-        self.transactions_text.delete("1.0", tk.END)
-        transactions = self.manager.get_all_transactions()
+    def apply_filter(self):
+        # Фільтр і пошук виконує SQLite (індекси за типом/датою, FTS5), список лише показує результат
         filter_type = self.filter_var.get()
-        for t in transactions:
-            if filter_type == "Всі" or t.get_type().lower() == filter_type.lower():
-                self.transactions_text.insert(tk.END, str(t) + "\n")
+        self.transactions_list.set_filters(type=None if filter_type == "Всі" else filter_type,
+                                           text=self.search_var.get())
+
+    def update_display(self):
+        # Додавання/видалення вже надійшли в модель списку як сповіщення — змінюються лише ці рядки
+        with METRICS.timer("gui_refresh_seconds", stage="update_display"):
+            self.transactions_list.refresh()
+            self._update_balance()
+            self._update_budget_banner()
+
+    def toggle_profiling(self):
+        # Після зупинки профіль і знімок метрик зберігаються поруч із БД
+        directory = os.path.dirname(os.path.abspath(self.manager.db.db_path))
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        profile = METRICS.toggle_profiling(os.path.join(directory, f"profile-{stamp}.prof"))
+        if profile is None:
+            messagebox.showinfo("Профілювання", "Профілювання ввімкнено. F9 — зупинити і зберегти.")
+            return
+        path = METRICS.write(os.path.join(directory, f"metrics-{stamp}.json"))
+        messagebox.showinfo("Профілювання", f"Збережено:\nprofile-{stamp}.prof\n{os.path.basename(path)}")
+
+    def _show_budget_status(self):
+        # При запуску — категорії, що вже перетнули поріг у поточному місяці
+        month = time.strftime("%Y-%m")
+        over = [f"{category} ({level:.0%})" for category, level in self.manager.budget.alerts(month).items()]
+        if over:
+            self.budget_label.config(text="⚠️ Бюджет: " + ", ".join(sorted(over)))
+
+    def _update_budget_banner(self):
+        alert = None
+        while self.budget_banner.pending:
+            alert = self.budget_banner.pending.popleft()
+        if alert is not None:
+            self.budget_label.config(text=f"⚠️ {alert}" if alert.rising else "")
+
+    def _update_balance(self):
         balance = self.manager.get_balance()
         summary = self.manager.get_summary()
         self.balance_label.config(
@@ -0,0 +1,127 @@
+from collections import deque
+
+from core.observer import Observer
+from core.transaction import to_epoch_day
+
+
+class TransactionListModel(Observer):
+    # Дані для віртуалізованого списку: кількість рядків за фільтром і кеш сторінок.
+    # У віджет потрапляє лише видиме вікно; сторінки читаються з SQLite на вимогу.
+    # Додавання/видалення приходять як сповіщення (можливо, з потоку запису) і
+    # застосовуються в головному потоці через apply_pending().
+    # За замовчуванням — новіші зверху: (day, id) збігається з індексами за датою,
+    # тож OFFSET проходить по індексу без сортування.
+    def __init__(self, manager, page_size=100, order="-date", search_limit=10000):
+        self.manager = manager
+        self.page_size = page_size
+        self.search_limit = search_limit  # скільки результатів пошуку можна прогорнути
+        self.order = order
+        self.filters = {}
+        self.text = None         # рядок пошуку (FTS5); тоді порядок — за релевантністю
+        self.count = 0
+        self._pages = {}         # номер сторінки -> список транзакцій
+        self._pending = deque()  # (+1 | -1, транзакція)
+        self._descending = order.startswith("-")
+        self._by_date = order.lstrip("-") == "date"
+        manager.subject.attach(self)
+        self.reset()
+
+    def close(self):
+        self.manager.subject.detach(self)
+
+    # ==== Observer: лише черга, без звернень до БД і Tk ====
+    def update(self, transaction):
+        self._pending.append((1, transaction))
+
+    def update_many(self, transactions):
+        self._pending.extend((1, t) for t in transactions)
+
+    def on_remove(self, transaction):
+        self._pending.append((-1, transaction))
+
+    def on_replay(self, transaction):
+        pass
+
+    # ==== Фільтри ====
+    def set_filters(self, type=None, date_from=None, date_to=None, categories=None, text=None):
+        # Фільтрує SQLite; модель лише перераховує рядки й скидає кеш
+        self.filters = {"type": type, "date_from": date_from, "date_to": date_to,
+                        "categories": None if categories is None else list(categories)}
+        self.text = text.strip() if text and text.strip() else None
+        self.reset()
+
+    def reset(self):
+        self._pending.clear()
+        self._pages.clear()
+        if self.text is not None:
+            self.count = self.manager.count_search(self.text, limit=self.search_limit, **self.filters)
+        else:
+            self.count = self.manager.count_transactions(**self.filters)
+
+    def matches(self, transaction):
+        # Та сама умова, що й _build_filters у БД, — для змін, які ще не перечитані
+        f = self.filters
+        if f.get("type") is not None and transaction.get_type() != f["type"].capitalize():
+            return False
+        if f.get("date_from") is not None and transaction.day < to_epoch_day(f["date_from"]):
+            return False
+        if f.get("date_to") is not None and transaction.day > to_epoch_day(f["date_to"]):
+            return False
+        if f.get("categories") is not None and transaction.category not in f["categories"]:
+            return False
+        return True
+
+    # ==== Дані для вікна ====
+    def __len__(self):
+        return self.count
+
+    def rows(self, start, stop):
+        start, stop = max(start, 0), min(stop, self.count)
+        if start >= stop:
+            return []
+        first, last = start // self.page_size, (stop - 1) // self.page_size
+        result = []
+        for number in range(first, last + 1):
+            result.extend(self._page(number))
+        offset = first * self.page_size
+        return result[start - offset:stop - offset]
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is None:
+            offset = number * self.page_size
+            if self.text is not None:
+                page = self.manager.search(self.text, limit=self.page_size, offset=offset, **self.filters)
+            else:
+                page = self.manager.get_page(offset, self.page_size, order=self.order, **self.filters)
+            self._pages[number] = page
+        return page
+
+    def _sort_key(self, transaction):
+        return (transaction.day, transaction.id) if self._by_date else (transaction.id,)
+
+    def _before(self, a, b):
+        return a > b if self._descending else a < b
+
+    def apply_pending(self):
+        # Оновлює кількість рядків і відкидає лише ті сторінки, позиції в яких зсунулись.
+        # Повертає True, якщо список змінився.
+        if self.text is not None:
+            # Позицію в ранжованій видачі не обчислити локально — перечитуємо результати пошуку
+            relevant = any(self.matches(t) for _, t in self._pending)
+            if relevant:
+                self.reset()
+            self._pending.clear()
+            return relevant
+        changed = False
+        while self._pending:
+            sign, transaction = self._pending.popleft()
+            if not self.matches(transaction):
+                continue
+            self.count += sign
+            key = self._sort_key(transaction)
+            # Повна сторінка, що цілком передує зміні, лишається без змін
+            self._pages = {number: page for number, page in self._pages.items()
+                           if len(page) == self.page_size and self._before(self._sort_key(page[-1]), key)}
+            changed = True
+        return changed
@@ -0,0 +1,108 @@
+import tkinter as tk
+from tkinter import ttk
+
+from core.metrics import METRICS
+from ui.list_model import TransactionListModel
+
+# (колонка, заголовок, ширина)
+COLUMNS = (
+    ("id", "#", 60),
+    ("date", "Дата", 90),
+    ("type", "Тип", 80),
+    ("category", "Категорія", 120),
+    ("amount", "Сума", 90),
+    ("description", "Опис", 240),
+)
+
+ROW_HEIGHT = 22
+
+
+class TransactionListView(ttk.Frame):
+    # Віртуалізований список: у Treeview лише видимі рядки, власна смуга прокрутки
+    # рухає вікно по всьому набору, а зміни застосовуються порядково (за id як iid)
+    def __init__(self, master, manager, page_size=100, order="-date", **kwargs):
+        super().__init__(master, **kwargs)
+        self.model = TransactionListModel(manager, page_size=page_size, order=order)
+        self.top = 0
+        self.visible = 1
+
+        style = ttk.Style(self)
+        style.configure("Transactions.Treeview", rowheight=ROW_HEIGHT, font=("Consolas", 10))
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in COLUMNS], show="headings",
+                                 style="Transactions.Treeview", selectmode="extended")
+        for column, heading, width in COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="e" if column in ("id", "amount") else "w")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_to(self.top - e.delta // 120 * 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.top - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.top + 3))
+
+    def destroy(self):
+        self.model.close()
+        super().destroy()
+
+    def set_filters(self, **filters):
+        self.model.set_filters(**filters)
+        self.top = 0
+        self._render()
+
+    def refresh(self):
+        # Застосовує зміни, що надійшли від FinanceManager, і перечитує лише видиме вікно
+        if self.model.apply_pending():
+            self._render()
+
+    def selected_ids(self):
+        return [int(iid) for iid in self.tree.selection()]
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.model) - self.visible))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.model)))
+        elif action == "scroll":
+            step = self.visible if unit == "pages" else 1
+            self.scroll_to(self.top + int(value) * step)
+
+    def _on_resize(self, event):
+        # Висота заголовка приблизно дорівнює висоті рядка
+        visible = max(1, event.height // ROW_HEIGHT - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self._render()
+
+    def _render(self):
+        with METRICS.timer("gui_refresh_seconds", stage="render"):
+            self._render_window()
+
+    def _render_window(self):
+        self.top = max(0, min(self.top, len(self.model) - self.visible))
+        rows = self.model.rows(self.top, self.top + self.visible)
+        wanted = [str(t.id) for t in rows]
+        wanted_set = set(wanted)
+        stale = [iid for iid in self.tree.get_children() if iid not in wanted_set]
+        if stale:
+            self.tree.delete(*stale)
+        for index, (iid, t) in enumerate(zip(wanted, rows)):
+            if self.tree.exists(iid):
+                if self.tree.index(iid) != index:
+                    self.tree.move(iid, "", index)
+            else:
+                self.tree.insert("", index, iid=iid, values=(
+                    t.id, t.date.date().isoformat(), t.get_type(), t.category, f"{t.amount:.2f}", t.description))
+        total = len(self.model)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + len(rows)) / total))
+        else:
+            self.scrollbar.set(0, 1)